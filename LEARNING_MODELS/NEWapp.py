@@ -1,34 +1,135 @@
+import time
+_import_started = time.perf_counter()
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, send_file, g, has_request_context
 from flask_cors import CORS
-import joblib
 import glob
 import os
 import json
 import hashlib
-import pandas as pd
+import hmac
 import datetime
 import random
-from geopy.geocoders import Nominatim
-from geopy.distance import geodesic
-import unicodedata
-from turfpy.measurement import area
-from geojson import Feature
+import itertools
+import copy
+import threading
+import zlib
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+from cache_predicoes import PredictionCache, text_hash
+from gazetteer import Gazetteer
+from geocodificacao import OfflineReverseGeocoder
+from normalizacao import normalize_text
+from fila_enriquecimento import EnrichmentQueue
+from armazenamento import PostLog, LogPostStore, SQLitePostStore, migrate_legacy_posts
+from dataset_incremental import DatasetState, exclusive_lock
+from inicializacao import StartupTimer, WarmUp, LazyObject, load_joblib_mmap
+from recarga_modelos import ModelReloader
+from metricas import MetricsRegistry, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from perfilador import SamplingProfiler
+# pandas, geopy, turfpy/geojson, o índice espacial (scipy) e o motor de inferência
+# (scikit-learn) são importados só quando usados
+
+startup_timer = StartupTimer()
+startup_timer.record("importacoes", time.perf_counter() - _import_started)
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=["X-Proximo-Cursor"])
 
 # --- Configurações de Arquivos ---
-REAL_POSTS_FILE = 'real_posts.json'
+REAL_POSTS_FILE = os.environ.get("REAL_POSTS_FILE", 'real_posts.json')
 DATASET_REAL_COMBINED_PATH = 'dataset_real_coletado.csv'
+# Tamanho dos blocos lidos do CSV ao servir /api/dataset_real
+DATASET_DOWNLOAD_CHUNK = 64 * 1024
 JSON_CITIES_FILE = "brazil_states_cities_geocoded.json"
 
-# --- Variáveis Globais para Publicações Reais ---
-loaded_posts_set = set()
-loaded_posts_list = []
+# --- Armazenamento de Publicações: "sqlite" (padrão, banco indexado) ou "jsonl" (log em memória) ---
+POSTS_BACKEND = os.environ.get("POSTS_BACKEND", "sqlite")
+POSTS_DB_PATH = os.environ.get("POSTS_DB_PATH", "real_posts.db")
+# Log JSONL somente-anexação usado pelo backend "jsonl" (e importado pelo sqlite na primeira execução)
+POSTS_LOG_DIR = os.environ.get("POSTS_LOG_DIR", "real_posts_log")
+# Tamanho máximo de página aceito pelo /publicacoes?limite=
+POSTS_PAGE_MAX = int(os.environ.get("POSTS_PAGE_MAX", 10000))
+POSTS_LOG_SEGMENT_MB = float(os.environ.get("POSTS_LOG_SEGMENT_MB", 8))
+POSTS_LOG_FSYNC_BATCH = int(os.environ.get("POSTS_LOG_FSYNC_BATCH", 64))
+POSTS_LOG_FSYNC_MS = int(os.environ.get("POSTS_LOG_FSYNC_MS", 1000))
+
+# --- Método de distância da validação geográfica: "haversine" (rápido) ou "geodesic" (exato) ---
+GEO_VALIDATION_METHOD = os.environ.get("GEO_VALIDATION_METHOD", "haversine")
+
+# --- Cache de Predições (PREDICTION_CACHE_DIR habilita o transbordo para disco) ---
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", 10000))
+PREDICTION_CACHE_DIR = os.environ.get("PREDICTION_CACHE_DIR") or None
+
+# --- Cidade citada no texto (extracao_local): resolve a localização antes do modelo
+# (LOCATION_MATCHER=0 deixa a localização só com o modelo) ---
+LOCATION_MATCHER = os.environ.get("LOCATION_MATCHER", "1") != "0"
+
+# --- Fila de Enriquecimento (ENRICHMENT_WORKERS=0 enriquece dentro da própria requisição) ---
+# Com a fila ligada, /publicar responde 202 {"status": "accepted", "id_hash"} sem REALcidade;
+# o cliente acompanha GET /publicar/<id_hash> até "concluido" (ou "falhou"). Com
+# ENRICHMENT_WORKERS=0 a resposta continua 201 {"status": "success", "REALcidade", "id_hash"}.
+ENRICHMENT_WORKERS = int(os.environ.get("ENRICHMENT_WORKERS", 2))
+ENRICHMENT_QUEUE_SIZE = int(os.environ.get("ENRICHMENT_QUEUE_SIZE", 1000))
+
+# --- Inicialização: "eager" (padrão, carrega tudo durante o import) ou "background"
+# (aquece em uma thread; "/", "/pronto" e "/inicializacao" respondem na hora e as demais
+# rotas esperam até STARTUP_WAIT_S segundos pelo fim do aquecimento) ---
+STARTUP_MODE = os.environ.get("STARTUP_MODE", "eager")
+STARTUP_WAIT_S = float(os.environ.get("STARTUP_WAIT_S", 60))
+# Cópias não comprimidas dos .pkl, abertas por memory-map (MODEL_MMAP=0 desativa)
+MODEL_MMAP = os.environ.get("MODEL_MMAP", "1") != "0"
+MODEL_DIR = os.environ.get("MODEL_DIR") or os.path.dirname(os.path.abspath(__file__))
+MODEL_CACHE_DIR = os.environ.get("MODEL_CACHE_DIR") or os.path.join(MODEL_DIR, "model_cache")
+
+# --- Métricas no formato do Prometheus em GET /metrics (METRICS=0 desativa a coleta) ---
+METRICS_ENABLED = os.environ.get("METRICS", "1") != "0"
+
+# --- Perfilador por amostragem (perfilador.py): fração das requisições perfiladas desde o
+# início (0 = só sob demanda, pelo cabeçalho X-Perfilar ou por /admin/perfilador) ---
+PROFILER_RATE = float(os.environ.get("PROFILER_RATE", 0))
+PROFILER_INTERVAL_MS = float(os.environ.get("PROFILER_INTERVAL_MS", 5))
+
+# --- Publicações Reais (ver get_post_store) ---
+posts_lock = threading.RLock()
 
 # --- Configuração do Geocodificador ---
-geolocator = Nominatim(user_agent="xai_environmental_api")
+# GEOCODER_MODE: "offline" (padrão, só o gazetteer local), "fallback" (Nominatim quando o
+# gazetteer não resolve) ou "remote" (só o Nominatim, comportamento antigo)
+GEOCODER_MODE = os.environ.get("GEOCODER_MODE", "offline")
+OFFLINE_GEOCODER_MAX_KM = float(os.environ.get("OFFLINE_GEOCODER_MAX_KM", 60))
+
+def _build_geolocator():
+    from geopy.geocoders import Nominatim
+    return Nominatim(user_agent="xai_environmental_api")
+
+geolocator = LazyObject(_build_geolocator)
+
+# --- Métricas (metricas.py; gauges e rota /metrics no fim do arquivo) ---
+metrics = MetricsRegistry(enabled=METRICS_ENABLED)
+stage_seconds = metrics.histogram(
+    "forumweb_etapa_segundos", "Duração de cada etapa do processamento das publicações.", ["etapa"])
+request_seconds = metrics.histogram("forumweb_requisicao_segundos", "Duração das requisições por rota.", ["rota"])
+posts_received = metrics.counter(
+    "forumweb_publicacoes_recebidas_total", "Publicações recebidas em /publicar, por resultado.", ["resultado"])
+posts_evaluated = metrics.counter(
+    "forumweb_avaliacoes_total", "Publicações avaliadas, por resultado e motivo da recusa.", ["resultado", "motivo"])
+
+def stage_timer(stage):
+    return stage_seconds.time(stage)
+
+def observe_stage(stage, started):
+    stage_seconds.observe(time.perf_counter() - started, stage)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def observe_request_time(response):
+    started = g.get("request_started")
+    if started is not None:
+        request_seconds.observe(time.perf_counter() - started, request.endpoint or "desconhecida")
+    return response
 
 # --- Dados de Localização e Impacto ---
 locations_data = []
@@ -214,7 +315,8 @@ def load_brazilian_cities_from_json(json_file_path):
                     "latitude": final_lat,
                     "longitude": final_lon,
                     "continente": continent,
-                    "pais": country
+                    "pais": country,
+                    "cod_ibge": city_info.get("cod_ibge")
                 })
         print(f"✅ Carregadas {len(cities_data_local)} localidades do arquivo '{json_file_path}'.")
         return cities_data_local
@@ -233,81 +335,318 @@ def load_brazilian_cities_from_json(json_file_path):
         print(f"❌ Ocorreu um erro inesperado ao carregar o JSON: {e}")
         return []
 
-locations_data = load_brazilian_cities_from_json(JSON_CITIES_FILE)
+# Artefatos efetivamente carregados (caminho, mtime e tamanho) por prefixo
+model_artifacts = {}
+MODEL_PREFIXES = ("modelo_evento_final", "modelo_local_final", "modelo_impacto_final")
+
+def _artefato(caminho, modelo):
+    stat = os.stat(caminho)
+    return {
+        "caminho": caminho,
+        "mtime_ns": stat.st_mtime_ns,
+        "tamanho": stat.st_size,
+        "modelo_id": id(modelo)
+    }
+
+def _registrar_artefato(prefixo, caminho, modelo):
+    model_artifacts[prefixo] = _artefato(caminho, modelo)
+    return modelo
+
+def _load_model_file(caminho):
+    if MODEL_MMAP:
+        return load_joblib_mmap(caminho, MODEL_CACHE_DIR)
+    import joblib
+    return joblib.load(caminho)
+
+def encontrar_modelo_mais_recente(prefixo):
+    """Caminho do artefato a usar: `<prefixo>.pkl` ou, na falta dele, o `<prefixo>_*.pkl` mais recente."""
+    nome_simples = os.path.join(MODEL_DIR, f"{prefixo}.pkl")
+    if os.path.isfile(nome_simples):
+        return nome_simples
+    arquivos = sorted(glob.glob(os.path.join(MODEL_DIR, f"{prefixo}_*.pkl")))
+    return arquivos[-1] if arquivos else None
 
 def carregar_modelo_mais_recente(prefixo):
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    nome_simples = os.path.join(base_dir, f"{prefixo}.pkl")
+    caminho = encontrar_modelo_mais_recente(prefixo)
+    if caminho is None:
+        print(f"⚠️ Nenhum arquivo encontrado para o prefixo: {prefixo} no diretório {MODEL_DIR}")
+        return None
     try:
-        if os.path.isfile(nome_simples):
-            print(f"🔁 Carregando modelo (sem timestamp): {nome_simples}")
-            return joblib.load(nome_simples)
-        arquivos = glob.glob(os.path.join(base_dir, f"{prefixo}_*.pkl"))
-        if not arquivos:
-            print(f"⚠️ Nenhum arquivo encontrado para o prefixo: {prefixo} no diretório {base_dir}")
-            return None
-        arquivos.sort()
-        print(f"🔁 Carregando modelo (com timestamp): {arquivos[-1]}")
-        return joblib.load(arquivos[-1])
+        print(f"🔁 Carregando modelo: {caminho}")
+        return _registrar_artefato(prefixo, caminho, _load_model_file(caminho))
     except Exception as e:
         print(f"❌ Erro ao carregar modelo {prefixo}: {e}")
         return None
 
-modelo_categoria = carregar_modelo_mais_recente("modelo_evento_final")
-modelo_localizacao = carregar_modelo_mais_recente("modelo_local_final")
-modelo_impacto = carregar_modelo_mais_recente("modelo_impacto_final")
+# Carregados por warm_up() e trocados (os três juntos) por swap_models()
+modelo_categoria = None
+modelo_localizacao = None
+modelo_impacto = None
+models_lock = threading.RLock()
+
+# --- Motor de Inferência Compartilhado (tokeniza cada texto uma única vez) ---
+_inference_engine_cache = {}
+prediction_cache = PredictionCache(maxsize=PREDICTION_CACHE_SIZE, spill_dir=PREDICTION_CACHE_DIR)
+
+def get_model_version(modelos=None, artefatos=None):
+    # Identidade dos artefatos carregados; modelos sem arquivo (ex.: testes) entram pelo id do objeto
+    if modelos is None:
+        with models_lock:
+            modelos = (modelo_categoria, modelo_localizacao, modelo_impacto)
+            artefatos = dict(model_artifacts)
+    partes = []
+    for prefixo, modelo in zip(MODEL_PREFIXES, modelos):
+        artefato = artefatos.get(prefixo)
+        if modelo is not None and artefato and artefato["modelo_id"] == id(modelo):
+            partes.append(f"{artefato['caminho']}:{artefato['mtime_ns']}:{artefato['tamanho']}")
+        else:
+            partes.append(f"{prefixo}:{id(modelo) if modelo is not None else None}")
+    return hashlib.sha256("|".join(partes).encode('utf-8')).hexdigest()[:16]
+
+def _build_engine(modelos, versao):
+    from inferencia import SharedTfidfEngine, FusedPredictor
+    engine = SharedTfidfEngine({
+        "categoria": modelos[0],
+        "localizacao": modelos[1],
+        "impacto": modelos[2]
+    })
+    return {"engine": engine, "predictor": FusedPredictor(engine, stage_timer=stage_timer), "modelos": modelos, "versao": versao}
+
+def _current_models():
+    """Modelos atuais com motor e versão, lidos juntos (nunca no meio de uma troca)."""
+    with models_lock:
+        modelos = (modelo_categoria, modelo_localizacao, modelo_impacto)
+        atual = _inference_engine_cache.get("atual")
+        if atual is None or any(a is not b for a, b in zip(atual["modelos"], modelos)):
+            atual = _build_engine(modelos, get_model_version())
+            _inference_engine_cache["atual"] = atual
+    # Comparação barata: também cobre um prediction_cache substituído depois da criação do motor
+    if prediction_cache.model_version != atual["versao"]:
+        prediction_cache.set_model_version(atual["versao"])
+    return atual
+
+def request_models():
+    """Como _current_models, mas fixo durante toda a requisição: uma recarga no meio dela
+    só vale para as próximas, e a requisição nunca mistura versões de modelo."""
+    if has_request_context():
+        if "modelos" not in g:
+            g.modelos = _current_models()
+        return g.modelos
+    return _current_models()
+
+def get_inference_engine():
+    return request_models()["engine"]
+
+def get_predictor():
+    return request_models()["predictor"]
+
+def mentioned_cities(texts):
+    """Cidade citada sem ambiguidade em cada texto (dict do gazetteer) ou None."""
+    if not LOCATION_MATCHER:
+        return [None] * len(texts)
+    matcher = get_location_matcher()
+    with stage_timer("extracao_cidade"):
+        return [matcher.resolve(text) for text in texts]
+
+def predict_texts(texts):
+    """Predições do FusedPredictor para cada texto, consultando antes o cache LRU.
+
+    Quando o texto cita a cidade sem ambiguidade, a localização vem da menção e a
+    cabeça de localização não é avaliada; o cache guarda só a saída dos modelos.
+    """
+    from inferencia import HeadPrediction
+    modelos = request_models()
+    versao = modelos["versao"]
+    predictor = modelos["predictor"]
+    cities = mentioned_cities(texts)
+    keys = [text_hash(text) for text in texts]
+    results = [prediction_cache.get(key, version=versao) for key in keys]
+    # Textos sem cidade citada precisam da cabeça de localização; os demais, só das outras
+    full, partial = {}, {}
+    for key, text, result, city in zip(keys, texts, results, cities):
+        needs_location = city is None and "localizacao" in predictor
+        if result is None or (needs_location and "localizacao" not in result):
+            (full if needs_location else partial).setdefault(key, text)
+    computed = {}
+    if full:
+        computed.update(zip(full, predictor.predict(list(full.values()))))
+    if partial:
+        computed.update(zip(partial, predictor.predict(list(partial.values()), heads=("categoria", "impacto"))))
+    for key, prediction in computed.items():
+        prediction_cache.put(key, prediction, version=versao)
+    results = [computed.get(key, result) for key, result in zip(keys, results)]
+    return [
+        dict(result, localizacao=HeadPrediction(city["cidade"], 1.0, [(city["cidade"], 1.0)])) if city else result
+        for result, city in zip(results, cities)
+    ]
+
+# --- Recarga dos Modelos (observador de arquivos ou /admin/recarregar_modelos) ---
+# MODEL_WATCH_INTERVAL_S: intervalo de verificação dos .pkl (0 desativa o observador)
+MODEL_WATCH_INTERVAL_S = float(os.environ.get("MODEL_WATCH_INTERVAL_S", 30))
+# Sem ADMIN_TOKEN as rotas /admin/* ficam desativadas
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+SMOKE_TEST_TEXTS = [
+    "Enchente forte em São Paulo, São Paulo com ruas alagadas e casas destruídas",
+    "Queimada de grandes proporções em Belo Horizonte, Minas Gerais, fumaça densa"
+]
+
+def model_fingerprint():
+    """(caminho, mtime, tamanho) dos artefatos que carregar_modelo_mais_recente escolheria agora."""
+    fingerprint = []
+    for prefixo in MODEL_PREFIXES:
+        caminho = encontrar_modelo_mais_recente(prefixo)
+        stat = os.stat(caminho) if caminho else None
+        fingerprint.append((caminho, stat.st_mtime_ns, stat.st_size) if stat else None)
+    return tuple(fingerprint)
+
+def _load_model_candidates():
+    modelos, artefatos = [], {}
+    for prefixo in MODEL_PREFIXES:
+        caminho = encontrar_modelo_mais_recente(prefixo)
+        if caminho is None:
+            raise FileNotFoundError(f"nenhum artefato para {prefixo} em {MODEL_DIR}")
+        modelo = _load_model_file(caminho)
+        artefatos[prefixo] = _artefato(caminho, modelo)
+        modelos.append(modelo)
+    modelos = tuple(modelos)
+    # O motor é montado aqui, fora do caminho das requisições
+    return _build_engine(modelos, get_model_version(modelos, artefatos)), artefatos
+
+def _smoke_test_models(candidate):
+    modelos, _ = candidate
+    predictions = modelos["predictor"].predict(SMOKE_TEST_TEXTS)
+    if len(predictions) != len(SMOKE_TEST_TEXTS):
+        raise ValueError("predição de teste devolveu um número errado de resultados")
+    for prediction in predictions:
+        for head in ("categoria", "localizacao", "impacto"):
+            if head not in prediction or prediction[head].label is None:
+                raise ValueError(f"predição de teste sem '{head}'")
+
+def swap_models(candidate):
+    """Troca os três modelos (e o motor já montado) de uma vez."""
+    global modelo_categoria, modelo_localizacao, modelo_impacto
+    modelos, artefatos = candidate
+    with models_lock:
+        modelo_categoria, modelo_localizacao, modelo_impacto = modelos["modelos"]
+        model_artifacts.update(artefatos)
+        _inference_engine_cache["atual"] = modelos
+
+model_reloader = ModelReloader(model_fingerprint, _load_model_candidates, _smoke_test_models, swap_models)
 
 # --- Funções para Gerenciar Publicações Reais ---
+_post_store_cache = {}
+
+def _build_post_store():
+    if POSTS_BACKEND == "jsonl":
+        post_log = PostLog(
+            POSTS_LOG_DIR,
+            segment_max_bytes=int(POSTS_LOG_SEGMENT_MB * 1024 * 1024),
+            fsync_batch=POSTS_LOG_FSYNC_BATCH,
+            fsync_interval=POSTS_LOG_FSYNC_MS / 1000
+        )
+        # O real_posts.json antigo é importado uma única vez e renomeado para .migrado
+        return LogPostStore(post_log, legacy_json=REAL_POSTS_FILE)
+    store = SQLitePostStore(POSTS_DB_PATH)
+    migrate_legacy_posts(store, log_dir=POSTS_LOG_DIR, json_path=REAL_POSTS_FILE)
+    return store
+
+def get_post_store():
+    key = (POSTS_BACKEND, POSTS_DB_PATH, POSTS_LOG_DIR, REAL_POSTS_FILE)
+    with posts_lock:
+        if _post_store_cache.get("config") != key:
+            if _post_store_cache.get("store") is not None:
+                _post_store_cache["store"].close()
+            _post_store_cache["store"] = _build_post_store()
+            _post_store_cache["config"] = key
+        return _post_store_cache["store"]
+
+def close_post_store():
+    """Fecha o armazenamento deste processo; o próximo get_post_store() o abre de novo."""
+    with posts_lock:
+        store = _post_store_cache.pop("store", None)
+        _post_store_cache.pop("config", None)
+    if store is not None:
+        store.close()
+
 def load_real_posts():
-    global loaded_posts_set, loaded_posts_list
-    if os.path.exists(REAL_POSTS_FILE):
-        with open(REAL_POSTS_FILE, 'r', encoding='utf-8') as f:
-            try:
-                data = json.load(f)
-                loaded_posts_list = data
-                for post in loaded_posts_list:
-                    if 'id_hash' in post:
-                        loaded_posts_set.add(post['id_hash'])
-                    else:
-                        message_hash = hashlib.sha256(
-                            f"{post.get('titulo', '')}{post.get('conteudo', '')}".encode('utf-8')
-                        ).hexdigest()
-                        loaded_posts_set.add(message_hash)
-                        post['id_hash'] = message_hash
-            except json.JSONDecodeError:
-                print(f"⚠️ Aviso: Arquivo {REAL_POSTS_FILE} corrompido ou vazio. Iniciando com lista vazia.")
-                loaded_posts_set = set()
-                loaded_posts_list = []
-    print(f"✅ Carregadas {len(loaded_posts_list)} publicações existentes para deduplicação.")
+    store = get_post_store()
+    print(f"✅ {store.count()} publicações existentes disponíveis para deduplicação ({POSTS_BACKEND}).")
+
+def persist_post(post):
+    """Grava o estado atual de uma publicação (uma linha/registro, sem reescrever as demais)."""
+    with stage_timer("persistencia"):
+        get_post_store().update(post)
 
 def save_real_posts():
-    with open(REAL_POSTS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(loaded_posts_list, f, ensure_ascii=False, indent=4)
-    print(f"💾 Salvas {len(loaded_posts_list)} publicações em {REAL_POSTS_FILE}.")
+    """Compacta o armazenamento (snapshot do log ou checkpoint do WAL); não é necessário a cada gravação."""
+    store = get_post_store()
+    store.compact()
+    print(f"💾 Salvas {store.count()} publicações ({POSTS_BACKEND}).")
+
+# === Índices do Gazetteer ===
+# Índice espacial (KD-tree) e índices por nome/código IBGE, montados uma única vez
+_city_index_cache = {}
+_gazetteer_cache = {}
+_location_matcher_cache = {}
 
-load_real_posts()
+def get_city_index():
+    if _city_index_cache.get("origem") is not locations_data:
+        from geoespacial import CityIndex
+        _city_index_cache["index"] = CityIndex(locations_data)
+        _city_index_cache["origem"] = locations_data
+    return _city_index_cache["index"]
+
+def get_gazetteer():
+    if _gazetteer_cache.get("origem") is not locations_data:
+        _gazetteer_cache["gazetteer"] = Gazetteer(locations_data)
+        _gazetteer_cache["origem"] = locations_data
+    return _gazetteer_cache["gazetteer"]
+
+def get_location_matcher():
+    gazetteer = get_gazetteer()
+    if _location_matcher_cache.get("origem") is not gazetteer:
+        from extracao_local import LocationMatcher
+        _location_matcher_cache["matcher"] = LocationMatcher(gazetteer)
+        _location_matcher_cache["origem"] = gazetteer
+    return _location_matcher_cache["matcher"]
 
 # === Função Auxiliar para Correspondência de Coordenadas ===
+
 def find_closest_city(lat, lon, max_distance_km=100):
     try:
         lat = round(float(lat), 4)
         lon = round(float(lon), 4)
-        closest_city = None
-        min_distance = float('inf')
-        for loc in locations_data:
-            if loc["latitude"] is not None and loc["longitude"] is not None:
-                distance = ((lat - loc["latitude"]) ** 2 + (lon - loc["longitude"]) ** 2) ** 0.5 * 111
-                if distance < min_distance:
-                    min_distance = distance
-                    closest_city = loc["cidade"]
-        if closest_city and min_distance <= max_distance_km:
-            return closest_city
-        return None
+        with stage_timer("cidade_mais_proxima"):
+            closest, _ = get_city_index().nearest(lat, lon, max_distance_km=max_distance_km)
+        return closest["cidade"] if closest else None
     except (ValueError, TypeError):
         return None
 
+def find_closest_cities(coordinates, max_distance_km=100):
+    """Versão em lote de find_closest_city: recebe uma lista de (lat, lon) e
+    devolve a cidade mais próxima de cada ponto (ou None) em uma única consulta ao índice."""
+    points = []
+    for lat, lon in coordinates:
+        try:
+            points.append((round(float(lat), 4), round(float(lon), 4)))
+        except (ValueError, TypeError):
+            points.append((None, None))
+    with stage_timer("cidade_mais_proxima"):
+        nearest = get_city_index().nearest_many(points, max_distance_km=max_distance_km)
+    return [closest["cidade"] if closest else None for closest, _ in nearest]
+
+def find_k_closest_cities(lat, lon, k=5, max_distance_km=None):
+    """Lista de (cidade, estado, distância_km) das k cidades mais próximas."""
+    return [
+        (loc["cidade"], loc["estado"], round(distance, 3))
+        for loc, distance in get_city_index().k_nearest(lat, lon, k, max_distance_km=max_distance_km)
+    ]
+
 # === Função Auxiliar para Geocodificação ===
-def get_city_from_coordinates(lat, lon):
+def get_offline_geocoder():
+    return OfflineReverseGeocoder(get_city_index(), max_distance_km=OFFLINE_GEOCODER_MAX_KM)
+
+def get_city_from_nominatim(lat, lon):
     try:
         location = geolocator.reverse((lat, lon), language='pt')
         if location and location.raw.get('address'):
@@ -318,6 +657,33 @@ def get_city_from_coordinates(lat, lon):
         print(f"❌ Erro ao geocodificar coordenadas ({lat}, {lon}): {e}")
         return None
 
+def reverse_geocode(lat, lon):
+    """Cidade/estado das coordenadas segundo GEOCODER_MODE, ou None."""
+    with stage_timer("geocodificacao_reversa"):
+        if GEOCODER_MODE != "remote":
+            result = get_offline_geocoder().reverse(lat, lon)
+            if result or GEOCODER_MODE == "offline":
+                return result
+        city = get_city_from_nominatim(lat, lon)
+    return {"cidade": city, "estado": None, "cod_ibge": None, "distancia_km": None, "fonte": "nominatim"} if city else None
+
+def get_city_from_coordinates(lat, lon):
+    result = reverse_geocode(lat, lon)
+    return result["cidade"] if result else None
+
+# === Função Auxiliar para Calcular a Área Demarcada (km²) ===
+def calculate_marked_area(marcacao):
+    predicted_area = 0
+    if marcacao:
+        marcacao_geojson = json.loads(marcacao)
+        if marcacao_geojson.get('type') == 'Feature' and marcacao_geojson.get('geometry', {}).get('type') == 'Polygon':
+            from turfpy.measurement import area
+            from geojson import Feature
+            with stage_timer("area_turfpy"):
+                predicted_area = area(Feature(geometry=marcacao_geojson['geometry'])) / 1_000_000
+            predicted_area = round(predicted_area, 2)
+    return predicted_area
+
 # === Função Auxiliar para Determinar Nível de Impacto com Área ===
 def determine_impact_level_with_area(pred_imp, area_km2):
     try:
@@ -334,13 +700,6 @@ def determine_impact_level_with_area(pred_imp, area_km2):
     except (ValueError, TypeError):
         return "indefinido"
 
-# === Função Auxiliar para Normalizar Nomes de Cidades e Textos ===
-def normalize_text(text):
-    if not text:
-        return ""
-    text = unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII')
-    return text.lower().strip()
-
 # === Funções de Validação ===
 def validate_text_quality(text):
     MIN_LENGTH = 50  # Aumentado para exigir mais conteúdo
@@ -365,13 +724,29 @@ def validate_timestamp(timestamp, max_days=30):
     except:
         return False, "timestamp inválido"
 
-def validate_category(text, predicted_category):
+# Sinônimos de categoria e intensidade compilados em um único autômato (sinonimos.py)
+_synonym_matcher_cache = {}
+
+def get_synonym_matcher():
+    origem = (disaster_synonyms_validation, impact_data)
+    if _synonym_matcher_cache.get("origem") is None or any(a is not b for a, b in zip(_synonym_matcher_cache["origem"], origem)):
+        from sinonimos import SynonymMatcher
+        _synonym_matcher_cache["matcher"] = SynonymMatcher(disaster_synonyms_validation, impact_data)
+        _synonym_matcher_cache["origem"] = origem
+    return _synonym_matcher_cache["matcher"]
+
+def scan_synonyms(text):
+    """Categorias e níveis de impacto com sinônimo no texto, em uma passada; reaproveitável
+    por validate_category e validate_impact (parâmetro `hits`)."""
+    return get_synonym_matcher().scan(normalize_text(text) or "")
+
+def validate_category(text, predicted_category, hits=None):
     text = normalize_text(text) or ""
-    synonyms = disaster_synonyms_validation.get(predicted_category, [])
-    # Inclui a própria categoria como sinônimo válido
-    synonyms = synonyms + [predicted_category]
-    # Exige pelo menos uma palavra-chave relevante no texto
-    has_relevant_term = any(synonym in text for synonym in synonyms)
+    matcher = get_synonym_matcher()
+    if hits is None:
+        hits = matcher.scan(text)
+    # Exige pelo menos uma palavra-chave relevante no texto (sinônimo ou a própria categoria)
+    has_relevant_term = matcher.has_category(hits, text, predicted_category)
     if not has_relevant_term:
         return False, f"categoria {predicted_category} não corresponde aos sinônimos ou à própria categoria"
     # Verifica coerência semântica: exige um mínimo de contexto descritivo
@@ -380,22 +755,62 @@ def validate_category(text, predicted_category):
         return False, "texto sem contexto suficiente para a categoria"
     return True, "válido"
 
-def validate_impact(text, impact_level):
-    text = normalize_text(text) or ""
-    impact_details = impact_data.get(impact_level, impact_data["indefinido"])
-    synonyms = impact_details["sinonimos_intensidade"]
-    return any(synonym in text for synonym in synonyms), f"impacto {impact_level} {'válido' if any(synonym in text for synonym in synonyms) else 'não corresponde ao texto'}"
+def validate_impact(text, impact_level, hits=None):
+    matcher = get_synonym_matcher()
+    if hits is None:
+        hits = matcher.scan(normalize_text(text) or "")
+    has_synonym = matcher.has_impact(hits, impact_level)
+    return has_synonym, f"impacto {impact_level} {'válido' if has_synonym else 'não corresponde ao texto'}"
 
-def validate_geographic_proximity(lat, lon, predicted_city, max_distance_km=100):
+def validate_geographic_proximity(lat, lon, predicted_city, max_distance_km=100, method="geodesic", state=None):
+    # method="haversine" usa a esfera (rápido); "geodesic" usa o elipsoide do geopy (exato)
+    if method == "haversine":
+        return validate_geographic_proximity_batch([(lat, lon, predicted_city)], max_distance_km, states=[state])[0]
     if lat is None or lon is None:
         return False, "coordenadas ausentes"
-    city_data = next((loc for loc in locations_data if loc["cidade"] == predicted_city), None)
+    city_data = get_gazetteer().find(predicted_city, state)
     if not city_data or city_data["latitude"] is None or city_data["longitude"] is None:
         return False, f"cidade {predicted_city} não encontrada ou sem coordenadas"
+    from geopy.distance import geodesic
     distance = geodesic((lat, lon), (city_data["latitude"], city_data["longitude"])).km
     return distance <= max_distance_km, f"distância {'válida' if distance <= max_distance_km else f'excede {max_distance_km} km'}"
 
-def validate_model_confidence(model, text, predicted_label, min_confidence=0.7):
+def validate_geographic_proximity_batch(triples, max_distance_km=100, method="haversine", states=None):
+    """Valida uma lista de (lat, lon, cidade_predita) de uma vez, com as mesmas mensagens da versão unitária.
+    `states` (opcional, alinhada com `triples`) desambigua cidades homônimas."""
+    states = states or [None] * len(triples)
+    if method != "haversine":
+        return [validate_geographic_proximity(lat, lon, city, max_distance_km, method=method, state=state)
+                for (lat, lon, city), state in zip(triples, states)]
+    index = get_city_index()
+    gazetteer = get_gazetteer()
+    results = [None] * len(triples)
+    slots, positions, lats, lons = [], [], [], []
+    for i, ((lat, lon, predicted_city), state) in enumerate(zip(triples, states)):
+        if lat is None or lon is None:
+            results[i] = (False, "coordenadas ausentes")
+            continue
+        position = index.position_of(gazetteer.find(predicted_city, state))
+        if position is None:
+            results[i] = (False, f"cidade {predicted_city} não encontrada ou sem coordenadas")
+            continue
+        try:
+            lats.append(float(lat))
+            lons.append(float(lon))
+        except (ValueError, TypeError):
+            results[i] = (False, "coordenadas inválidas")
+            continue
+        slots.append(i)
+        positions.append(position)
+    if slots:
+        for i, distance in zip(slots, index.distances_to(positions, lats, lons).tolist()):
+            results[i] = (distance <= max_distance_km, f"distância {'válida' if distance <= max_distance_km else f'excede {max_distance_km} km'}")
+    return results
+
+def validate_model_confidence(model, text, predicted_label, min_confidence=0.7, confidence=None):
+    # `confidence` já calculada pelo FusedPredictor evita uma nova passada pelo modelo
+    if confidence is not None:
+        return confidence >= min_confidence, f"confiança {confidence:.2f} {'válida' if confidence >= min_confidence else 'abaixo do mínimo'}"
     if hasattr(model, 'predict_proba'):
         try:
             proba = model.predict_proba([text])[0]
@@ -413,48 +828,236 @@ def validate_area_consistency(area_km2, impact_level):
 
 def validate_regional_context(category, real_cidade):
     if real_cidade:
-        city_data = next((loc for loc in locations_data if normalize_text(loc["cidade"]) == normalize_text(real_cidade)), None)
+        city_data = get_gazetteer().find_normalized(real_cidade)
         if city_data and category in implausible_categories:
             return city_data["pais"] not in implausible_categories[category], f"categoria {category} {'válida' if city_data['pais'] not in implausible_categories[category] else 'improvável para o país'}"
     return True, "contexto regional válido"
 
+# === Funções Auxiliares de Predição ===
+MAX_BATCH_SIZE = 1024
+
+def parse_prediction_input(data):
+    titulo = data.get("titulo", "")
+    conteudo = data.get("conteudo", "")
+    if not (titulo.strip() or conteudo.strip()):
+        raise ValueError("Pelo menos título ou conteúdo deve ser fornecido")
+    return {
+        "text_input": f"{titulo.strip()} {conteudo.strip()}".strip(),
+        "lat": data.get("lat"),
+        "lon": data.get("lon"),
+        "area_demarcada": data.get("areaDemarcada", "N/A")
+    }
+
+def build_prediction(pred_cat, pred_loc, pred_imp, closest_city, area_demarcada):
+    cidade = closest_city if closest_city else pred_loc
+    impact_level = determine_impact_level_with_area(pred_imp, area_demarcada if area_demarcada != "N/A" else 0)
+    return {
+        "categoria": pred_cat,
+        "cidade": cidade,
+        "impacto": impact_level
+    }
+
+def predict_batch(items):
+    """Executa cada modelo uma única vez sobre todos os textos do lote."""
+    texts = [item["text_input"] for item in items]
+    preds = predict_texts(texts)
+    preds_cat = [p["categoria"].label if "categoria" in p else "Modelo de Categoria não carregado" for p in preds]
+    preds_loc = [p["localizacao"].label if "localizacao" in p else "Modelo de Localização não carregado" for p in preds]
+    preds_imp = [p["impacto"].label if "impacto" in p else "Modelo de Impacto não carregado" for p in preds]
+    com_coordenadas = [i for i, item in enumerate(items) if item["lat"] is not None and item["lon"] is not None]
+    closest = [None] * len(items)
+    for i, cidade in zip(com_coordenadas, find_closest_cities([(items[i]["lat"], items[i]["lon"]) for i in com_coordenadas], max_distance_km=100)):
+        closest[i] = cidade
+    return [
+        build_prediction(preds_cat[i], preds_loc[i], preds_imp[i], closest[i], item["area_demarcada"])
+        for i, item in enumerate(items)
+    ]
+
 # === Endpoints da API ===
 @app.route("/predict", methods=["POST"])
 def predict():
+    started = time.perf_counter()
     data = request.get_json()
     if not data:
         return jsonify({"erro": "Nenhum dado fornecido"}), 400
-    titulo = data.get("titulo", "")
-    conteudo = data.get("conteudo", "")
-    lat = data.get("lat")
-    lon = data.get("lon")
-    area_demarcada = data.get("areaDemarcada", "N/A")
-    if not (titulo.strip() or conteudo.strip()):
-        return jsonify({"erro": "Pelo menos título ou conteúdo deve ser fornecido"}), 400
-    text_input = f"{titulo.strip()} {conteudo.strip()}".strip()
     try:
-        pred_cat = modelo_categoria.predict([text_input])[0] if modelo_categoria else "Modelo de Categoria não carregado"
-        pred_loc = modelo_localizacao.predict([text_input])[0] if modelo_localizacao else "Modelo de Localização não carregado"
-        pred_imp = modelo_impacto.predict([text_input])[0] if modelo_impacto else "Modelo de Impacto não carregado"
-        cidade = pred_loc
+        item = parse_prediction_input(data)
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+    observe_stage("parse", started)
+    text_input = item["text_input"]
+    lat = item["lat"]
+    lon = item["lon"]
+    try:
+        preds = predict_texts([text_input])[0]
+        pred_cat = preds["categoria"].label if "categoria" in preds else "Modelo de Categoria não carregado"
+        pred_loc = preds["localizacao"].label if "localizacao" in preds else "Modelo de Localização não carregado"
+        pred_imp = preds["impacto"].label if "impacto" in preds else "Modelo de Impacto não carregado"
+        closest_city = None
         if lat is not None and lon is not None:
             closest_city = find_closest_city(lat, lon, max_distance_km=100)
-            if closest_city:
-                cidade = closest_city
-        impact_level = determine_impact_level_with_area(pred_imp, area_demarcada if area_demarcada != "N/A" else 0)
-        return jsonify({
-            "categoria": pred_cat,
-            "cidade": cidade,
-            "impacto": impact_level
-        })
+        return jsonify(build_prediction(pred_cat, pred_loc, pred_imp, closest_city, item["area_demarcada"]))
     except Exception as e:
         print(f"Erro no endpoint /predict: {str(e)}")
         return jsonify({"erro": str(e)}), 500
 
+@app.route("/predict_lote", methods=["POST"])
+def predict_lote():
+    started = time.perf_counter()
+    data = request.get_json()
+    posts = data.get("publicacoes") if isinstance(data, dict) else data
+    if not posts or not isinstance(posts, list):
+        return jsonify({"erro": "Nenhuma lista de publicações fornecida"}), 400
+    if len(posts) > MAX_BATCH_SIZE:
+        return jsonify({"erro": f"Lote excede o limite de {MAX_BATCH_SIZE} publicações"}), 400
+    resultados = [None] * len(posts)
+    validos = []
+    posicoes = []
+    for i, post in enumerate(posts):
+        try:
+            if not isinstance(post, dict) or not post:
+                raise ValueError("Nenhum dado fornecido")
+            validos.append(parse_prediction_input(post))
+            posicoes.append(i)
+        except (ValueError, AttributeError) as e:
+            resultados[i] = {"erro": str(e)}
+    observe_stage("parse", started)
+    try:
+        if validos:
+            for i, resultado in zip(posicoes, predict_batch(validos)):
+                resultados[i] = resultado
+        return jsonify({"resultados": resultados, "total": len(resultados)})
+    except Exception as e:
+        print(f"Erro no endpoint /predict_lote: {str(e)}")
+        return jsonify({"erro": str(e)}), 500
+
+# === Enriquecimento de Publicações ===
+def enrich_post(message_hash):
+    """Preenche REALcidade/REALestado, área demarcada e predições de uma publicação já armazenada."""
+    post = get_post_store().get(message_hash)
+    if post is None:
+        raise KeyError(f"publicação {message_hash[:8]}... não encontrada")
+    titulo, conteudo = post.get('titulo', ''), post.get('conteudo', '')
+    lat, lon, marcacao = post.get('lat'), post.get('lon'), post.get('marcacao')
+    real_cidade = None
+    real_estado = None
+    if lat is not None and lon is not None:
+        geocoded = reverse_geocode(lat, lon)
+        if geocoded:
+            real_cidade = geocoded["cidade"]
+            real_estado = geocoded["estado"]
+    try:
+        area_km2 = calculate_marked_area(marcacao)
+    except Exception as e:
+        print(f"Erro ao calcular área para marcacao: {e}")
+        area_km2 = 0
+    predicao = None
+    text_input = f"{(titulo or '').strip()} {(conteudo or '').strip()}".strip()
+    if text_input:
+        preds = predict_texts([text_input])[0]
+        predicao = {name: preds[name].label for name in ("categoria", "localizacao", "impacto") if name in preds}
+        if "impacto" in predicao:
+            predicao["impacto"] = determine_impact_level_with_area(predicao["impacto"], area_km2)
+    post.update({
+        "REALcidade": real_cidade,
+        "REALestado": real_estado,
+        "area_km2": area_km2,
+        "predicao": predicao,
+        "status_enriquecimento": "concluido"
+    })
+    persist_post(post)
+    print(f"🧭 Publicação enriquecida (hash: {message_hash[:8]}..., REALcidade: {real_cidade}).")
+    return post
+
+# === Inicialização e Aquecimento ===
+def warm_up():
+    """Carrega gazetteer, modelos e publicações e monta os índices, cronometrando cada etapa."""
+    global locations_data, modelo_categoria, modelo_localizacao, modelo_impacto
+    with startup_timer.step("gazetteer_json"):
+        locations_data = load_brazilian_cities_from_json(JSON_CITIES_FILE)
+    fingerprint = model_fingerprint()
+    modelos = []
+    for prefixo in MODEL_PREFIXES:
+        with startup_timer.step(prefixo):
+            modelos.append(carregar_modelo_mais_recente(prefixo))
+    with models_lock:
+        modelo_categoria, modelo_localizacao, modelo_impacto = modelos
+    model_reloader.loaded_fingerprint = fingerprint
+    with startup_timer.step("publicacoes"):
+        load_real_posts()
+    with startup_timer.step("indices_gazetteer"):
+        get_city_index()
+        get_gazetteer()
+    if LOCATION_MATCHER:
+        with startup_timer.step("extrator_cidades"):
+            get_location_matcher()
+    with startup_timer.step("sinonimos"):
+        get_synonym_matcher()
+    if any(modelo is not None for modelo in (modelo_categoria, modelo_localizacao, modelo_impacto)):
+        with startup_timer.step("motor_inferencia"):
+            get_inference_engine()
+
+startup_warmup = WarmUp(warm_up)
+# Rotas que respondem mesmo durante o aquecimento
+STARTUP_EXEMPT_ENDPOINTS = {"health_check", "readiness_check", "get_startup_report", "get_metrics"}
+
+@app.before_request
+def wait_for_warm_up():
+    if startup_warmup.ready or request.endpoint in STARTUP_EXEMPT_ENDPOINTS:
+        return None
+    if not startup_warmup.wait(STARTUP_WAIT_S):
+        return jsonify({"status": "error", "message": "Serviço ainda inicializando, tente novamente."}), 503
+    return None
+
+@app.before_request
+def ensure_model_watcher():
+    # Threads não sobrevivem a um fork: o observador é iniciado uma vez por processo
+    if MODEL_WATCH_INTERVAL_S > 0 and startup_warmup.ready:
+        model_reloader.start_watcher(MODEL_WATCH_INTERVAL_S)
+
+enrichment_queue = EnrichmentQueue(enrich_post, workers=ENRICHMENT_WORKERS, maxsize=ENRICHMENT_QUEUE_SIZE)
+_enrichment_resumed_pid = None
+_enrichment_resume_lock = None
+
+def _claim_enrichment_resume():
+    """Trava de arquivo ao lado do armazenamento, mantida aberta enquanto o processo viver:
+    com vários workers só um deles retoma as pendentes. Se ele morrer, o worker que o
+    substituir consegue a trava e retoma de novo (a fila do que morreu se perdeu junto)."""
+    global _enrichment_resume_lock
+    import fcntl
+    store_path = POSTS_LOG_DIR if POSTS_BACKEND == 'jsonl' else POSTS_DB_PATH
+    lock_file = open(f"{store_path}.retomada.lock", 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _enrichment_resume_lock = lock_file
+    return True
+
+@app.before_request
+def resume_pending_enrichment():
+    # Publicações que ficaram pendentes (ex.: reinício do processo) voltam para a fila
+    # de um único processo: cada worker que as retomasse enriqueceria todas de novo
+    global _enrichment_resumed_pid
+    if ENRICHMENT_WORKERS == 0 or _enrichment_resumed_pid == os.getpid() or not startup_warmup.ready:
+        return
+    _enrichment_resumed_pid = os.getpid()
+    if not _claim_enrichment_resume():
+        return
+    pending = [post['id_hash'] for post in get_post_store().iter_posts(status='pendente')]
+    for message_hash in pending:
+        if not enrichment_queue.submit(message_hash):
+            break
+
 @app.route('/publicar', methods=['POST'])
 def receive_post():
+    """Novas publicações: 202 "accepted" (enriquecimento na fila), 201 "success" (sem fila),
+    200 "ignored" (duplicada), 400 (sem título/conteúdo) ou 503 (fila cheia)."""
+    started = time.perf_counter()
     data = request.get_json()
     if not data or not (data.get('titulo') or data.get('conteudo')):
+        posts_received.inc("invalida")
         return jsonify({"status": "error", "message": "Título ou conteúdo deve ser fornecido"}), 400
     titulo = data.get('titulo', '')
     conteudo = data.get('conteudo', '')
@@ -462,12 +1065,6 @@ def receive_post():
     lon = data.get('lon')
     marcacao = data.get('marcacao')
     message_hash = hashlib.sha256(f"{titulo}{conteudo}".encode('utf-8')).hexdigest()
-    if message_hash in loaded_posts_set:
-        print(f"⏩ Publicação duplicada recebida (hash: {message_hash[:8]}...). Ignorando.")
-        return jsonify({"status": "ignored", "message": "Publicação já existe."}), 200
-    real_cidade = None
-    if lat is not None and lon is not None:
-        real_cidade = get_city_from_coordinates(lat, lon)
     new_post_entry = {
         "id_hash": message_hash,
         "titulo": titulo,
@@ -475,72 +1072,233 @@ def receive_post():
         "lat": lat,
         "lon": lon,
         "marcacao": marcacao,
-        "REALcidade": real_cidade,
-        "timestamp": datetime.datetime.now().isoformat()
+        "REALcidade": None,
+        "REALestado": None,
+        "timestamp": datetime.datetime.now().isoformat(),
+        "status_enriquecimento": "pendente"
+    }
+    observe_stage("parse", started)
+    store = get_post_store()
+    with posts_lock:
+        if message_hash in store:
+            print(f"⏩ Publicação duplicada recebida (hash: {message_hash[:8]}...). Ignorando.")
+            posts_received.inc("duplicada")
+            return jsonify({"status": "ignored", "message": "Publicação já existe."}), 200
+        # A vaga na fila é reservada antes de gravar (com a fila cheia nada é armazenado),
+        # mas a chave só entra na fila depois que a publicação existe no armazenamento
+        if ENRICHMENT_WORKERS > 0 and not enrichment_queue.reserve():
+            print(f"🚦 Fila de enriquecimento cheia ({enrichment_queue.depth}). Publicação recusada.")
+            posts_received.inc("fila_cheia")
+            return jsonify({"status": "error", "message": "Fila de processamento cheia. Tente novamente em instantes."}), 503, {"Retry-After": "5"}
+        try:
+            with stage_timer("persistencia"):
+                inserted = store.insert(new_post_entry)
+        except Exception:
+            if ENRICHMENT_WORKERS > 0:
+                enrichment_queue.release()
+            raise
+    if not inserted:
+        # posts_lock só vale dentro do processo: outro worker gravou a mesma publicação entre a checagem e o insert
+        if ENRICHMENT_WORKERS > 0:
+            enrichment_queue.release()
+        print(f"⏩ Publicação duplicada recebida (hash: {message_hash[:8]}...). Ignorando.")
+        posts_received.inc("duplicada")
+        return jsonify({"status": "ignored", "message": "Publicação já existe."}), 200
+    if ENRICHMENT_WORKERS > 0:
+        enrichment_queue.enqueue(message_hash)
+    posts_received.inc("aceita")
+    if ENRICHMENT_WORKERS == 0:
+        new_post_entry = enrich_post(message_hash)
+        print(f"✨ Nova publicação recebida e salva (hash: {message_hash[:8]}..., REALcidade: {new_post_entry['REALcidade']}).")
+        return jsonify({"status": "success", "message": "Publicação recebida e armazenada.", "REALcidade": new_post_entry["REALcidade"], "id_hash": message_hash}), 201
+    print(f"✨ Nova publicação recebida e enfileirada (hash: {message_hash[:8]}...).")
+    return jsonify({"status": "accepted", "message": "Publicação recebida; enriquecimento em andamento.", "id_hash": message_hash}), 202
+
+@app.route('/publicar/<message_hash>', methods=['GET'])
+def get_post_status(message_hash):
+    post = get_post_store().get(message_hash)
+    if post is None:
+        return jsonify({"status": "error", "message": "Publicação não encontrada."}), 404
+    result = {
+        "id_hash": message_hash,
+        "status": post.get("status_enriquecimento", "concluido"),
+        "REALcidade": post.get("REALcidade"),
+        "REALestado": post.get("REALestado"),
+        "area_km2": post.get("area_km2"),
+        "predicao": post.get("predicao")
+    }
+    queue_status = enrichment_queue.status(message_hash)
+    if queue_status:
+        result["fila"] = queue_status
+        if queue_status["status"] in ("processando", "falhou"):
+            result["status"] = queue_status["status"]
+    return jsonify(result), 200
+
+@app.route('/fila_enriquecimento', methods=['GET'])
+def get_enrichment_queue_stats():
+    return jsonify(enrichment_queue.stats()), 200
+
+def parse_posts_query(args):
+    """Lê filtros, cursor, limite e formato do /publicacoes. Levanta ValueError com a mensagem de erro."""
+    filters = {}
+    if args.get("desde"):
+        filters["since"] = args["desde"]
+    if args.get("cidade"):
+        filters["cidade"] = args["cidade"]
+    if args.get("bbox"):
+        try:
+            bbox = tuple(float(v) for v in args["bbox"].split(","))
+        except ValueError:
+            raise ValueError("bbox deve ser 'min_lat,min_lon,max_lat,max_lon'")
+        if len(bbox) != 4 or bbox[0] > bbox[2] or bbox[1] > bbox[3]:
+            raise ValueError("bbox deve ser 'min_lat,min_lon,max_lat,max_lon'")
+        filters["bbox"] = bbox
+    cursor = None
+    if args.get("cursor"):
+        try:
+            cursor = int(args["cursor"])
+        except ValueError:
+            raise ValueError("cursor inválido")
+    limit = None
+    if args.get("limite"):
+        try:
+            limit = int(args["limite"])
+        except ValueError:
+            raise ValueError("limite deve ser um inteiro")
+        if not 1 <= limit <= POSTS_PAGE_MAX:
+            raise ValueError(f"limite deve estar entre 1 e {POSTS_PAGE_MAX}")
+    formato = args.get("formato", "json")
+    if formato not in ("json", "ndjson"):
+        raise ValueError("formato deve ser 'json' ou 'ndjson'")
+    return filters, cursor, limit, formato
+
+def _post_summary(post):
+    return {
+        "id": post.get("id_hash"),
+        "titulo": post.get("titulo", ""),
+        "conteudo": post.get("conteudo", ""),
+        "lat": post.get("lat"),
+        "lon": post.get("lon"),
+        "endereco": "",
+        "marcacao": post.get("marcacao"),
+        "REALcidade": post.get("REALcidade")
     }
-    loaded_posts_list.append(new_post_entry)
-    loaded_posts_set.add(message_hash)
-    save_real_posts()
-    print(f"✨ Nova publicação recebida e salva (hash: {message_hash[:8]}..., REALcidade: {real_cidade}). Total: {len(loaded_posts_list)}.")
-    return jsonify({"status": "success", "message": "Publicação recebida e armazenada.", "REALcidade": real_cidade}), 201
+
+def _stream_posts(rows, formato, chunk=100):
+    """Serializa as publicações aos poucos: a memória usada não depende do total."""
+    buffer = []
+    first = True
+    if formato == "json":
+        yield "["
+    for _, post in rows:
+        item = app.json.dumps(_post_summary(post))
+        if formato == "ndjson":
+            buffer.append(item + "\n")
+        else:
+            buffer.append(item if first else "," + item)
+        first = False
+        if len(buffer) >= chunk:
+            yield "".join(buffer)
+            buffer = []
+    if buffer:
+        yield "".join(buffer)
+    if formato == "json":
+        yield "]"
 
 @app.route('/publicacoes', methods=['GET'])
 def get_posts():
+    # Sem parâmetros devolve o array completo, como antes (agora transmitido aos poucos).
+    # ?limite=&cursor= paginam pela ordem de chegada; o próximo cursor vai em X-Proximo-Cursor.
+    # ?desde=<timestamp ISO>, ?bbox=min_lat,min_lon,max_lat,max_lon e ?cidade= filtram;
+    # ?formato=ndjson transmite uma publicação JSON por linha.
     try:
-        posts = [
-            {
-                "id": post.get("id_hash"),
-                "titulo": post.get("titulo", ""),
-                "conteudo": post.get("conteudo", ""),
-                "lat": post.get("lat"),
-                "lon": post.get("lon"),
-                "endereco": "",
-                "marcacao": post.get("marcacao"),
-                "REALcidade": post.get("REALcidade")
-            } for post in loaded_posts_list
-        ]
-        return jsonify(posts), 200
+        filters, cursor, limit, formato = parse_posts_query(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    try:
+        store = get_post_store()
+        headers = {}
+        if limit is not None:
+            next_cursor = store.next_cursor(limit, after_seq=cursor, **filters)
+            if next_cursor is not None:
+                headers["X-Proximo-Cursor"] = str(next_cursor)
+        rows = store.scan(after_seq=cursor, limit=limit, **filters)
+        mimetype = "application/x-ndjson" if formato == "ndjson" else "application/json"
+        return Response(_stream_posts(rows, formato), status=200, mimetype=mimetype, headers=headers)
     except Exception as e:
         print(f"Erro no endpoint /publicacoes: {str(e)}")
         return jsonify({"erro": str(e)}), 500
 
+# --- Geração incremental do dataset real (ver dataset_incremental.py) ---
+DATASET_REAL_COLUMNS = [
+    "titulo", "conteudo", "categoria", "sinonimo_disparador", "idioma",
+    "continente", "pais", "estado", "cidade", "latitude", "longitude",
+    "impacto_nivel", "impacto_cor", "impacto_area_km2", "impacto_sinonimo_intensidade", "REALcidade"
+]
+dataset_lock = threading.Lock()
+_dataset_state_cache = {}
+
+def get_dataset_state():
+    if _dataset_state_cache.get("path") != DATASET_REAL_COMBINED_PATH:
+        _dataset_state_cache["path"] = DATASET_REAL_COMBINED_PATH
+        _dataset_state_cache["state"] = DatasetState(DATASET_REAL_COMBINED_PATH)
+    state = _dataset_state_cache["state"]
+    state.load()
+    return state
+
+def _post_store_source():
+    # Os seq só valem dentro do mesmo armazenamento
+    return f"{POSTS_BACKEND}:{POSTS_DB_PATH if POSTS_BACKEND != 'jsonl' else POSTS_LOG_DIR}"
+
 @app.route('/gerar_dataset_real', methods=['POST'])
 def generate_real_dataset():
-    global loaded_posts_list
-    if not loaded_posts_list:
+    store = get_post_store()
+    total_posts = store.count()
+    if not total_posts:
         return jsonify({"status": "error", "message": "Nenhuma publicação encontrada em real_posts.json."}), 400
-    if not (modelo_categoria and modelo_localizacao and modelo_impacto):
+    if not all(request_models()["modelos"]):
         return jsonify({"status": "error", "message": "Um ou mais modelos não foram carregados."}), 500
-    print(f"\nIniciando geração do dataset a partir de {len(loaded_posts_list)} publicações de real_posts.json...")
-    try:
-        df_existing_real = pd.read_csv(DATASET_REAL_COMBINED_PATH) if os.path.exists(DATASET_REAL_COMBINED_PATH) else pd.DataFrame(columns=[
-            "titulo", "conteudo", "categoria", "sinonimo_disparador", "idioma",
-            "continente", "pais", "estado", "cidade", "latitude", "longitude",
-            "impacto_nivel", "impacto_cor", "impacto_area_km2", "impacto_sinonimo_intensidade", "REALcidade"
-        ])
-        print(f"Dataset de publicações reais existente carregado com {len(df_existing_real)} registros.")
-    except Exception as e:
-        print(f"Erro ao carregar dataset existente: {e}")
-        df_existing_real = pd.DataFrame(columns=[
-            "titulo", "conteudo", "categoria", "sinonimo_disparador", "idioma",
-            "continente", "pais", "estado", "cidade", "latitude", "longitude",
-            "impacto_nivel", "impacto_cor", "impacto_area_km2", "impacto_sinonimo_intensidade", "REALcidade"
-        ])
-    processed_hashes = set((df_existing_real['titulo'] + df_existing_real['conteudo']).map(lambda x: hashlib.sha256(x.encode('utf-8')).hexdigest()))
+    print(f"\nIniciando geração do dataset a partir de {total_posts} publicações armazenadas...")
+    # A trava de thread serializa o processo; a de arquivo, os demais workers
+    with dataset_lock, exclusive_lock(f"{DATASET_REAL_COMBINED_PATH}.lock"):
+        state = get_dataset_state()
+        state.start_run(request_models()["versao"], _post_store_source())
+        print(f"Dataset de publicações reais existente com {len(state.processed)} registros; examinando a partir da publicação {state.watermark}.")
+        return _generate_real_dataset_incremental(store, state, total_posts)
+
+def _generate_real_dataset_incremental(store, state, total_posts):
+    processed_hashes = state.processed
+    new_hashes = set()
     new_data_for_df = []
     processed_count = 0
-    for post in loaded_posts_list:
+    watermark = state.watermark
+    deferred = {}
+    # Adiadas primeiro: têm seq menor que as novas, então a ordem é a mesma de uma varredura completa
+    previously_deferred = [
+        (seq, store.get(id_hash)) for id_hash, seq in sorted(state.deferred.items(), key=lambda item: item[1])
+    ]
+    candidates = itertools.chain(
+        ((seq, post) for seq, post in previously_deferred if post is not None),
+        store.scan(after_seq=state.watermark)
+    )
+    for seq, post in candidates:
+        watermark = max(watermark, seq)
         titulo = post.get('titulo', '')
         conteudo = post.get('conteudo', '')
         lat = post.get('lat')
         lon = post.get('lon')
         marcacao = post.get('marcacao')
         real_cidade = post.get('REALcidade')
+        real_estado = post.get('REALestado')
         timestamp = post.get('timestamp')
         message_hash = hashlib.sha256(f"{titulo}{conteudo}".encode('utf-8')).hexdigest()
-        if message_hash in processed_hashes:
+        if message_hash in processed_hashes or message_hash in new_hashes:
             print(f"⏩ Publicação duplicada (hash: {message_hash[:8]}...). Ignorando.")
             continue
+        # Ainda sem REALcidade: volta a ser examinada na próxima execução
+        if post.get('status_enriquecimento') == 'pendente':
+            deferred[post['id_hash']] = seq
+            continue
         text_input = f"{titulo} {conteudo}".strip()
         if not text_input:
             print(f"⚠️ Publicação ignorada: texto vazio.")
@@ -557,35 +1315,34 @@ def generate_real_dataset():
             continue
         # Inferência dos modelos
         try:
-            predicted_category = modelo_categoria.predict([text_input])[0]
-            predicted_impact_level = modelo_impacto.predict([text_input])[0]
-            predicted_city = modelo_localizacao.predict([text_input])[0]
+            preds = predict_texts([text_input])[0]
+            predicted_category = preds["categoria"].label
+            predicted_impact_level = preds["impacto"].label
+            predicted_city = preds["localizacao"].label
         except Exception as e:
             print(f"❌ Erro na inferência para a mensagem '{text_input[:50]}...': {e}")
+            deferred[post['id_hash']] = seq
             continue
-        # Validação da categoria
-        is_valid_category, category_reason = validate_category(text_input, predicted_category)
+        # Validação da categoria (os sinônimos do texto servem também para o impacto)
+        synonym_hits = scan_synonyms(text_input)
+        is_valid_category, category_reason = validate_category(text_input, predicted_category, hits=synonym_hits)
         if not is_valid_category:
             print(f"⚠️ Publicação '{text_input[:50]}...' ignorada: {category_reason}.")
             continue
         # Validação da confiança do modelo
-        is_valid_confidence, confidence_reason = validate_model_confidence(modelo_categoria, text_input, predicted_category)
+        is_valid_confidence, confidence_reason = validate_model_confidence(request_models()["modelos"][0], text_input, predicted_category, confidence=preds["categoria"].probability)
         if not is_valid_confidence:
             print(f"⚠️ Publicação '{text_input[:50]}...' ignorada: {confidence_reason}.")
             continue
         # Cálculo da área
         predicted_area = 0
         try:
-            if marcacao:
-                marcacao_geojson = json.loads(marcacao)
-                if marcacao_geojson.get('type') == 'Feature' and marcacao_geojson.get('geometry', {}).get('type') == 'Polygon':
-                    predicted_area = area(Feature(geometry=marcacao_geojson['geometry'])) / 1_000_000
-                    predicted_area = round(predicted_area, 2)
+            predicted_area = calculate_marked_area(marcacao)
         except Exception as e:
             print(f"Erro ao calcular área para marcacao: {e}")
         impact_level = determine_impact_level_with_area(predicted_impact_level, predicted_area)
         # Validação do impacto
-        is_valid_impact, impact_reason = validate_impact(text_input, impact_level)
+        is_valid_impact, impact_reason = validate_impact(text_input, impact_level, hits=synonym_hits)
         if not is_valid_impact:
             print(f"⚠️ Publicação '{text_input[:50]}...' ignorada: {impact_reason}.")
             continue
@@ -600,7 +1357,7 @@ def generate_real_dataset():
             print(f"⚠️ Publicação '{text_input[:50]}...' ignorada: REALcidade ou cidade predita ausente.")
             continue
         # Validação de proximidade geográfica
-        is_valid_geo, geo_reason = validate_geographic_proximity(lat, lon, predicted_city)
+        is_valid_geo, geo_reason = validate_geographic_proximity(lat, lon, predicted_city, method=GEO_VALIDATION_METHOD)
         if not is_valid_geo:
             print(f"⚠️ Publicação '{text_input[:50]}...' ignorada: {geo_reason}.")
             continue
@@ -615,14 +1372,14 @@ def generate_real_dataset():
         if not is_valid_context:
             print(f"⚠️ Publicação '{text_input[:50]}...' ignorada: {context_reason}.")
             continue
-        processed_hashes.add(message_hash)
+        new_hashes.add(message_hash)
         processed_count += 1
         predicted_lat = round(float(lat), 4) if lat is not None else None
         predicted_lon = round(float(lon), 4) if lon is not None else None
         predicted_state = "Desconhecido"
         if real_cidade:
             predicted_city = real_cidade
-            found_city_data = next((loc for loc in locations_data if loc["cidade"] == predicted_city), None)
+            found_city_data = get_gazetteer().find(predicted_city, real_estado) or get_gazetteer().find(predicted_city)
             if found_city_data:
                 predicted_state = found_city_data["estado"]
                 if predicted_lat is None:
@@ -633,7 +1390,7 @@ def generate_real_dataset():
             closest_city = find_closest_city(lat, lon, max_distance_km=100)
             if closest_city:
                 predicted_city = closest_city
-                found_city_data = next((loc for loc in locations_data if loc["cidade"] == predicted_city), None)
+                found_city_data = get_gazetteer().find(predicted_city)
                 if found_city_data:
                     predicted_state = found_city_data["estado"]
                     if predicted_lat is None:
@@ -660,207 +1417,441 @@ def generate_real_dataset():
             "impacto_sinonimo_intensidade": predicted_impact_intensity,
             "REALcidade": real_cidade
         })
-    df_new_posts = pd.DataFrame(new_data_for_df)
-    df_combined_final = pd.concat([df_existing_real, df_new_posts], ignore_index=True)
-    df_combined_final = df_combined_final.drop_duplicates(subset=['titulo', 'conteudo']).reset_index(drop=True)
-    df_combined_final.to_csv(DATASET_REAL_COMBINED_PATH, index=False, encoding='utf-8')
-    print(f"📊 Dataset de publicações reais salvo em '{DATASET_REAL_COMBINED_PATH}'. Total de registros: {len(df_combined_final)}.")
+    state.append_rows(new_data_for_df, DATASET_REAL_COLUMNS)
+    state.finish_run(watermark, deferred)
+    print(f"📊 Dataset de publicações reais salvo em '{DATASET_REAL_COMBINED_PATH}'. Total de registros: {len(state.processed)}.")
     return jsonify({
         "status": "success",
         "message": f"Dataset de publicações reais atualizado com {processed_count} novas publicações inferidas.",
         "total_processed": processed_count,
-        "total_received": len(loaded_posts_list)
+        "total_received": total_posts
     }), 200
 
+@app.route('/cache_predicoes', methods=['GET'])
+def get_prediction_cache_stats():
+    get_inference_engine()
+    return jsonify(prediction_cache.stats()), 200
+
 @app.route("/", methods=["GET"])
 def health_check():
-    return jsonify({"status": "API Python funcionando!", "timestamp": datetime.datetime.now().isoformat()})
+    return jsonify({
+        "status": "API Python funcionando!",
+        "timestamp": datetime.datetime.now().isoformat(),
+        "pronto": startup_warmup.ready,
+        "modo_inicializacao": STARTUP_MODE
+    })
+
+@app.route("/pronto", methods=["GET"])
+def readiness_check():
+    # Prontidão: 200 só depois do aquecimento (o "/" responde assim que o processo sobe)
+    status = startup_warmup.status()
+    pronto = status["pronto"] and status["erro"] is None
+    return jsonify(status), 200 if pronto else 503
+
+@app.route("/modelos", methods=["GET"])
+def get_models_status():
+    modelos = request_models()
+    return jsonify({
+        "versao": modelos["versao"],
+        "artefatos": {prefixo: {k: v for k, v in artefato.items() if k != "modelo_id"}
+                      for prefixo, artefato in model_artifacts.items()},
+        "recarga": model_reloader.stats()
+    }), 200
+
+def admin_token_valid():
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(request.headers.get("X-Admin-Token", ""), ADMIN_TOKEN)
+
+def check_admin_token():
+    """None se o X-Admin-Token confere; senão a resposta de erro das rotas /admin/*."""
+    if not ADMIN_TOKEN:
+        return jsonify({"status": "error", "message": "Rotas administrativas desativadas (ADMIN_TOKEN não definido)."}), 403
+    if not admin_token_valid():
+        return jsonify({"status": "error", "message": "Token administrativo inválido."}), 401
+    return None
+
+@app.route("/admin/recarregar_modelos", methods=["POST"])
+def reload_models():
+    denied = check_admin_token()
+    if denied:
+        return denied
+    data = request.get_json(silent=True) or {}
+    force = bool(data.get("forcar", False))
+    if data.get("aguardar"):
+        result = model_reloader.reload(force=force)
+        return jsonify(result), 422 if result["status"] == "falhou" else 200
+    if not model_reloader.reload_async(force=force):
+        return jsonify({"status": "em_andamento"}), 409
+    return jsonify({"status": "iniciada"}), 202
+
+@app.route("/inicializacao", methods=["GET"])
+def get_startup_report():
+    return jsonify({**startup_timer.report(), **startup_warmup.status(), "modo": STARTUP_MODE}), 200
+
+def _gzip_file_chunks(path, size):
+    """Lê o arquivo em blocos e devolve-os comprimidos em gzip, sem carregá-lo inteiro na memória.
+
+    Só os `size` bytes existentes no momento do stat são enviados: linhas anexadas pelo
+    /gerar_dataset_real durante o download ficam para a próxima requisição (com outro ETag).
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    with open(path, 'rb') as f:
+        remaining = size
+        while remaining > 0:
+            chunk = f.read(min(DATASET_DOWNLOAD_CHUNK, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+    yield compressor.flush()
+
 
 @app.route('/api/dataset_real', methods=['GET'])
 def get_real_dataset():
     try:
         if not os.path.exists(DATASET_REAL_COMBINED_PATH):
             return jsonify({"status": "error", "message": "Dataset não encontrado."}), 404
-        with open(DATASET_REAL_COMBINED_PATH, 'r', encoding='utf-8') as f:
-            return f.read(), 200, {'Content-Type': 'text/csv; charset=utf-8'}
+        # Caminho absoluto: o send_file do Flask resolveria um relativo a partir da pasta do app
+        path = os.path.abspath(DATASET_REAL_COMBINED_PATH)
+        stat = os.stat(path)
+        etag = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+        last_modified = datetime.datetime.fromtimestamp(stat.st_mtime, datetime.timezone.utc)
+        if request.accept_encodings["gzip"] and "Range" not in request.headers:
+            response = Response(_gzip_file_chunks(path, stat.st_size), mimetype='text/csv')
+            response.headers["Content-Encoding"] = "gzip"
+            response.set_etag(f"{etag}-gzip")
+            response.last_modified = last_modified
+            response.cache_control.no_cache = True
+            response.make_conditional(request)
+        else:
+            # Sem compressão: o send_file já trata ETag, Last-Modified, 304, Range (206) e If-Range
+            response = send_file(
+                path, mimetype='text/csv', etag=etag,
+                last_modified=last_modified, conditional=True, max_age=0
+            )
+        response.vary.add("Accept-Encoding")
+        return response
+    except RequestedRangeNotSatisfiable as e:
+        return e
     except Exception as e:
         print(f"Erro no endpoint /api/dataset_real: {str(e)}")
         return jsonify({"erro": str(e)}), 500
     
-@app.route('/avaliar_publicacoes', methods=['GET'])
-def evaluate_posts():
-    global loaded_posts_list
-    if not loaded_posts_list:
-        return jsonify({"status": "error", "message": "Nenhuma publicação encontrada em real_posts.json."}), 400
-    if not (modelo_categoria and modelo_localizacao and modelo_impacto):
-        return jsonify({"status": "error", "message": "Um ou mais modelos não foram carregados."}), 500
-    
-    print(f"\nIniciando avaliação de {len(loaded_posts_list)} publicações para o front-end...")
-    evaluation_results = []
-    
-    for post in loaded_posts_list:
-        evaluation = {
-            "id_hash": post.get('id_hash'),
-            "titulo": post.get('titulo', ''),
-            "conteudo": post.get('conteudo', ''),
-            "status": "accepted",
-            "reasons": [],
-            "details": {
-                "predicted_category": None,
-                "predicted_city": None,
-                "impact_level": None,
-                "area_km2": 0,
-                "model_confidence": None,
-                "real_cidade": post.get('REALcidade'),
-                "timestamp": post.get('timestamp')
-            }
+# === Avaliação em Lote das Publicações ===
+# Cada publicação passa pelas mesmas validações, na mesma ordem, mas em estágios
+# que processam o lote inteiro: os modelos rodam uma vez por lote e a proximidade
+# geográfica é validada em lote. O veredicto fica em cache pelo hash do conteúdo da
+# publicação, dentro da versão dos modelos + gazetteer, até o timestamp expirar.
+VERDICT_CACHE_SIZE = int(os.environ.get("VERDICT_CACHE_SIZE", 50000))
+verdict_cache = PredictionCache(maxsize=VERDICT_CACHE_SIZE)
+VERDICT_FIELDS = ("id_hash", "titulo", "conteudo", "lat", "lon", "marcacao", "REALcidade", "timestamp")
+
+def _verdict_version():
+    return f"{request_models()['versao']}:{id(get_gazetteer())}"
+
+def _verdict_key(post):
+    return text_hash(json.dumps({field: post.get(field) for field in VERDICT_FIELDS}, sort_keys=True, ensure_ascii=False, default=str))
+
+def timestamp_valid_until(timestamp, max_days=30):
+    """Momento a partir do qual validate_timestamp passa a rejeitar o timestamp (None se inválido)."""
+    try:
+        return datetime.datetime.fromisoformat(timestamp.replace('Z', '+00:00')) + datetime.timedelta(days=max_days + 1)
+    except Exception:
+        return None
+
+def _new_evaluation(post):
+    return {
+        "id_hash": post.get('id_hash'),
+        "titulo": post.get('titulo', ''),
+        "conteudo": post.get('conteudo', ''),
+        "status": "accepted",
+        "reasons": [],
+        "details": {
+            "predicted_category": None,
+            "predicted_city": None,
+            "impact_level": None,
+            "area_km2": 0,
+            "model_confidence": None,
+            "real_cidade": post.get('REALcidade'),
+            "timestamp": post.get('timestamp')
         }
-        
+    }
+
+def _reject(evaluation, reason):
+    evaluation["status"] = "rejected"
+    evaluation["reasons"].append(reason)
+
+def _rejection_reason(evaluation):
+    # Só o tipo do motivo ("Categoria inválida", "Proximidade geográfica"...), sem os detalhes
+    return evaluation["reasons"][0].split(":", 1)[0] if evaluation["reasons"] else ""
+
+def evaluate_posts_batch(posts, store, now=None):
+    """Avalia um lote de publicações. Devolve (avaliações na ordem de `posts`, veredictos vindos do cache)."""
+    now = now or datetime.datetime.now()
+    evaluations = [None] * len(posts)
+    keys = [None] * len(posts)
+    hits = 0
+    version = _verdict_version()
+    # Estágio 0: duplicidade (consulta barata ao armazenamento, nunca vai para o cache) e cache
+    pending = []
+    for i, post in enumerate(posts):
         titulo = post.get('titulo', '')
         conteudo = post.get('conteudo', '')
-        lat = post.get('lat')
-        lon = post.get('lon')
-        marcacao = post.get('marcacao')
-        real_cidade = post.get('REALcidade')
-        timestamp = post.get('timestamp')
-        text_input = f"{titulo} {conteudo}".strip()
-        
-        # Verifica duplicação
         message_hash = hashlib.sha256(f"{titulo}{conteudo}".encode('utf-8')).hexdigest()
-        if message_hash in loaded_posts_set and message_hash != post.get('id_hash'):
-            evaluation["status"] = "rejected"
-            evaluation["reasons"].append("Publicação duplicada")
-            evaluation_results.append(evaluation)
+        if message_hash != post.get('id_hash') and message_hash in store:
+            evaluations[i] = _new_evaluation(post)
+            _reject(evaluations[i], "Publicação duplicada")
             continue
-        
-        # Validação de qualidade do texto
+        keys[i] = _verdict_key(post)
+        cached = verdict_cache.get(keys[i], version=version)
+        if cached is not None and (cached[0] is None or now < cached[0]):
+            evaluations[i] = copy.deepcopy(cached[1])
+            hits += 1
+            continue
+        evaluations[i] = _new_evaluation(post)
+        pending.append(i)
+
+    # Estágio 1: qualidade do texto e timestamp
+    texts = {}
+    survivors = []
+    for i in pending:
+        post = posts[i]
+        text_input = f"{post.get('titulo', '')} {post.get('conteudo', '')}".strip()
         is_valid_text, text_reason = validate_text_quality(text_input)
         if not is_valid_text:
-            evaluation["status"] = "rejected"
-            evaluation["reasons"].append(f"Texto inválido: {text_reason}")
-            evaluation_results.append(evaluation)
+            _reject(evaluations[i], f"Texto inválido: {text_reason}")
             continue
-        
-        # Validação de timestamp
-        is_valid_timestamp, timestamp_reason = validate_timestamp(timestamp)
+        is_valid_timestamp, timestamp_reason = validate_timestamp(post.get('timestamp'))
         if not is_valid_timestamp:
-            evaluation["status"] = "rejected"
-            evaluation["reasons"].append(f"Timestamp inválido: {timestamp_reason}")
-            evaluation_results.append(evaluation)
+            _reject(evaluations[i], f"Timestamp inválido: {timestamp_reason}")
             continue
-        
-        # Inferência dos modelos
+        texts[i] = text_input
+        survivors.append(i)
+
+    # Estágio 2: os três modelos, uma vez para o lote inteiro
+    predictions = {}
+    if survivors:
         try:
-            predicted_category = modelo_categoria.predict([text_input])[0]
-            predicted_impact_level = modelo_impacto.predict([text_input])[0]
-            predicted_city = modelo_localizacao.predict([text_input])[0]
-            evaluation["details"]["predicted_category"] = predicted_category
-            evaluation["details"]["predicted_city"] = predicted_city
-            evaluation["details"]["impact_level"] = predicted_impact_level
+            batch_preds = predict_texts([texts[i] for i in survivors])
+            predictions = dict(zip(survivors, batch_preds))
+        except Exception:
+            # Falha no lote: repete por publicação para isolar a que causou o erro
+            for i in survivors:
+                try:
+                    predictions[i] = predict_texts([texts[i]])[0]
+                except Exception as e:
+                    _reject(evaluations[i], f"Erro na inferência dos modelos: {str(e)}")
+
+    # Estágio 3: categoria, confiança, área, impacto e cidade
+    geo_candidates = []
+    context = {}
+    for i in survivors:
+        if i not in predictions:
+            continue
+        post = posts[i]
+        evaluation = evaluations[i]
+        details = evaluation["details"]
+        text_input = texts[i]
+        preds = predictions[i]
+        try:
+            predicted_category = preds["categoria"].label
+            predicted_impact_level = preds["impacto"].label
+            predicted_city = preds["localizacao"].label
         except Exception as e:
-            evaluation["status"] = "rejected"
-            evaluation["reasons"].append(f"Erro na inferência dos modelos: {str(e)}")
-            evaluation_results.append(evaluation)
+            _reject(evaluation, f"Erro na inferência dos modelos: {str(e)}")
             continue
-        
-        # Validação da categoria
-        is_valid_category, category_reason = validate_category(text_input, predicted_category)
+        details["predicted_category"] = predicted_category
+        details["predicted_city"] = predicted_city
+        details["impact_level"] = predicted_impact_level
+        synonym_hits = scan_synonyms(text_input)
+        is_valid_category, category_reason = validate_category(text_input, predicted_category, hits=synonym_hits)
         if not is_valid_category:
-            evaluation["status"] = "rejected"
-            evaluation["reasons"].append(f"Categoria inválida: {category_reason}")
-            evaluation_results.append(evaluation)
+            _reject(evaluation, f"Categoria inválida: {category_reason}")
             continue
-        
-        # Validação de confiança do modelo
-        is_valid_confidence, confidence_reason = validate_model_confidence(modelo_categoria, text_input, predicted_category)
-        evaluation["details"]["model_confidence"] = confidence_reason
+        is_valid_confidence, confidence_reason = validate_model_confidence(request_models()["modelos"][0], text_input, predicted_category, confidence=preds["categoria"].probability)
+        details["model_confidence"] = confidence_reason
         if not is_valid_confidence:
-            evaluation["status"] = "rejected"
-            evaluation["reasons"].append(f"Confiança do modelo: {confidence_reason}")
-            evaluation_results.append(evaluation)
+            _reject(evaluation, f"Confiança do modelo: {confidence_reason}")
             continue
-        
-        # Cálculo da área
-        predicted_area = 0
         try:
-            if marcacao:
-                marcacao_geojson = json.loads(marcacao)
-                if marcacao_geojson.get('type') == 'Feature' and marcacao_geojson.get('geometry', {}).get('type') == 'Polygon':
-                    predicted_area = area(Feature(geometry=marcacao_geojson['geometry'])) / 1_000_000
-                    predicted_area = round(predicted_area, 2)
-            evaluation["details"]["area_km2"] = predicted_area
+            predicted_area = calculate_marked_area(post.get('marcacao'))
+            details["area_km2"] = predicted_area
         except Exception as e:
-            evaluation["status"] = "rejected"
-            evaluation["reasons"].append(f"Erro ao calcular área: {str(e)}")
-            evaluation_results.append(evaluation)
+            _reject(evaluation, f"Erro ao calcular área: {str(e)}")
             continue
-        
-        # Determinar nível de impacto com área
         impact_level = determine_impact_level_with_area(predicted_impact_level, predicted_area)
-        evaluation["details"]["impact_level"] = impact_level
-        
-        # Validação do impacto
-        is_valid_impact, impact_reason = validate_impact(text_input, impact_level)
+        details["impact_level"] = impact_level
+        is_valid_impact, impact_reason = validate_impact(text_input, impact_level, hits=synonym_hits)
         if not is_valid_impact:
-            evaluation["status"] = "rejected"
-            evaluation["reasons"].append(f"Impacto inválido: {impact_reason}")
-            evaluation_results.append(evaluation)
+            _reject(evaluation, f"Impacto inválido: {impact_reason}")
             continue
-        
-        # Validação de consistência de cidade
+        real_cidade = post.get('REALcidade')
         if real_cidade and predicted_city:
-            normalized_real_cidade = normalize_text(real_cidade)
-            normalized_predicted_city = normalize_text(predicted_city)
-            if normalized_real_cidade != normalized_predicted_city:
-                evaluation["status"] = "rejected"
-                evaluation["reasons"].append(f"Conflito de cidade: REALcidade ({real_cidade}) != cidade predita ({predicted_city})")
-                evaluation_results.append(evaluation)
+            if normalize_text(real_cidade) != normalize_text(predicted_city):
+                _reject(evaluation, f"Conflito de cidade: REALcidade ({real_cidade}) != cidade predita ({predicted_city})")
                 continue
-        elif not real_cidade or not predicted_city:
-            evaluation["status"] = "rejected"
-            evaluation["reasons"].append("REALcidade ou cidade predita ausente")
-            evaluation_results.append(evaluation)
+        else:
+            _reject(evaluation, "REALcidade ou cidade predita ausente")
             continue
-        
-        # Validação de proximidade geográfica
-        is_valid_geo, geo_reason = validate_geographic_proximity(lat, lon, predicted_city)
+        geo_candidates.append(i)
+        context[i] = (predicted_category, predicted_city, predicted_area, impact_level)
+
+    # Estágio 4: proximidade geográfica em lote
+    geo_results = validate_geographic_proximity_batch(
+        [(posts[i].get('lat'), posts[i].get('lon'), context[i][1]) for i in geo_candidates],
+        method=GEO_VALIDATION_METHOD
+    ) if geo_candidates else []
+
+    # Estágio 5: consistência de área e contexto regional
+    for i, (is_valid_geo, geo_reason) in zip(geo_candidates, geo_results):
+        evaluation = evaluations[i]
+        predicted_category, _, predicted_area, impact_level = context[i]
         if not is_valid_geo:
-            evaluation["status"] = "rejected"
-            evaluation["reasons"].append(f"Proximidade geográfica: {geo_reason}")
-            evaluation_results.append(evaluation)
+            _reject(evaluation, f"Proximidade geográfica: {geo_reason}")
             continue
-        
-        # Validação de consistência de área
-        if marcacao:
+        if posts[i].get('marcacao'):
             is_valid_area, area_reason = validate_area_consistency(predicted_area, impact_level)
             if not is_valid_area:
-                evaluation["status"] = "rejected"
-                evaluation["reasons"].append(f"Área inconsistente: {area_reason}")
-                evaluation_results.append(evaluation)
+                _reject(evaluation, f"Área inconsistente: {area_reason}")
                 continue
-        
-        # Validação de contexto regional
-        is_valid_context, context_reason = validate_regional_context(predicted_category, real_cidade)
+        is_valid_context, context_reason = validate_regional_context(predicted_category, posts[i].get('REALcidade'))
         if not is_valid_context:
-            evaluation["status"] = "rejected"
-            evaluation["reasons"].append(f"Contexto regional: {context_reason}")
-            evaluation_results.append(evaluation)
+            _reject(evaluation, f"Contexto regional: {context_reason}")
+
+    # Veredictos novos vão para o cache; os que passaram do timestamp expiram junto com ele
+    for i in pending:
+        evaluation = evaluations[i]
+        if any(reason.startswith("Erro na inferência") for reason in evaluation["reasons"]):
             continue
-        
-        # Se chegou até aqui, a publicação é válida
-        evaluation_results.append(evaluation)
+        expires_at = None if evaluation["reasons"] and evaluation["reasons"][0].startswith(("Texto inválido", "Timestamp inválido")) \
+            else timestamp_valid_until(posts[i].get('timestamp'))
+        verdict_cache.put(keys[i], (expires_at, copy.deepcopy(evaluation)), version=version)
+    for evaluation in evaluations:
+        posts_evaluated.inc(evaluation["status"], _rejection_reason(evaluation))
+    return evaluations, hits
+
+@app.route('/avaliar_publicacoes', methods=['GET'])
+def evaluate_posts():
+    store = get_post_store()
+    total_posts = store.count()
+    if not total_posts:
+        return jsonify({"status": "error", "message": "Nenhuma publicação encontrada em real_posts.json."}), 400
+    if not all(request_models()["modelos"]):
+        return jsonify({"status": "error", "message": "Um ou mais modelos não foram carregados."}), 500
     
-    print(f"✅ Avaliação concluída: {len([e for e in evaluation_results if e['status'] == 'accepted'])} publicações aceitas, "
-          f"{len([e for e in evaluation_results if e['status'] == 'rejected'])} rejeitadas.")
+    print(f"\nIniciando avaliação de {total_posts} publicações para o front-end...")
+    verdict_cache.set_model_version(_verdict_version())
+    evaluation_results = []
+    cached_count = 0
+    now = datetime.datetime.now()
+    posts = store.iter_posts()
+    while True:
+        batch = list(itertools.islice(posts, MAX_BATCH_SIZE))
+        if not batch:
+            break
+        evaluations, hits = evaluate_posts_batch(batch, store, now)
+        evaluation_results.extend(evaluations)
+        cached_count += hits
+    
+    total_accepted = len([e for e in evaluation_results if e['status'] == 'accepted'])
+    total_rejected = len([e for e in evaluation_results if e['status'] == 'rejected'])
+    print(f"✅ Avaliação concluída: {total_accepted} publicações aceitas, {total_rejected} rejeitadas "
+          f"({cached_count} veredictos reaproveitados do cache).")
     
     return jsonify({
         "status": "success",
         "message": "Avaliação das publicações concluída.",
         "evaluations": evaluation_results,
         "total_evaluated": len(evaluation_results),
-        "total_accepted": len([e for e in evaluation_results if e['status'] == 'accepted']),
-        "total_rejected": len([e for e in evaluation_results if e['status'] == 'rejected'])
+        "total_accepted": total_accepted,
+        "total_rejected": total_rejected,
+        "total_cached": cached_count
     }), 200
 
+# === Perfilador por Amostragem (perfilador.py) ===
+profiler = SamplingProfiler(interval=PROFILER_INTERVAL_MS / 1000, rate=PROFILER_RATE)
+
+@app.before_request
+def start_profiling():
+    # Com taxa 0 e sem o cabeçalho, só esta verificação
+    forced = "X-Perfilar" in request.headers and admin_token_valid()
+    if profiler.should_profile(forced):
+        rule = request.url_rule.rule if request.url_rule else request.path
+        profiler.start(f"{request.method} {rule}")
+        g.profiled = True
+
+@app.teardown_request
+def stop_profiling(exc):
+    if g.get("profiled"):
+        profiler.stop()
+
+@app.route("/admin/perfilador", methods=["GET", "POST"])
+def profiler_admin():
+    """GET: pilhas agregadas no formato collapsed (flamegraph.pl, speedscope).
+    POST {"taxa": 0.05, "limpar": true}: ajusta a amostragem (taxa 0 desliga) e devolve o estado."""
+    denied = check_admin_token()
+    if denied:
+        return denied
+    if request.method == "GET":
+        return Response(profiler.collapsed(), content_type="text/plain; charset=utf-8")
+    data = request.get_json(silent=True) or {}
+    if "taxa" in data:
+        try:
+            rate = float(data["taxa"])
+        except (TypeError, ValueError):
+            rate = -1
+        if not 0 <= rate <= 1:
+            return jsonify({"status": "error", "message": "taxa deve estar entre 0 e 1."}), 400
+        profiler.rate = rate
+    if data.get("limpar"):
+        profiler.reset()
+    return jsonify(profiler.stats())
+
+# === Métricas (Prometheus) ===
+# Gauges lidos só na coleta; o armazenamento só é consultado depois do aquecimento
+metrics.gauge("forumweb_publicacoes_armazenadas", "Publicações no armazenamento.",
+              lambda: get_post_store().count() if startup_warmup.ready else None)
+metrics.gauge("forumweb_cache_entradas", "Entradas em memória nos caches de predições e de veredictos.",
+              lambda: {("predicoes",): len(prediction_cache), ("veredictos",): len(verdict_cache)}, ["cache"])
+metrics.gauge("forumweb_fila_enriquecimento_profundidade", "Publicações aguardando enriquecimento.",
+              lambda: enrichment_queue.depth)
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
+# === Servidor de Produção (wsgi.py + gunicorn.conf.py) ===
+def create_app():
+    """App pronto para um servidor WSGI: o aquecimento termina antes de devolver.
+
+    Com preload_app no gunicorn isto roda no processo mestre, antes do fork: gazetteer,
+    índices e modelos ficam em páginas compartilhadas (copy-on-write) pelos workers.
+    Em STARTUP_MODE=background a thread de aquecimento também precisa acabar aqui,
+    já que threads não passam para os processos filhos.
+    """
+    startup_warmup.start(background=STARTUP_MODE == "background")
+    startup_warmup.wait()
+    return app
+
+def prepare_fork():
+    """Chamado no mestre antes de cada fork: move os objetos já carregados para a geração
+    permanente do coletor, que deixa de percorrê-los (e de sujar as páginas compartilhadas)."""
+    import gc
+    # A conexão SQLite (ou o segmento do log) aberta no aquecimento não pode ser herdada:
+    # cada worker abre o armazenamento na primeira requisição
+    close_post_store()
+    gc.collect()
+    gc.freeze()
+
+def start_worker():
+    """Chamado em cada worker logo depois do fork: recria as threads do processo."""
+    if ENRICHMENT_WORKERS > 0:
+        enrichment_queue.start()
+    if MODEL_WATCH_INTERVAL_S > 0 and startup_warmup.ready:
+        model_reloader.start_watcher(MODEL_WATCH_INTERVAL_S)
+
+startup_warmup.start(background=STARTUP_MODE == "background")
+
 if __name__ == "__main__":
     app.run(host='0.0.0.0', port=5000, debug=True)
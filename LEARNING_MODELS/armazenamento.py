@@ -0,0 +1,590 @@
+"""
+Armazenamento das publicações reais.
+
+SQLitePostStore (padrão) guarda cada publicação como uma linha de uma tabela
+SQLite em modo WAL, com índices em id_hash, timestamp, REALcidade e na célula
+de uma grade de coordenadas; os endpoints consultam o banco em vez de varrer
+uma lista em memória. LogPostStore oferece a mesma interface sobre o log
+JSONL abaixo, mantendo as publicações em memória.
+
+PostLog é um log JSONL somente-anexação, dividido em segmentos:
+
+    <dir>/segment-000001.jsonl   registros {"op": "put", "post": {...}}
+    <dir>/snapshot-000004.jsonl  estado completo antes do segmento 4
+
+Cada gravação anexa uma linha ao segmento atual (O(1) por publicação, em vez
+de reescrever o real_posts.json inteiro). O fsync é feito em lotes: a cada
+`fsync_batch` registros ou `fsync_interval` segundos. Ao passar de
+`segment_max_bytes` o segmento é rotacionado; depois de `compact_after`
+segmentos fechados, uma thread grava um novo snapshot e apaga os segmentos
+cobertos por ele. A inicialização lê só o último snapshot e os segmentos
+posteriores. Uma linha final truncada (queda no meio da gravação) é
+descartada sem perder o restante do arquivo.
+"""
+import glob
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+_FILE_RE = re.compile(r"^(segment|snapshot)-(\d{6})\.jsonl$")
+
+
+def legacy_id_hash(post):
+    """id_hash de publicações antigas gravadas sem ele (mesma fórmula do /publicar)."""
+    return hashlib.sha256(f"{post.get('titulo', '')}{post.get('conteudo', '')}".encode('utf-8')).hexdigest()
+
+
+def _fsync_dir(directory):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class PostLog:
+    def __init__(self, directory, segment_max_bytes=8 * 1024 * 1024, fsync_batch=64, fsync_interval=1.0, compact_after=4):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+        self.compact_after = compact_after
+        self._lock = threading.RLock()
+        self._file = None
+        self._segment = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._flusher = None
+        self._flusher_pid = None
+        self._compactor = None
+        self._compact_lock = threading.Lock()
+        self.appended = 0
+        self.compactions = 0
+
+    # --- Arquivos ---
+    def _files(self, kind):
+        numbers = []
+        for path in glob.glob(os.path.join(self.directory, f"{kind}-*.jsonl")):
+            match = _FILE_RE.match(os.path.basename(path))
+            if match:
+                numbers.append(int(match.group(2)))
+        return sorted(numbers)
+
+    def _path(self, kind, number):
+        return os.path.join(self.directory, f"{kind}-{number:06d}.jsonl")
+
+    def is_empty(self):
+        return not self._files("segment") and not self._files("snapshot")
+
+    @staticmethod
+    def _read_lines(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"⚠️ Aviso: linha {line_number} inválida em {os.path.basename(path)} (gravação interrompida?). Ignorando.")
+
+    def _replay_until(self, segment_limit=None):
+        """Estado (id_hash -> publicação, em ordem de inserção) do último snapshot + segmentos seguintes."""
+        snapshots = [n for n in self._files("snapshot") if segment_limit is None or n <= segment_limit]
+        posts = {}
+        start = 0
+        if snapshots:
+            start = snapshots[-1]
+            for post in self._read_lines(self._path("snapshot", start)):
+                posts[post["id_hash"]] = post
+        for number in self._files("segment"):
+            if number < start or (segment_limit is not None and number >= segment_limit):
+                continue
+            for record in self._read_lines(self._path("segment", number)):
+                if record.get("op") == "put":
+                    # Cada registro traz a publicação inteira: vale o último (e a posição do primeiro)
+                    posts[record["post"]["id_hash"]] = record["post"]
+        return posts
+
+    def replay(self):
+        with self._lock:
+            return list(self._replay_until().values())
+
+    # --- Migração do formato antigo ---
+    def migrate_from(self, json_path):
+        """Importa o real_posts.json antigo uma única vez (só se o log estiver vazio)."""
+        if not self.is_empty() or not os.path.exists(json_path):
+            return False
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                posts = json.load(f)
+        except json.JSONDecodeError:
+            print(f"⚠️ Aviso: Arquivo {json_path} corrompido ou vazio. Nada a migrar.")
+            return False
+        for post in posts:
+            post.setdefault('id_hash', legacy_id_hash(post))
+        self._write_snapshot(1, posts)
+        os.replace(json_path, f"{json_path}.migrado")
+        print(f"📦 Migradas {len(posts)} publicações de {json_path} para o log em {self.directory}.")
+        return True
+
+    # --- Escrita ---
+    def _open_segment(self, number):
+        os.makedirs(self.directory, exist_ok=True)
+        self._segment = number
+        self._file = open(self._path("segment", number), 'a', encoding='utf-8')
+        _fsync_dir(self.directory)
+
+    def _ensure_open(self):
+        if self._file is None:
+            segments = self._files("segment")
+            snapshots = self._files("snapshot")
+            # Um processo novo sempre começa um segmento novo: o anterior pode terminar em linha truncada
+            last = max(segments[-1] if segments else 0, snapshots[-1] if snapshots else 0)
+            self._open_segment(last + 1)
+        if self._flusher_pid != os.getpid() and self.fsync_interval:
+            self._flusher_pid = os.getpid()
+            self._flusher = threading.Thread(target=self._flush_loop, name="post-log-fsync", daemon=True)
+            self._flusher.start()
+
+    def append(self, post):
+        line = json.dumps({"op": "put", "post": post}, ensure_ascii=False)
+        with self._lock:
+            self._ensure_open()
+            self._file.write(line + "\n")
+            self._file.flush()
+            self.appended += 1
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_batch or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync_locked()
+            if self._file.tell() >= self.segment_max_bytes:
+                self._rotate_locked()
+
+    def _sync_locked(self):
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def sync(self):
+        with self._lock:
+            self._sync_locked()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.fsync_interval)
+            with self._lock:
+                if self._unsynced and time.monotonic() - self._last_sync >= self.fsync_interval:
+                    self._sync_locked()
+
+    def _rotate_locked(self):
+        self._sync_locked()
+        self._file.close()
+        self._open_segment(self._segment + 1)
+        snapshots = self._files("snapshot")
+        base = snapshots[-1] if snapshots else 0
+        closed = [n for n in self._files("segment") if base <= n < self._segment]
+        if len(closed) >= self.compact_after:
+            self.compact_async()
+
+    # --- Compactação ---
+    def _write_snapshot(self, number, posts):
+        os.makedirs(self.directory, exist_ok=True)
+        final_path = self._path("snapshot", number)
+        tmp_path = final_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for post in posts:
+                f.write(json.dumps(post, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, final_path)
+        _fsync_dir(self.directory)
+
+    def compact(self):
+        """Grava um snapshot que cobre todos os segmentos fechados e apaga os arquivos antigos."""
+        with self._compact_lock:
+            self._compact()
+
+    def _compact(self):
+        with self._lock:
+            self._ensure_open()
+            if self._file.tell() > 0:
+                self._sync_locked()
+                self._file.close()
+                self._open_segment(self._segment + 1)
+            limit = self._segment
+        # A leitura e a gravação do snapshot acontecem fora do lock: só mexem em arquivos já fechados
+        posts = self._replay_until(segment_limit=limit).values()
+        self._write_snapshot(limit, posts)
+        for number in self._files("segment"):
+            if number < limit:
+                os.remove(self._path("segment", number))
+        for number in self._files("snapshot"):
+            if number < limit:
+                os.remove(self._path("snapshot", number))
+        self.compactions += 1
+        print(f"🗜️ Log de publicações compactado no snapshot {limit:06d}.")
+
+    def compact_async(self):
+        if self._compactor is not None and self._compactor.is_alive():
+            return self._compactor
+        self._compactor = threading.Thread(target=self.compact, name="post-log-compact", daemon=True)
+        self._compactor.start()
+        return self._compactor
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._sync_locked()
+                self._file.close()
+                self._file = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "diretorio": self.directory,
+                "segmento_atual": self._segment,
+                "segmentos": len(self._files("segment")),
+                "snapshots": self._files("snapshot"),
+                "registros_anexados": self.appended,
+                "pendentes_fsync": self._unsynced,
+                "compactacoes": self.compactions
+            }
+
+
+# === Stores de publicações ===
+# Interface comum: insert (False se o id_hash já existe), update (grava o estado
+# atual), get, `in`, count, scan/iter_posts com filtros e compact.
+
+def _coordinate(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+def _bbox_contains(bbox, lat, lon):
+    min_lat, min_lon, max_lat, max_lon = bbox
+    return lat is not None and lon is not None and min_lat <= lat <= max_lat and min_lon <= lon <= max_lon
+
+
+def _matches(post, since=None, cidade=None, bbox=None, status=None):
+    if since is not None and not (post.get("timestamp") or "") >= since:
+        return False
+    if cidade is not None and post.get("REALcidade") != cidade:
+        return False
+    if status is not None and post.get("status_enriquecimento") != status:
+        return False
+    if bbox is not None and not _bbox_contains(bbox, _coordinate(post.get("lat")), _coordinate(post.get("lon"))):
+        return False
+    return True
+
+
+class LogPostStore:
+    """Publicações em memória, persistidas no PostLog (backend "jsonl")."""
+
+    def __init__(self, post_log, legacy_json=None):
+        self.log = post_log
+        if legacy_json:
+            self.log.migrate_from(legacy_json)
+        self._lock = threading.RLock()
+        self._posts = OrderedDict()
+        self._seq = {}
+        for post in self.log.replay():
+            post.setdefault('id_hash', legacy_id_hash(post))
+            self._remember(post)
+
+    def _remember(self, post):
+        if post['id_hash'] not in self._seq:
+            self._seq[post['id_hash']] = len(self._seq) + 1
+        self._posts[post['id_hash']] = post
+
+    def insert(self, post):
+        with self._lock:
+            if post['id_hash'] in self._posts:
+                return False
+            self._remember(post)
+            self.log.append(post)
+            return True
+
+    def insert_many(self, posts):
+        return sum(1 for post in posts if self.insert(post))
+
+    def update(self, post):
+        with self._lock:
+            self._remember(post)
+            self.log.append(post)
+
+    def get(self, id_hash):
+        with self._lock:
+            post = self._posts.get(id_hash)
+            return dict(post) if post is not None else None
+
+    def __contains__(self, id_hash):
+        return id_hash in self._posts
+
+    def count(self):
+        return len(self._posts)
+
+    def scan(self, since=None, cidade=None, bbox=None, status=None, after_seq=None, limit=None):
+        """Gera pares (seq, publicação) em ordem de chegada."""
+        with self._lock:
+            items = list(self._posts.items())
+        found = 0
+        for id_hash, post in items:
+            seq = self._seq[id_hash]
+            if after_seq is not None and seq <= after_seq:
+                continue
+            if not _matches(post, since, cidade, bbox, status):
+                continue
+            yield seq, dict(post)
+            found += 1
+            if limit is not None and found >= limit:
+                return
+
+    def iter_posts(self, **filters):
+        for _, post in self.scan(**filters):
+            yield post
+
+    def next_cursor(self, limit, after_seq=None, **filters):
+        """seq da última publicação da página se houver mais depois dela; senão None."""
+        rows = [seq for seq, _ in self.scan(after_seq=after_seq, limit=limit + 1, **filters)]
+        return rows[limit - 1] if len(rows) > limit else None
+
+    def compact(self):
+        self.log.compact()
+
+    def close(self):
+        self.log.close()
+
+    def stats(self):
+        return {"backend": "jsonl", "publicacoes": self.count(), **self.log.stats()}
+
+
+class SQLitePostStore:
+    """Publicações em SQLite (WAL). Uma conexão por thread; escritas serializadas pelo próprio SQLite."""
+
+    SCAN_CHUNK = 500
+    # Consultas por bbox que cobrem mais linhas da grade que isto usam só lat/lon
+    MAX_GRID_ROWS = 200
+
+    def __init__(self, path, grid_size=0.1):
+        self.path = path
+        self.grid_size = grid_size
+        self.cells_per_row = int(math.ceil(360 / grid_size)) + 1
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS posts (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id_hash TEXT NOT NULL UNIQUE,
+                    timestamp TEXT,
+                    REALcidade TEXT,
+                    lat REAL,
+                    lon REAL,
+                    grid_cell INTEGER,
+                    status_enriquecimento TEXT,
+                    dados TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_posts_timestamp ON posts(timestamp);
+                CREATE INDEX IF NOT EXISTS idx_posts_realcidade ON posts(REALcidade);
+                CREATE INDEX IF NOT EXISTS idx_posts_grid_cell ON posts(grid_cell);
+                CREATE INDEX IF NOT EXISTS idx_posts_status ON posts(status_enriquecimento);
+            """)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            # Conexões não são herdadas entre processos (fork) nem compartilhadas entre threads
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    # --- Grade de coordenadas ---
+    def _grid_row_col(self, lat, lon):
+        return int((lat + 90) // self.grid_size), int((lon + 180) // self.grid_size)
+
+    def grid_cell(self, lat, lon):
+        if lat is None or lon is None:
+            return None
+        row, col = self._grid_row_col(lat, lon)
+        return row * self.cells_per_row + col
+
+    def _row(self, post):
+        lat = _coordinate(post.get("lat"))
+        lon = _coordinate(post.get("lon"))
+        return (
+            post["id_hash"], post.get("timestamp"), post.get("REALcidade"), lat, lon,
+            self.grid_cell(lat, lon), post.get("status_enriquecimento"),
+            json.dumps(post, ensure_ascii=False)
+        )
+
+    # --- Escrita ---
+    def insert(self, post):
+        with self._conn() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO posts (id_hash, timestamp, REALcidade, lat, lon, grid_cell, status_enriquecimento, dados) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", self._row(post))
+            return cursor.rowcount == 1
+
+    def insert_many(self, posts):
+        with self._conn() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO posts (id_hash, timestamp, REALcidade, lat, lon, grid_cell, status_enriquecimento, dados) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (self._row(post) for post in posts))
+            return conn.total_changes - before
+
+    def update(self, post):
+        # Upsert: mantém o seq (ordem de chegada) da publicação
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT INTO posts (id_hash, timestamp, REALcidade, lat, lon, grid_cell, status_enriquecimento, dados) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id_hash) DO UPDATE SET timestamp=excluded.timestamp, REALcidade=excluded.REALcidade, "
+                "lat=excluded.lat, lon=excluded.lon, grid_cell=excluded.grid_cell, "
+                "status_enriquecimento=excluded.status_enriquecimento, dados=excluded.dados", self._row(post))
+
+    # --- Leitura ---
+    def get(self, id_hash):
+        row = self._conn().execute("SELECT dados FROM posts WHERE id_hash = ?", (id_hash,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def __contains__(self, id_hash):
+        return self._conn().execute("SELECT 1 FROM posts WHERE id_hash = ?", (id_hash,)).fetchone() is not None
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+    def _where(self, since=None, cidade=None, bbox=None, status=None, after_seq=None):
+        clauses = []
+        params = []
+        if after_seq is not None:
+            clauses.append("seq > ?")
+            params.append(after_seq)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if cidade is not None:
+            clauses.append("REALcidade = ?")
+            params.append(cidade)
+        if status is not None:
+            clauses.append("status_enriquecimento = ?")
+            params.append(status)
+        if bbox is not None:
+            min_lat, min_lon, max_lat, max_lon = bbox
+            row0, col0 = self._grid_row_col(min_lat, min_lon)
+            row1, col1 = self._grid_row_col(max_lat, max_lon)
+            if row1 - row0 < self.MAX_GRID_ROWS:
+                # Um intervalo de células por linha da grade, resolvido pelo índice em grid_cell
+                ranges = []
+                for row in range(row0, row1 + 1):
+                    ranges.append("grid_cell BETWEEN ? AND ?")
+                    params.extend((row * self.cells_per_row + col0, row * self.cells_per_row + col1))
+                clauses.append("(" + " OR ".join(ranges) + ")")
+            clauses.append("lat BETWEEN ? AND ? AND lon BETWEEN ? AND ?")
+            params.extend((min_lat, max_lat, min_lon, max_lon))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    @staticmethod
+    def _order_by(*filters):
+        # Com filtros seletivos, "+seq" impede o SQLite de varrer a tabela inteira pela chave
+        # primária só para evitar a ordenação, e faz usar o índice do filtro
+        return "+seq" if any(f is not None for f in filters) else "seq"
+
+    def scan(self, since=None, cidade=None, bbox=None, status=None, after_seq=None, limit=None):
+        """Gera pares (seq, publicação) em ordem de chegada, lendo o banco em blocos."""
+        where, params = self._where(since, cidade, bbox, status, after_seq)
+        sql = f"SELECT seq, dados FROM posts{where} ORDER BY {self._order_by(since, cidade, bbox, status)}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        cursor = self._conn().execute(sql, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(self.SCAN_CHUNK)
+                if not rows:
+                    return
+                for seq, dados in rows:
+                    yield seq, json.loads(dados)
+        finally:
+            cursor.close()
+
+    def iter_posts(self, **filters):
+        for _, post in self.scan(**filters):
+            yield post
+
+    def next_cursor(self, limit, after_seq=None, since=None, cidade=None, bbox=None, status=None):
+        """seq da última publicação da página se houver mais depois dela; senão None.
+
+        Consulta só a coluna seq (sem decodificar JSON), para o cursor poder ir
+        no cabeçalho antes de a página começar a ser transmitida.
+        """
+        where, params = self._where(since, cidade, bbox, status, after_seq)
+        rows = self._conn().execute(
+            f"SELECT seq FROM posts{where} ORDER BY {self._order_by(since, cidade, bbox, status)} LIMIT 2 OFFSET ?", params + [int(limit) - 1]
+        ).fetchall()
+        return rows[0][0] if len(rows) == 2 else None
+
+    def compact(self):
+        self._conn().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections = []
+        self._local = threading.local()
+
+    def stats(self):
+        return {"backend": "sqlite", "arquivo": self.path, "publicacoes": self.count()}
+
+
+def migrate_legacy_posts(store, log_dir=None, json_path=None):
+    """Importa para um store vazio o log JSONL (ou, sem ele, o real_posts.json antigo) uma única vez."""
+    if store.count():
+        return 0
+    if log_dir and os.path.isdir(log_dir) and not PostLog(log_dir).is_empty():
+        posts = PostLog(log_dir).replay()
+        source = log_dir
+    elif json_path and os.path.exists(json_path):
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                posts = json.load(f)
+        except json.JSONDecodeError:
+            print(f"⚠️ Aviso: Arquivo {json_path} corrompido ou vazio. Nada a migrar.")
+            return 0
+        source = json_path
+    else:
+        return 0
+    for post in posts:
+        post.setdefault('id_hash', legacy_id_hash(post))
+    imported = store.insert_many(posts)
+    if source == json_path:
+        os.replace(json_path, f"{json_path}.migrado")
+    print(f"📦 Migradas {imported} publicações de {source} para o banco {getattr(store, 'path', '')}.")
+    return imported
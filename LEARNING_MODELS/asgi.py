@@ -0,0 +1,259 @@
+"""
+Variante ASGI da API (uvicorn asgi:application), com as mesmas rotas e respostas do NEWapp.
+
+No app WSGI cada thread atende uma requisição do começo ao fim: leituras
+baratas (/, /publicacoes) esperam atrás da inferência, que ocupa CPU, e do
+geocodificador remoto, que espera rede. Aqui o laço de eventos só recebe e
+envia bytes; cada requisição roda o mesmo app Flask em um de três executores:
+
+    saude       /, /pronto, /inicializacao e /metrics, em threads próprias: continuam
+                respondendo mesmo com a inferência saturada
+    inferencia  /predict, /predict_lote, /avaliar_publicacoes e /gerar_dataset_real,
+                em um pool limitado de threads ou de processos (fork depois do
+                aquecimento, modelos compartilhados); quando o pool e a fila
+                estão cheios a resposta é 503 na hora, em vez de acumular
+    io          as demais rotas (geocodificação, leitura do armazenamento,
+                download do dataset), em um pool de threads; as respostas em
+                streaming são enviadas pedaço a pedaço, com o envio de cada
+                pedaço segurando o próximo (backpressure)
+
+Limitação: nenhuma rota é assíncrona de verdade. As views do Flask, o
+geocodificador reverso (requests) e o armazenamento (sqlite3) continuam
+síncronos; o laço só aguarda a thread em que cada requisição roda (run_in_executor).
+O que se ganha é o isolamento entre os três grupos e a recusa imediata
+quando a inferência satura, não E/S não bloqueante: uma geocodificação lenta
+ocupa uma thread do pool "io" até terminar, e no máximo ASGI_IO_WORKERS
+requisições de E/S andam ao mesmo tempo.
+
+Variáveis de ambiente:
+    ASGI_INFERENCE_EXECUTOR   "thread" (padrão) ou "process"
+    ASGI_INFERENCE_WORKERS    tamanho do pool de inferência (padrão: 2)
+    ASGI_INFERENCE_QUEUE      requisições de inferência esperando além das em execução (padrão: 32)
+    ASGI_IO_WORKERS           threads para as rotas de I/O (padrão: 16)
+
+No modo "process" cada processo tem os próprios caches de predição e de
+veredictos; /cache_predicoes mostra só o do processo principal. Ele também
+não aceita POSTS_BACKEND=jsonl, cujas publicações ficam em memória em cada
+processo (os de inferência não veriam as recebidas depois do fork).
+"""
+import asyncio
+import io
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import NEWapp
+
+ASGI_INFERENCE_EXECUTOR = os.environ.get("ASGI_INFERENCE_EXECUTOR", "thread")
+ASGI_INFERENCE_WORKERS = int(os.environ.get("ASGI_INFERENCE_WORKERS", 2))
+ASGI_INFERENCE_QUEUE = int(os.environ.get("ASGI_INFERENCE_QUEUE", 32))
+ASGI_IO_WORKERS = int(os.environ.get("ASGI_IO_WORKERS", 16))
+
+ROTAS_SAUDE = {"/", "/pronto", "/inicializacao", "/metrics"}
+ROTAS_INFERENCIA = {"/predict", "/predict_lote", "/avaliar_publicacoes", "/gerar_dataset_real"}
+
+
+def build_environ(scope, body):
+    """Environ WSGI equivalente ao scope HTTP do ASGI."""
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": (scope.get("client") or ("", 0))[0],
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        key = name if name in ("CONTENT_TYPE", "CONTENT_LENGTH") else f"HTTP_{name}"
+        if key == "CONTENT_LENGTH":
+            continue
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _with_streams(environ, body):
+    return dict(environ, **{"wsgi.input": io.BytesIO(body), "wsgi.errors": sys.stderr})
+
+
+def _start_message(status, headers):
+    return {
+        "type": "http.response.start",
+        "status": int(status.split(" ", 1)[0]),
+        "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers],
+    }
+
+
+def run_buffered(environ, body):
+    """Executa o app Flask e devolve a resposta inteira; roda nos processos de inferência."""
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response["status"], response["headers"] = status, headers
+
+    result = NEWapp.app(_with_streams(environ, body), start_response)
+    try:
+        content = b"".join(result)
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    return response["status"], response["headers"], content
+
+
+def _warm_process(_):
+    return os.getpid()
+
+
+class AsgiApp:
+    def __init__(self, wsgi_app, inference_executor=ASGI_INFERENCE_EXECUTOR,
+                 inference_workers=ASGI_INFERENCE_WORKERS, inference_queue=ASGI_INFERENCE_QUEUE,
+                 io_workers=ASGI_IO_WORKERS):
+        self.wsgi_app = wsgi_app
+        self.inference_mode = inference_executor
+        self.inference_workers = inference_workers
+        self.inference_limit = inference_workers + inference_queue
+        self.io_workers = io_workers
+        self.inference_pending = 0
+        self.inference_rejected = 0
+        self._pools = None
+        self._startup_lock = None
+
+    # --- Ciclo de vida ---
+    def _create_pools(self):
+        if self.inference_mode == "process" and NEWapp.POSTS_BACKEND == "jsonl":
+            raise RuntimeError("ASGI_INFERENCE_EXECUTOR=process não suporta POSTS_BACKEND=jsonl; use POSTS_BACKEND=sqlite")
+        # Aquecimento antes de qualquer fork: os processos de inferência herdam os modelos carregados
+        NEWapp.create_app()
+        if self.inference_mode == "process":
+            NEWapp.prepare_fork()
+            inference = ProcessPoolExecutor(self.inference_workers, mp_context=multiprocessing.get_context("fork"))
+            # Cria os processos agora, enquanto nenhuma outra thread do servidor segura locks
+            list(inference.map(_warm_process, range(self.inference_workers)))
+        else:
+            inference = ThreadPoolExecutor(self.inference_workers, thread_name_prefix="asgi-inferencia")
+        return {
+            "saude": ThreadPoolExecutor(2, thread_name_prefix="asgi-saude"),
+            "inferencia": inference,
+            "io": ThreadPoolExecutor(self.io_workers, thread_name_prefix="asgi-io"),
+        }
+
+    async def startup(self):
+        if self._pools is not None:
+            return
+        if self._startup_lock is None:
+            self._startup_lock = asyncio.Lock()
+        async with self._startup_lock:
+            if self._pools is None:
+                # O aquecimento bloqueia: roda fora do laço (a thread termina antes do fork)
+                self._pools = await asyncio.get_running_loop().run_in_executor(None, self._create_pools)
+
+    def shutdown(self):
+        if self._pools is not None:
+            for pool in self._pools.values():
+                pool.shutdown(wait=False, cancel_futures=True)
+            self._pools = None
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": f"{type(e).__name__}: {e}"})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # --- Requisições ---
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] != "http":
+            return
+        await self.startup()
+        body = await self._read_body(receive)
+        environ = build_environ(scope, body)
+        environ["wsgi.multiprocess"] = self.inference_mode == "process"
+        path = scope["path"]
+        if path in ROTAS_INFERENCIA:
+            return await self._inference(environ, body, send)
+        pool = self._pools["saude" if path in ROTAS_SAUDE else "io"]
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(pool, self._run_streaming, _with_streams(environ, body), send, loop)
+
+    @staticmethod
+    async def _read_body(receive):
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        return b"".join(chunks)
+
+    async def _inference(self, environ, body, send):
+        if self.inference_pending >= self.inference_limit:
+            self.inference_rejected += 1
+            payload = json.dumps({"status": "error", "message": "Servidor ocupado com inferência, tente novamente."}).encode("utf-8")
+            await send(_start_message("503 SERVICE UNAVAILABLE", [("Content-Type", "application/json"), ("Retry-After", "1")]))
+            await send({"type": "http.response.body", "body": payload})
+            return
+        self.inference_pending += 1
+        loop = asyncio.get_running_loop()
+        try:
+            if self.inference_mode == "process":
+                status, headers, content = await loop.run_in_executor(self._pools["inferencia"], run_buffered, environ, body)
+                await send(_start_message(status, headers))
+                await send({"type": "http.response.body", "body": content})
+            else:
+                await loop.run_in_executor(self._pools["inferencia"], self._run_streaming,
+                                           _with_streams(environ, body), send, loop)
+        finally:
+            self.inference_pending -= 1
+
+    def _run_streaming(self, environ, send, loop):
+        """Executa o app Flask em uma thread do pool e envia a resposta pelo laço, pedaço a pedaço."""
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response["status"], response["headers"] = status, headers
+
+        def emit(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            started = False
+            for chunk in result:
+                if not chunk:
+                    continue
+                if not started:
+                    emit(_start_message(response["status"], response["headers"]))
+                    started = True
+                emit({"type": "http.response.body", "body": chunk, "more_body": True})
+            if not started:
+                emit(_start_message(response["status"], response["headers"]))
+            emit({"type": "http.response.body", "body": b""})
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+
+
+application = AsgiApp(NEWapp.app)
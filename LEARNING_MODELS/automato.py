@@ -0,0 +1,119 @@
+"""
+Autômato de Aho-Corasick para buscar muitas frases de uma vez.
+
+Montado uma única vez com todos os padrões (nomes de cidades, estados,
+apelidos, sinônimos...), encontra todas as ocorrências em uma única passada
+pelo texto, em tempo linear no tamanho do texto mais o número de ocorrências,
+em vez de um `padrão in texto` para cada padrão.
+
+Os padrões são comparados caractere a caractere, sem normalização: quem usa
+o autômato normaliza padrões e texto do mesmo jeito antes de chamá-lo.
+"""
+from collections import deque
+
+
+class AhoCorasick:
+    def __init__(self, patterns=None):
+        # Nó 0 é a raiz; cada nó tem as transições, o link de falha e as saídas
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self._built = False
+        self.patterns = 0
+        for pattern, value in (patterns or ()):
+            self.add(pattern, value)
+
+    def add(self, pattern, value=None):
+        """Registra `pattern`; cada ocorrência devolve `value` (padrão repetido devolve todos)."""
+        if not pattern:
+            return
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(pattern), value if value is not None else pattern))
+        self.patterns += 1
+        self._built = False
+
+    def build(self):
+        """Calcula os links de falha (busca em largura) e junta as saídas dos sufixos."""
+        goto, fail = self._goto, self._fail
+        # Filhos da raiz falham para a raiz; os demais, para o maior sufixo que também é prefixo
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in goto[node].items():
+                state = fail[node]
+                while state and ch not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[fail[child]]
+                queue.append(child)
+        # Transições resolvidas (trie + links de falha), preenchidas conforme aparecem nos textos:
+        # depois de aquecido, cada caractere custa uma consulta de dicionário
+        self._delta = [dict(edges) for edges in goto]
+        self._values = None
+        self._built = True
+        return self
+
+    def _transition(self, node, ch):
+        goto, fail = self._goto, self._fail
+        state = node
+        while state and ch not in goto[state]:
+            state = fail[state]
+        nxt = goto[state].get(ch, 0)
+        self._delta[node][ch] = nxt
+        return nxt
+
+    def __len__(self):
+        return self.patterns
+
+    def iter_matches(self, text, whole_words=False):
+        """Gera (início, fim, valor) de cada ocorrência, na ordem em que terminam no texto.
+
+        Com `whole_words`, só valem ocorrências sem letra ou dígito colado antes ou depois.
+        """
+        if not self._built:
+            self.build()
+        delta, out, transition = self._delta, self._out, self._transition
+        size = len(text)
+        node = 0
+        for i, ch in enumerate(text):
+            nxt = delta[node].get(ch)
+            node = transition(node, ch) if nxt is None else nxt
+            if not out[node]:
+                continue
+            end = i + 1
+            for length, value in out[node]:
+                start = end - length
+                if whole_words and ((start > 0 and text[start - 1].isalnum()) or (end < size and text[end].isalnum())):
+                    continue
+                yield start, end, value
+
+    def find_all(self, text, whole_words=False):
+        return list(self.iter_matches(text, whole_words))
+
+    def values_in(self, text, whole_words=False):
+        """Conjunto dos valores que ocorrem no texto."""
+        if whole_words:
+            return {value for _, _, value in self.iter_matches(text, whole_words)}
+        if not self._built:
+            self.build()
+        if self._values is None:
+            self._values = {node: {value for _, value in out} for node, out in enumerate(self._out) if out}
+        # Caminho rápido, sem posições: é o laço mais quente da validação das publicações
+        delta, values, transition = self._delta, self._values, self._transition
+        found = set()
+        node = 0
+        for ch in text:
+            nxt = delta[node].get(ch)
+            node = transition(node, ch) if nxt is None else nxt
+            if node in values:
+                found.update(values[node])
+        return found
@@ -0,0 +1,118 @@
+"""
+Benchmark de ingestão e consulta do armazenamento de publicações.
+
+Para cada tamanho, grava publicações sintéticas (em lote, e também uma a uma
+como faz o /publicar) e mede as consultas usadas pelos endpoints: busca por
+id_hash, filtro por REALcidade, por data, por bbox e a varredura completa.
+Compara o SQLitePostStore com o backend JSONL (lista em memória + log) e
+informa o tamanho em disco. A reescrita antiga do real_posts.json a cada
+publicação é O(n) por gravação e não entra na comparação.
+
+Uso:
+    python benchmarks/bench_armazenamento.py [--tamanhos 10000 100000 1000000] [--backends sqlite jsonl]
+"""
+import argparse
+import datetime
+import os
+import random
+import shutil
+import tempfile
+import time
+import modelos_sinteticos  # noqa: F401  (ajusta o sys.path)
+from armazenamento import PostLog, LogPostStore, SQLitePostStore
+
+
+def gerar_publicacoes(cidades, n, seed=0):
+    rng = random.Random(seed)
+    inicio = datetime.datetime(2025, 1, 1)
+    for i in range(n):
+        cidade = rng.choice(cidades)
+        yield {
+            "id_hash": f"{i:064x}",
+            "titulo": f"Alagamento {i}",
+            "conteudo": f"Ruas alagadas em {cidade['cidade']} após chuva forte.",
+            "lat": cidade["latitude"] + rng.uniform(-0.05, 0.05),
+            "lon": cidade["longitude"] + rng.uniform(-0.05, 0.05),
+            "marcacao": None,
+            "REALcidade": cidade["cidade"],
+            "REALestado": cidade["estado"],
+            "timestamp": (inicio + datetime.timedelta(seconds=30 * i)).isoformat(),
+            "status_enriquecimento": "concluido"
+        }
+
+
+def abrir(backend, diretorio):
+    if backend == "sqlite":
+        return SQLitePostStore(os.path.join(diretorio, "posts.db"))
+    return LogPostStore(PostLog(os.path.join(diretorio, "log")))
+
+
+def tamanho_em_disco(diretorio):
+    return sum(os.path.getsize(os.path.join(raiz, nome)) for raiz, _, nomes in os.walk(diretorio) for nome in nomes)
+
+
+def cronometrar(func, repeticoes=1):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado = func()
+    return (time.perf_counter() - inicio) / repeticoes, resultado
+
+
+def medir(backend, cidades, n, unitarias):
+    diretorio = tempfile.mkdtemp(prefix=f"bench-{backend}-")
+    try:
+        store = abrir(backend, diretorio)
+        t_lote, _ = cronometrar(lambda: store.insert_many(gerar_publicacoes(cidades, n)))
+        extras = list(gerar_publicacoes(cidades, unitarias, seed=1))
+        for i, post in enumerate(extras):
+            post["id_hash"] = f"extra-{i}"
+        t_unitaria, _ = cronometrar(lambda: [store.insert(post) for post in extras])
+        store.close()
+        # Reabertura: o backend JSONL precisa reler tudo para a memória
+        t_abrir, store = cronometrar(lambda: abrir(backend, diretorio))
+        alvo = cidades[len(cidades) // 2]
+        # Último ~1% das publicações (as mais recentes)
+        desde = (datetime.datetime(2025, 1, 1) + datetime.timedelta(seconds=30 * int(n * 0.99))).isoformat()
+        bbox = (alvo["latitude"] - 0.5, alvo["longitude"] - 0.5, alvo["latitude"] + 0.5, alvo["longitude"] + 0.5)
+        consultas = {
+            "id_hash": cronometrar(lambda: store.get(f"{n // 2:064x}"), 200),
+            "cidade": cronometrar(lambda: sum(1 for _ in store.iter_posts(cidade=alvo["cidade"])), 5),
+            "desde": cronometrar(lambda: sum(1 for _ in store.iter_posts(since=desde)), 5),
+            "bbox": cronometrar(lambda: sum(1 for _ in store.iter_posts(bbox=bbox)), 5),
+            "pagina_100": cronometrar(lambda: sum(1 for _ in store.scan(after_seq=n // 2, limit=100)), 20),
+            "varredura": cronometrar(lambda: sum(1 for _ in store.iter_posts()), 1),
+        }
+        store.close()
+        return {
+            "ingestao_lote_s": t_lote,
+            "ingestao_unitaria_us": t_unitaria / max(unitarias, 1) * 1e6,
+            "abertura_s": t_abrir,
+            "disco_mb": tamanho_em_disco(diretorio) / 1e6,
+            "consultas": {nome: (t, r) for nome, (t, r) in consultas.items()},
+        }
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--backends", nargs="+", default=["sqlite", "jsonl"], choices=["sqlite", "jsonl"])
+    parser.add_argument("--unitarias", type=int, default=1000, help="publicações gravadas uma a uma (como o /publicar)")
+    args = parser.parse_args()
+
+    cidades = modelos_sinteticos.carregar_cidades()
+    for n in args.tamanhos:
+        for backend in args.backends:
+            r = medir(backend, cidades, n, args.unitarias)
+            print(f"\n=== {backend} | {n} publicações ===")
+            print(f"ingestão em lote: {r['ingestao_lote_s']:.2f} s ({n / r['ingestao_lote_s']:.0f}/s)  |  "
+                  f"unitária: {r['ingestao_unitaria_us']:.0f} µs/publicação")
+            print(f"abertura: {r['abertura_s']:.2f} s  |  disco: {r['disco_mb']:.1f} MB")
+            for nome, (t, resultado) in r["consultas"].items():
+                linhas = resultado if isinstance(resultado, int) else (1 if resultado else 0)
+                print(f"  {nome:<11} {t * 1000:10.3f} ms  ({linhas} linhas)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark da variante ASGI (uvicorn asgi:application) contra o servidor WSGI (gunicorn wsgi:application).
+
+Com um único processo em cada servidor, satura a inferência com POST
+/predict_lote em --concorrencia conexões e, ao mesmo tempo, mede a latência
+de leituras baratas (GET / e GET /publicacoes) feitas por um cliente à parte:
+
+    inferência   req/s, p50/p95/p99 e erros das requisições de /predict_lote;
+                 no ASGI as que passam do limite de ASGI_INFERENCE_QUEUE voltam
+                 503 na hora e aparecem em "recusadas"
+    leituras     p50/p95/p99 de / e /publicacoes durante a saturação; no WSGI
+                 elas disputam as mesmas threads que a inferência
+
+Os dois servidores usam os mesmos modelos sintéticos e o mesmo número de
+threads (--threads para o gunicorn, ASGI_INFERENCE_WORKERS para o ASGI).
+Com --saida grava o resultado em JSON.
+
+Uso:
+    python benchmarks/bench_asgi.py [--threads 4] [--concorrencia 32] [--lotes 400] [--leituras 300]
+"""
+import argparse
+import json
+import shutil
+import sys
+import threading
+from bench_servidor import (porta_livre, preparar_diretorio, ambiente, subir_servidor, parar_servidor,
+                            disparar, percentil, corpos_predict)
+
+
+def resumo(latencias, erros, duracao=None):
+    r = {
+        "p50_ms": percentil(latencias, 50) * 1000,
+        "p95_ms": percentil(latencias, 95) * 1000,
+        "p99_ms": percentil(latencias, 99) * 1000,
+        "erros": len([e for e in erros if e != 503]),
+        "recusadas": erros.count(503),
+    }
+    if duracao is not None:
+        r["req_s"] = len(latencias) / duracao
+    return r
+
+
+def medir(comando, env, porta, lotes, leituras, concorrencia):
+    processo = subir_servidor(comando, env, porta)
+    try:
+        disparar(porta, "POST", "/predict_lote", lotes[:20], 4)
+        inferencia = {}
+
+        def saturar():
+            inferencia["resultado"] = disparar(porta, "POST", "/predict_lote", lotes, concorrencia)
+
+        carga = threading.Thread(target=saturar)
+        carga.start()
+        leituras_resultado = [disparar(porta, "GET", rota, [None] * leituras, 1)
+                              for rota in ("/", "/publicacoes?limit=20")]
+        carga.join()
+    finally:
+        parar_servidor(processo)
+    latencias = [t for lat, _, _ in leituras_resultado for t in lat]
+    erros = [e for _, err, _ in leituras_resultado for e in err]
+    return {"inferencia": resumo(*inferencia["resultado"]), "leituras": resumo(latencias, erros)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--concorrencia", type=int, default=32)
+    parser.add_argument("--lotes", type=int, default=400, help="requisições POST /predict_lote")
+    parser.add_argument("--tamanho-lote", type=int, default=16)
+    parser.add_argument("--leituras", type=int, default=300, help="leituras por rota durante a saturação")
+    parser.add_argument("--fila", type=int, default=32, help="ASGI_INFERENCE_QUEUE")
+    parser.add_argument("--executor", choices=["thread", "process"], default="thread")
+    parser.add_argument("--cidades", type=int, default=1000, help="cidades dos modelos sintéticos")
+    parser.add_argument("--saida", help="grava o resultado em JSON")
+    args = parser.parse_args()
+
+    for programa in ("gunicorn", "uvicorn"):
+        if shutil.which(programa) is None:
+            sys.exit(f"❌ {programa} não encontrado (pip install {programa}).")
+    diretorio, cidades = preparar_diretorio(args.cidades)
+    textos = corpos_predict(cidades, args.lotes * args.tamanho_lote)
+    lotes = [{"publicacoes": textos[i:i + args.tamanho_lote]} for i in range(0, len(textos), args.tamanho_lote)]
+    servidores = {
+        "wsgi": (["gunicorn", "-c", "gunicorn.conf.py", "wsgi:application"],
+                 {"WEB_CONCURRENCY": "1", "GUNICORN_THREADS": str(args.threads)}),
+        "asgi": (["uvicorn", "asgi:application", "--host", "127.0.0.1", "--port", "{porta}", "--no-access-log"],
+                 {"ASGI_INFERENCE_WORKERS": str(args.threads), "ASGI_INFERENCE_QUEUE": str(args.fila),
+                  "ASGI_INFERENCE_EXECUTOR": args.executor}),
+    }
+    resultados = {}
+    try:
+        for nome, (comando, env_extra) in servidores.items():
+            porta = porta_livre()
+            comando = [parte.format(porta=porta) for parte in comando]
+            resultados[nome] = medir(comando, ambiente(diretorio, porta, **env_extra), porta,
+                                     lotes, args.leituras, args.concorrencia)
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+    print(f"\n=== {len(lotes)} POST /predict_lote de {args.tamanho_lote} textos, concorrência {args.concorrencia}, "
+          f"{args.threads} threads de inferência, executor ASGI '{args.executor}' ===")
+    print(f"{'servidor':<9} {'carga':<11} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'erros':>6} {'503':>5}")
+    for nome, r in resultados.items():
+        for carga in ("inferencia", "leituras"):
+            m = r[carga]
+            req_s = f"{m['req_s']:7.1f}" if "req_s" in m else f"{'-':>7}"
+            print(f"{nome:<9} {carga:<11} {req_s} {m['p50_ms']:8.1f} {m['p95_ms']:8.1f} {m['p99_ms']:8.1f} "
+                  f"{m['erros']:>6} {m['recusadas']:>5}")
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+Teste de carga: reenvia publicações gravadas ou sintéticas para /predict, /publicar e /avaliar_publicacoes.
+
+Cada rota é um cenário separado, na ordem /predict, /publicar e
+/avaliar_publicacoes (que avalia o que /publicar acabou de gravar):
+
+    requisições   total enviado e quantas terminaram com erro (status >= 400
+                  ou falha de conexão), com a contagem por status
+    req/s         vazão do cenário
+    p50/p95/p99   latência em ms; com --taxa as requisições seguem um
+                  cronograma fixo (carga aberta) e a latência conta a partir
+                  do horário previsto, incluindo a espera quando o servidor
+                  fica para trás
+
+Modos:
+    processo   chama o app Flask pelo test client, no mesmo processo, com
+               armazenamento temporário e os modelos .pkl (ou sintéticos)
+    http       envia para --url; sem --url sobe `gunicorn -c gunicorn.conf.py
+               wsgi:application` com os modelos gravados em um diretório temporário
+
+Publicações gravadas (--captura) vêm de um arquivo JSONL com um objeto por
+linha: o corpo de uma publicação ({"titulo", "conteudo", "lat", "lon",
+"marcacao"}) ou {"rota": "/predict", "corpo": {...}} para uma rota
+específica; linhas sem título nem conteúdo são ignoradas. Sem --captura
+são geradas publicações sintéticas (modelos_sinteticos.py), que podem ser
+gravadas com --gravar-captura para repetir exatamente a mesma carga.
+
+--saida grava o resultado em JSON; --comparar lê um resultado anterior,
+mostra a variação de cada rota e termina com código 1 se alguma métrica
+piorou mais que --tolerancia.
+
+Uso:
+    python benchmarks/bench_carga.py [--modo processo|http] [--url http://127.0.0.1:5000]
+        [--publicacoes 500] [--concorrencia 8] [--taxa 50] [--saida base.json] [--comparar base.json]
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+ROTAS = {"/predict": "POST", "/publicar": "POST", "/avaliar_publicacoes": "GET"}
+# Métricas comparadas com --comparar e se um valor maior é pior
+COMPARADAS = {"p50_ms": True, "p95_ms": True, "p99_ms": True, "req_s": False, "taxa_erro": True}
+
+
+def marcacao_quadrada(lat, lon, lado_graus):
+    meio = lado_graus / 2
+    anel = [[lon - meio, lat - meio], [lon + meio, lat - meio], [lon + meio, lat + meio],
+            [lon - meio, lat + meio], [lon - meio, lat - meio]]
+    return json.dumps({"type": "Feature", "geometry": {"type": "Polygon", "coordinates": [anel]}})
+
+
+def publicacoes_sinteticas(cidades, quantidade, seed=13):
+    import modelos_sinteticos
+    rng = random.Random(seed)
+    publicacoes = []
+    for i, m in enumerate(modelos_sinteticos.gerar_mensagens(cidades, quantidade, seed=seed)):
+        # Título numerado: cada publicação tem um hash próprio e /publicar não a trata como duplicada
+        publicacao = {"titulo": f"Relato {i}", "conteudo": m["texto"], "lat": m["lat"], "lon": m["lon"]}
+        if rng.random() < 0.3:
+            publicacao["marcacao"] = marcacao_quadrada(m["lat"], m["lon"], rng.choice([0.01, 0.05, 0.2]))
+        publicacoes.append(publicacao)
+    return publicacoes
+
+
+def carregar_captura(caminho):
+    """{rota: [corpos]} a partir do JSONL; publicações sem rota vão para /predict e /publicar."""
+    cenarios = {rota: [] for rota in ROTAS}
+    ignoradas = 0
+    with open(caminho, encoding="utf-8") as f:
+        for linha in f:
+            try:
+                registro = json.loads(linha)
+            except json.JSONDecodeError:
+                ignoradas += 1
+                continue
+            if isinstance(registro, dict) and registro.get("rota") in ROTAS:
+                cenarios[registro["rota"]].append(registro.get("corpo"))
+            elif isinstance(registro, dict) and (registro.get("titulo") or registro.get("conteudo")):
+                cenarios["/predict"].append(registro)
+                cenarios["/publicar"].append(registro)
+            else:
+                ignoradas += 1
+    print(f"📄 Captura '{caminho}': {sum(map(len, cenarios.values()))} requisições, {ignoradas} linhas ignoradas.")
+    return cenarios
+
+
+def preparar_ambiente_local():
+    """Armazenamento temporário para o NEWapp importado neste processo (modo processo e cidades)."""
+    diretorio = tempfile.mkdtemp(prefix="bench-carga-")
+    for variavel, nome in (("REAL_POSTS_FILE", "real_posts.json"), ("POSTS_LOG_DIR", "real_posts_log"),
+                           ("POSTS_DB_PATH", "real_posts.db"), ("MODEL_CACHE_DIR", "model_cache")):
+        os.environ[variavel] = os.path.join(diretorio, nome)
+    os.environ["MODEL_WATCH_INTERVAL_S"] = "0"
+    return diretorio
+
+
+def cliente_processo(modelos):
+    import NEWapp
+    NEWapp.modelo_categoria, NEWapp.modelo_localizacao, NEWapp.modelo_impacto = modelos
+    local = threading.local()
+
+    def enviar(metodo, rota, corpo):
+        cliente = getattr(local, "cliente", None)
+        if cliente is None:
+            cliente = local.cliente = NEWapp.app.test_client()
+        resposta = cliente.open(rota, method=metodo, json=corpo)
+        resposta.get_data()
+        return resposta.status_code
+    return enviar
+
+
+def cliente_http(url, timeout=120):
+    partes = urlsplit(url)
+    local = threading.local()
+
+    def enviar(metodo, rota, corpo):
+        conexao = getattr(local, "conexao", None)
+        if conexao is None:
+            conexao = local.conexao = http.client.HTTPConnection(partes.hostname, partes.port or 80, timeout=timeout)
+        dados = json.dumps(corpo).encode("utf-8") if corpo is not None else None
+        try:
+            conexao.request(metodo, partes.path.rstrip("/") + rota, body=dados,
+                            headers={"Content-Type": "application/json"} if dados is not None else {})
+            resposta = conexao.getresponse()
+            resposta.read()
+            return resposta.status
+        except (OSError, http.client.HTTPException):
+            local.conexao = None
+            conexao.close()
+            raise
+    return enviar
+
+
+def executar(enviar, metodo, rota, corpos, concorrencia, taxa=None):
+    """Envia todos os corpos; com `taxa` (req/s) a requisição i sai em inicio + i/taxa."""
+    proximo = itertools.count()
+    latencias = [None] * len(corpos)
+    status = [None] * len(corpos)
+    inicio = time.perf_counter()
+
+    def trabalhador():
+        while True:
+            i = next(proximo)
+            if i >= len(corpos):
+                return
+            if taxa:
+                enviado = inicio + i / taxa
+                espera = enviado - time.perf_counter()
+                if espera > 0:
+                    time.sleep(espera)
+            else:
+                enviado = time.perf_counter()
+            try:
+                status[i] = enviar(metodo, rota, corpos[i])
+            except Exception as e:
+                status[i] = type(e).__name__
+            latencias[i] = time.perf_counter() - enviado
+
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        for futuro in [executor.submit(trabalhador) for _ in range(concorrencia)]:
+            futuro.result()
+    duracao = time.perf_counter() - inicio
+    return latencias, status, duracao
+
+
+def resumir(latencias, status, duracao):
+    from bench_servidor import percentil
+    erros = sum(1 for s in status if not isinstance(s, int) or s >= 400)
+    return {
+        "requisicoes": len(latencias),
+        "erros": erros,
+        "taxa_erro": erros / len(latencias),
+        "req_s": len(latencias) / duracao,
+        "p50_ms": percentil(latencias, 50) * 1000,
+        "p95_ms": percentil(latencias, 95) * 1000,
+        "p99_ms": percentil(latencias, 99) * 1000,
+        "media_ms": statistics.mean(latencias) * 1000,
+        "status": dict(Counter(str(s) for s in status)),
+    }
+
+
+def comparar(base, atual, tolerancia):
+    """Imprime a variação por rota; devolve as métricas que pioraram mais que a tolerância."""
+    pioras = []
+    print(f"\n=== Comparação com a base (tolerância {tolerancia:.0%}) ===")
+    diferentes = [campo for campo in ("modo", "concorrencia", "taxa", "origem") if base.get(campo) != atual.get(campo)]
+    if diferentes:
+        print(f"⚠️ Base gerada com outra configuração ({', '.join(diferentes)}); as variações podem não ser comparáveis.")
+    print(f"{'rota':<22} {'métrica':<10} {'base':>10} {'atual':>10} {'variação':>9}")
+    for rota, medidas in atual["rotas"].items():
+        anterior = base.get("rotas", {}).get(rota)
+        if anterior is None:
+            print(f"{rota:<22} (sem base)")
+            continue
+        for metrica, maior_pior in COMPARADAS.items():
+            antes, agora = anterior[metrica], medidas[metrica]
+            if metrica == "taxa_erro":
+                variacao = agora - antes
+                piorou = variacao > tolerancia * max(antes, 0.01)
+                texto = f"{variacao:+9.2%}"
+            else:
+                variacao = (agora - antes) / antes if antes else 0.0
+                piorou = (variacao if maior_pior else -variacao) > tolerancia
+                texto = f"{variacao:+9.1%}"
+            if piorou:
+                pioras.append((rota, metrica))
+            print(f"{rota:<22} {metrica:<10} {antes:10.2f} {agora:10.2f} {texto}{'  ⚠️' if piorou else ''}")
+    return pioras
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modo", choices=["processo", "http"], default="processo")
+    parser.add_argument("--url", help="servidor já em execução (modo http)")
+    parser.add_argument("--rotas", nargs="+", choices=list(ROTAS), default=list(ROTAS))
+    parser.add_argument("--captura", help="JSONL com as publicações gravadas")
+    parser.add_argument("--gravar-captura", help="grava as publicações sintéticas em JSONL")
+    parser.add_argument("--publicacoes", type=int, default=500, help="publicações sintéticas")
+    parser.add_argument("--avaliacoes", type=int, default=10, help="requisições GET /avaliar_publicacoes")
+    parser.add_argument("--concorrencia", type=int, default=8)
+    parser.add_argument("--taxa", type=float, help="req/s por cenário (carga aberta); sem ela, o máximo")
+    parser.add_argument("--cidades", type=int, default=1000, help="cidades dos modelos sintéticos")
+    parser.add_argument("--saida", help="grava o resultado em JSON")
+    parser.add_argument("--comparar", help="resultado anterior (JSON) para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.10)
+    args = parser.parse_args()
+
+    diretorio_local = preparar_ambiente_local()
+    import modelos_sinteticos
+    from bench_servidor import porta_livre, preparar_diretorio, ambiente, subir_servidor, parar_servidor
+    categoria, localizacao, impacto, cidades = modelos_sinteticos.obter_modelos(num_cidades=args.cidades)
+    if args.captura:
+        cenarios = carregar_captura(args.captura)
+    else:
+        publicacoes = publicacoes_sinteticas(cidades, args.publicacoes)
+        cenarios = {"/predict": publicacoes, "/publicar": publicacoes}
+        if args.gravar_captura:
+            with open(args.gravar_captura, "w", encoding="utf-8") as f:
+                for publicacao in publicacoes:
+                    f.write(json.dumps(publicacao, ensure_ascii=False) + "\n")
+    cenarios["/avaliar_publicacoes"] = cenarios.get("/avaliar_publicacoes") or [None] * args.avaliacoes
+
+    processo = diretorio_servidor = None
+    try:
+        if args.modo == "processo":
+            enviar = cliente_processo((categoria, localizacao, impacto))
+            alvo = "test client"
+        else:
+            if shutil.which("gunicorn") is None and not args.url:
+                sys.exit("❌ gunicorn não encontrado (pip install gunicorn) e nenhum --url informado.")
+            alvo = args.url
+            if not alvo:
+                diretorio_servidor, _ = preparar_diretorio(args.cidades)
+                porta = porta_livre()
+                processo = subir_servidor(["gunicorn", "-c", "gunicorn.conf.py", "wsgi:application"],
+                                          ambiente(diretorio_servidor, porta), porta)
+                alvo = f"http://127.0.0.1:{porta}"
+            enviar = cliente_http(alvo)
+
+        resultado = {"modo": args.modo, "alvo": alvo, "concorrencia": args.concorrencia, "taxa": args.taxa,
+                     "origem": args.captura or "sintetica", "cpus": os.cpu_count(), "rotas": {}}
+        for rota in args.rotas:
+            corpos = cenarios.get(rota) or []
+            if not corpos:
+                print(f"⚠️ Nenhuma requisição para {rota}; cenário ignorado.")
+                continue
+            concorrencia = min(args.concorrencia, len(corpos))
+            resultado["rotas"][rota] = resumir(*executar(enviar, ROTAS[rota], rota, corpos, concorrencia, args.taxa))
+    finally:
+        if processo is not None:
+            parar_servidor(processo)
+        for diretorio in (diretorio_local, diretorio_servidor):
+            if diretorio:
+                shutil.rmtree(diretorio, ignore_errors=True)
+
+    print(f"\n=== {alvo}: concorrência {args.concorrencia}"
+          f"{f', {args.taxa:g} req/s' if args.taxa else ''}, {os.cpu_count()} CPUs ===")
+    print(f"{'rota':<22} {'req':>6} {'erros':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  status")
+    for rota, r in resultado["rotas"].items():
+        print(f"{rota:<22} {r['requisicoes']:>6} {r['erros']:>6} {r['req_s']:8.1f} {r['p50_ms']:8.1f} "
+              f"{r['p95_ms']:8.1f} {r['p99_ms']:8.1f}  {r['status']}")
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            pioras = comparar(json.load(f), resultado, args.tolerancia)
+        if pioras:
+            sys.exit(f"❌ {len(pioras)} métricas pioraram além da tolerância.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark da extração de cidade citada no texto (extracao_local.py).
+
+Compara a localização só pelo modelo com a extração por menção explícita
+seguida do modelo como reserva, medindo:
+
+    cobertura    fração dos textos com cidade resolvida pela menção
+    precisão     acertos da menção sobre os textos resolvidos
+    acurácia     da localização final (menção + modelo) e só do modelo
+    latência     categoria + impacto + localização por texto e por lote;
+                 com a extração, a cabeça de localização só roda nos textos
+                 sem menção
+
+Usa o dataset_validacao.csv quando disponível; senão, mensagens sintéticas de
+modelos_sinteticos.py, com uma fração sem cidade no texto (--sem-cidade).
+
+Uso:
+    python benchmarks/bench_extracao_local.py [--cidades 1000] [--textos 2000] [--sem-cidade 0.3]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+import numpy as np
+import pandas as pd
+import modelos_sinteticos
+from extracao_local import LocationMatcher
+from gazetteer import Gazetteer
+from inferencia import SharedTfidfEngine, FusedPredictor
+
+
+def carregar_validacao(cidades, quantidade, sem_cidade):
+    caminho = os.path.join(modelos_sinteticos.BASE_DIR, "dataset_validacao.csv")
+    try:
+        df = pd.read_csv(caminho)
+        textos, rotulos = df["mensagem"].astype(str).tolist(), df["cidade"].astype(str).tolist()
+        print(f"📄 Validação: {len(textos)} mensagens de '{caminho}'.")
+        return textos[:quantidade], rotulos[:quantidade]
+    except (OSError, KeyError, pd.errors.ParserError, pd.errors.EmptyDataError):
+        print("⚠️ dataset_validacao.csv indisponível; usando mensagens sintéticas.")
+    rng = random.Random(11)
+    textos, rotulos = [], []
+    for m in modelos_sinteticos.gerar_mensagens(cidades, quantidade, seed=7):
+        texto = m["texto"]
+        if rng.random() < sem_cidade:
+            # Relato sem a cidade: só o evento e a intensidade
+            texto = texto.split(" em ")[0].split(" na ")[0]
+        textos.append(texto)
+        rotulos.append(m["cidade"])
+    return textos, rotulos
+
+
+def localizar(matcher, predictor, textos):
+    """Localização final (menção ou modelo) e a cidade resolvida pela menção em cada texto."""
+    cidades = [matcher.resolve(texto) for texto in textos]
+    pendentes = [i for i, cidade in enumerate(cidades) if cidade is None]
+    heads = ("categoria", "impacto")
+    if len(pendentes) < len(textos):
+        predictor.predict([t for t, c in zip(textos, cidades) if c is not None], heads=heads)
+    finais = [c["cidade"] if c else None for c in cidades]
+    if pendentes:
+        for i, pred in zip(pendentes, predictor.predict([textos[i] for i in pendentes])):
+            finais[i] = pred["localizacao"].label
+    return finais, cidades
+
+
+def cronometrar(funcao, textos, repeticoes):
+    unitario = []
+    for texto in textos[:repeticoes]:
+        inicio = time.perf_counter()
+        funcao([texto])
+        unitario.append(time.perf_counter() - inicio)
+    inicio = time.perf_counter()
+    resultado = funcao(textos)
+    return statistics.median(unitario) * 1000, (time.perf_counter() - inicio) * 1000, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cidades", type=int, default=1000, help="cidades dos pipelines sintéticos")
+    parser.add_argument("--textos", type=int, default=2000)
+    parser.add_argument("--sem-cidade", type=float, default=0.3, help="fração de textos sintéticos sem cidade")
+    parser.add_argument("--repeticoes", type=int, default=300)
+    parser.add_argument("--saida", help="grava o relatório em JSON")
+    args = parser.parse_args()
+
+    categoria, local, impacto, cidades = modelos_sinteticos.obter_modelos(num_cidades=args.cidades)
+    textos, rotulos = carregar_validacao(cidades, args.textos, args.sem_cidade)
+    predictor = FusedPredictor(SharedTfidfEngine({"categoria": categoria, "localizacao": local, "impacto": impacto}))
+
+    inicio = time.perf_counter()
+    matcher = LocationMatcher(Gazetteer(modelos_sinteticos.carregar_cidades()))
+    montagem_ms = (time.perf_counter() - inicio) * 1000
+
+    inicio = time.perf_counter()
+    for texto in textos:
+        matcher.match(texto)
+    extracao_us = (time.perf_counter() - inicio) * 1e6 / len(textos)
+
+    modelo_1, modelo_lote, previsto = cronometrar(predictor.predict, textos, args.repeticoes)
+    so_modelo = [p["localizacao"].label for p in previsto]
+    mencao_1, mencao_lote, (finais, resolvidas) = cronometrar(lambda t: localizar(matcher, predictor, t), textos, args.repeticoes)
+
+    com_mencao = [(c["cidade"], r) for c, r in zip(resolvidas, rotulos) if c is not None]
+    relatorio = {
+        "textos": len(textos),
+        "cobertura": len(com_mencao) / len(textos),
+        "precisao_mencao": float(np.mean([c == r for c, r in com_mencao])) if com_mencao else None,
+        "acuracia_modelo": float(np.mean([p == r for p, r in zip(so_modelo, rotulos)])),
+        "acuracia_mencao_mais_modelo": float(np.mean([p == r for p, r in zip(finais, rotulos)])),
+        "montagem_automato_ms": montagem_ms,
+        "extracao_por_texto_us": extracao_us,
+        "modelo": {"unitario_ms": modelo_1, "lote_ms": modelo_lote},
+        "mencao_mais_modelo": {"unitario_ms": mencao_1, "lote_ms": mencao_lote},
+    }
+
+    print(f"\n=== Localização: {len(local.steps[-1][1].classes_)} classes, {len(textos)} textos ===")
+    print(f"Autômato: {len(matcher.automaton)} padrões, montado em {montagem_ms:.0f} ms; "
+          f"{extracao_us:.1f} µs por texto")
+    print(f"Cobertura da menção:  {relatorio['cobertura']:.1%}  (precisão {relatorio['precisao_mencao'] or 0:.4f})")
+    print(f"Acurácia só modelo:   {relatorio['acuracia_modelo']:.4f}")
+    print(f"Acurácia menção+modelo: {relatorio['acuracia_mencao_mais_modelo']:.4f}")
+    print(f"{'caminho':<18} {'1 texto ms':>11} {'lote ms':>9}")
+    print(f"{'só modelo':<18} {modelo_1:11.3f} {modelo_lote:9.1f}")
+    print(f"{'menção + modelo':<18} {mencao_1:11.3f} {mencao_lote:9.1f}  "
+          f"(lote {modelo_lote / mencao_lote:.1f}x)")
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
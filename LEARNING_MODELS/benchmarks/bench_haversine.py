@@ -0,0 +1,62 @@
+"""
+Benchmark de precisão e velocidade: haversine vetorizado x geodesic do geopy.
+
+Sorteia pontos ao redor de cidades do gazetteer (até ~300 km de distância),
+valida todos com validate_geographic_proximity_batch nos dois métodos e
+reporta o erro do haversine em km, quantos veredictos mudam no limite de
+100 km e o tempo por validação.
+
+Uso:
+    python benchmarks/bench_haversine.py [--pontos 5000]
+"""
+import argparse
+import random
+import time
+import numpy as np
+from geopy.distance import geodesic
+import modelos_sinteticos  # noqa: F401  (ajusta o sys.path)
+import NEWapp
+from geoespacial import haversine_km
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pontos", type=int, default=5000)
+    parser.add_argument("--limite-km", type=float, default=100)
+    args = parser.parse_args()
+
+    cidades = modelos_sinteticos.carregar_cidades()
+    NEWapp.locations_data = cidades
+    rng = random.Random(1)
+    triplas = []
+    for _ in range(args.pontos):
+        cidade = rng.choice(cidades)
+        triplas.append((cidade["latitude"] + rng.uniform(-2, 2), cidade["longitude"] + rng.uniform(-2, 2), cidade["cidade"]))
+
+    inicio = time.perf_counter()
+    exatos = NEWapp.validate_geographic_proximity_batch(triplas, args.limite_km, method="geodesic")
+    t_geodesic = time.perf_counter() - inicio
+
+    NEWapp.get_city_index()
+    inicio = time.perf_counter()
+    rapidos = NEWapp.validate_geographic_proximity_batch(triplas, args.limite_km, method="haversine")
+    t_haversine = time.perf_counter() - inicio
+
+    index = NEWapp.get_city_index()
+    gazetteer = NEWapp.get_gazetteer()
+    posicoes = [index.position_of(gazetteer.find(c)) for _, _, c in triplas]
+    d_hav = haversine_km([t[0] for t in triplas], [t[1] for t in triplas], index.lats[posicoes], index.lons[posicoes])
+    d_geo = np.array([geodesic((lat, lon), (index.lats[p], index.lons[p])).km for (lat, lon, _), p in zip(triplas, posicoes)])
+    erro = np.abs(d_hav - d_geo)
+    divergentes = sum(1 for a, b in zip(exatos, rapidos) if a[0] != b[0])
+
+    print(f"\nPontos: {len(triplas)}  |  limite: {args.limite_km} km")
+    print(f"geodesic : {t_geodesic / len(triplas) * 1e6:10.2f} µs/validação")
+    print(f"haversine: {t_haversine / len(triplas) * 1e6:10.2f} µs/validação  ({t_geodesic / t_haversine:.0f}x mais rápido)")
+    print(f"erro absoluto (km): médio {erro.mean():.3f} | p99 {np.percentile(erro, 99):.3f} | máx {erro.max():.3f}")
+    print(f"erro relativo máx: {(erro / np.maximum(d_geo, 1e-9)).max() * 100:.3f}%")
+    print(f"veredictos divergentes no limite de {args.limite_km} km: {divergentes} ({divergentes / len(triplas) * 100:.2f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark de inicialização a frio da API.
+
+Cada medição sobe um processo Python novo que importa NEWapp e espera o fim
+do aquecimento, com modelos sintéticos gravados como .pkl comprimidos (como
+os do treinar_modelo.py). Cenários:
+
+    sem_mmap       STARTUP_MODE=eager, MODEL_MMAP=0 (carga completa dos .pkl)
+    mmap_frio      primeira subida com MODEL_MMAP=1 (grava a cópia não comprimida)
+    mmap           subidas seguintes, arrays abertos por memory-map
+    background     STARTUP_MODE=background: import (processo aceita conexões) x pronto
+
+Mostra a mediana do tempo até o fim do import, até o serviço ficar pronto e
+de cada etapa do /inicializacao. Com --saida grava o resultado em JSON; com
+--comparar mostra a diferença em relação a um resultado anterior.
+
+Uso:
+    python benchmarks/bench_inicializacao.py [--repeticoes 5] [--saida atual.json] [--comparar anterior.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import joblib
+import modelos_sinteticos
+
+SONDA = """
+import json, time
+inicio = time.perf_counter()
+import NEWapp
+importado = time.perf_counter() - inicio
+NEWapp.startup_warmup.wait()
+pronto = time.perf_counter() - inicio
+print("RESULTADO " + json.dumps({"importacao_ms": importado * 1000, "pronto_ms": pronto * 1000,
+                                 "etapas": NEWapp.startup_timer.report()["etapas"]}))
+"""
+
+
+def subir(diretorio, **env_extra):
+    env = dict(
+        os.environ,
+        MODEL_DIR=os.path.join(diretorio, "modelos"),
+        MODEL_CACHE_DIR=os.path.join(diretorio, "modelos", "model_cache"),
+        REAL_POSTS_FILE=os.path.join(diretorio, "real_posts.json"),
+        POSTS_DB_PATH=os.path.join(diretorio, "real_posts.db"),
+        POSTS_LOG_DIR=os.path.join(diretorio, "real_posts_log"),
+        **env_extra
+    )
+    saida = subprocess.run([sys.executable, "-c", SONDA], cwd=modelos_sinteticos.BASE_DIR, env=env,
+                           capture_output=True, text=True, check=True)
+    linha = next(l for l in saida.stdout.splitlines() if l.startswith("RESULTADO "))
+    return json.loads(linha[len("RESULTADO "):])
+
+
+def resumir(medicoes):
+    resumo = {
+        "importacao_ms": statistics.median(m["importacao_ms"] for m in medicoes),
+        "pronto_ms": statistics.median(m["pronto_ms"] for m in medicoes),
+        "etapas": {}
+    }
+    for nome in [e["nome"] for e in medicoes[0]["etapas"]]:
+        resumo["etapas"][nome] = statistics.median(
+            e["ms"] for m in medicoes for e in m["etapas"] if e["nome"] == nome
+        )
+    return resumo
+
+
+def medir(repeticoes):
+    diretorio = tempfile.mkdtemp(prefix="bench-inicializacao-")
+    try:
+        os.makedirs(os.path.join(diretorio, "modelos"))
+        categoria, localizacao, impacto, _ = modelos_sinteticos.obter_modelos()
+        for nome, modelo in (("modelo_evento_final", categoria), ("modelo_local_final", localizacao),
+                             ("modelo_impacto_final", impacto)):
+            joblib.dump(modelo, os.path.join(diretorio, "modelos", f"{nome}.pkl"), compress=3)
+        resultados = {}
+        resultados["sem_mmap"] = resumir([subir(diretorio, MODEL_MMAP="0") for _ in range(repeticoes)])
+        resultados["mmap_frio"] = resumir([subir(diretorio, MODEL_MMAP="1")])
+        resultados["mmap"] = resumir([subir(diretorio, MODEL_MMAP="1") for _ in range(repeticoes)])
+        resultados["background"] = resumir([subir(diretorio, MODEL_MMAP="1", STARTUP_MODE="background")
+                                            for _ in range(repeticoes)])
+        return resultados
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+
+def _delta(atual, anterior):
+    if anterior is None:
+        return ""
+    return f"  ({atual - anterior:+.1f} ms)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--saida", help="grava o resultado em JSON")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior")
+    args = parser.parse_args()
+
+    anterior = {}
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            anterior = json.load(f)
+    resultados = medir(args.repeticoes)
+    for cenario, r in resultados.items():
+        base = anterior.get(cenario, {})
+        print(f"\n=== {cenario} ===")
+        print(f"import: {r['importacao_ms']:8.1f} ms{_delta(r['importacao_ms'], base.get('importacao_ms'))}")
+        print(f"pronto: {r['pronto_ms']:8.1f} ms{_delta(r['pronto_ms'], base.get('pronto_ms'))}")
+        for nome, ms in r["etapas"].items():
+            print(f"  {nome:<22} {ms:8.1f} ms{_delta(ms, base.get('etapas', {}).get(nome))}")
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
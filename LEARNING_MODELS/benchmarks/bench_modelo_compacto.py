@@ -0,0 +1,114 @@
+"""
+Relatório do formato compacto de coeficientes (modelo_compacto.py).
+
+Para o modelo de localização (ou outro, com --modelo) compara o original em
+float64 com as versões float32 / int8, com e sem poda para CSR, medindo:
+
+    acurácia     no dataset_validacao.csv (coluna "mensagem" e o rótulo do modelo)
+    concordância com as predições do original
+    Δprob máx.   maior diferença de probabilidade em relação ao original
+    memória      bytes dos coeficientes (coef_ + intercept_ [+ escalas])
+    latência     FusedPredictor com um texto e com o lote inteiro
+
+Quando o CSV ou os .pkl não estão disponíveis (Git LFS), usa mensagens e
+pipelines sintéticos de modelos_sinteticos.py.
+
+Uso:
+    python benchmarks/bench_modelo_compacto.py [--modelo localizacao] [--cidades 1000] [--densidades 0.2 0.05]
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+import numpy as np
+import pandas as pd
+import modelos_sinteticos
+from inferencia import SharedTfidfEngine, FusedPredictor
+from modelo_compacto import compact_pipeline, coef_memory_bytes
+
+ROTULOS = {"localizacao": "cidade", "categoria": "categoria", "impacto": "impacto_nivel"}
+ROTULOS_SINTETICOS = {"localizacao": "cidade", "categoria": "categoria", "impacto": "impacto"}
+
+
+def carregar_validacao(modelo, cidades, quantidade):
+    caminho = os.path.join(modelos_sinteticos.BASE_DIR, "dataset_validacao.csv")
+    try:
+        df = pd.read_csv(caminho)
+        textos = df["mensagem"].astype(str).tolist()
+        rotulos = df[ROTULOS[modelo]].fillna("desconhecido").astype(str).tolist()
+        print(f"📄 Validação: {len(textos)} mensagens de '{caminho}'.")
+        return textos[:quantidade], rotulos[:quantidade]
+    except (OSError, KeyError, pd.errors.ParserError, pd.errors.EmptyDataError):
+        print("⚠️ dataset_validacao.csv indisponível; usando mensagens sintéticas.")
+        mensagens = modelos_sinteticos.gerar_mensagens(cidades, quantidade, seed=7)
+        return [m["texto"] for m in mensagens], [m[ROTULOS_SINTETICOS[modelo]] for m in mensagens]
+
+
+def latencia(predictor, textos, repeticoes):
+    unitario = []
+    for texto in textos[:repeticoes]:
+        inicio = time.perf_counter()
+        predictor.predict([texto])
+        unitario.append(time.perf_counter() - inicio)
+    inicio = time.perf_counter()
+    resultados = predictor.predict(textos)
+    return statistics.median(unitario) * 1000, (time.perf_counter() - inicio) * 1000, resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modelo", choices=list(ROTULOS), default="localizacao")
+    parser.add_argument("--cidades", type=int, default=1000, help="cidades dos pipelines sintéticos")
+    parser.add_argument("--densidades", type=float, nargs="*", default=[0.2, 0.05])
+    parser.add_argument("--textos", type=int, default=2000)
+    parser.add_argument("--repeticoes", type=int, default=200)
+    parser.add_argument("--saida", help="grava o relatório em JSON")
+    args = parser.parse_args()
+
+    categoria, local, impacto, cidades = modelos_sinteticos.obter_modelos(num_cidades=args.cidades)
+    original = {"localizacao": local, "categoria": categoria, "impacto": impacto}[args.modelo]
+    textos, rotulos = carregar_validacao(args.modelo, cidades, args.textos)
+
+    variantes = [("float64 (original)", original)]
+    for densidade in [None] + args.densidades:
+        for formato in ("float32", "int8"):
+            nome = formato if densidade is None else f"{formato} csr {densidade:g}"
+            variantes.append((nome, compact_pipeline(original, formato, densidade)))
+
+    relatorio = []
+    referencia = None
+    for nome, pipeline in variantes:
+        predictor = FusedPredictor(SharedTfidfEngine({args.modelo: pipeline}))
+        unitario_ms, lote_ms, resultados = latencia(predictor, textos, args.repeticoes)
+        preditos = [r[args.modelo].label for r in resultados]
+        probabilidades = np.array([r[args.modelo].probability or 0.0 for r in resultados])
+        if referencia is None:
+            referencia = (preditos, probabilidades)
+        linha = {
+            "formato": nome,
+            "acuracia": float(np.mean([p == r for p, r in zip(preditos, rotulos)])),
+            "concordancia": float(np.mean([p == r for p, r in zip(preditos, referencia[0])])),
+            "delta_prob_max": float(np.abs(probabilidades - referencia[1]).max()),
+            "memoria_mb": coef_memory_bytes(pipeline.steps[-1][1]) / 1e6,
+            "unitario_ms": unitario_ms,
+            "lote_ms": lote_ms
+        }
+        relatorio.append(linha)
+
+    base = relatorio[0]
+    n_classes = len(original.steps[-1][1].classes_)
+    print(f"\n=== {args.modelo}: {n_classes} classes, {len(textos)} textos de validação ===")
+    print(f"{'formato':<20} {'acurácia':>9} {'Δacur.':>7} {'concord.':>9} {'Δprob máx':>10} "
+          f"{'memória MB':>11} {'economia':>9} {'1 texto ms':>11} {'lote ms':>9}")
+    for linha in relatorio:
+        print(f"{linha['formato']:<20} {linha['acuracia']:9.4f} {linha['acuracia'] - base['acuracia']:+7.4f} "
+              f"{linha['concordancia']:9.4f} {linha['delta_prob_max']:10.5f} {linha['memoria_mb']:11.2f} "
+              f"{1 - linha['memoria_mb'] / base['memoria_mb']:9.1%} {linha['unitario_ms']:11.3f} {linha['lote_ms']:9.1f}")
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark de /predict versus /predict_lote.
+
+Mede a latência por item chamando /predict uma vez por publicação e
+/predict_lote com lotes de 1, 32 e 512 publicações.
+
+Uso:
+    python benchmarks/bench_predict_lote.py [--repeticoes 3]
+"""
+import argparse
+import time
+from modelos_sinteticos import obter_modelos, gerar_mensagens
+
+TAMANHOS_LOTE = [1, 32, 512]
+
+
+def _payload(mensagem):
+    return {
+        "titulo": "",
+        "conteudo": mensagem["texto"],
+        "lat": mensagem["lat"],
+        "lon": mensagem["lon"],
+        "areaDemarcada": 120,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    import NEWapp
+    categoria, local, impacto, cidades = obter_modelos()
+    NEWapp.modelo_categoria, NEWapp.modelo_localizacao, NEWapp.modelo_impacto = categoria, local, impacto
+    client = NEWapp.app.test_client()
+
+    print(f"\n{'lote':>6} | {'/predict (ms/item)':>20} | {'/predict_lote (ms/item)':>24} | {'ganho':>6}")
+    for tamanho in TAMANHOS_LOTE:
+        payloads = [_payload(m) for m in gerar_mensagens(cidades, tamanho, seed=tamanho)]
+        individual = float('inf')
+        lote = float('inf')
+        for _ in range(args.repeticoes):
+            inicio = time.perf_counter()
+            for payload in payloads:
+                client.post('/predict', json=payload)
+            individual = min(individual, (time.perf_counter() - inicio) / tamanho)
+
+            inicio = time.perf_counter()
+            response = client.post('/predict_lote', json={"publicacoes": payloads})
+            lote = min(lote, (time.perf_counter() - inicio) / tamanho)
+            assert response.status_code == 200, response.json
+        print(f"{tamanho:>6} | {individual * 1000:>20.3f} | {lote * 1000:>24.3f} | {individual / lote:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
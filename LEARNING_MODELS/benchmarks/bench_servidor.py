@@ -0,0 +1,215 @@
+"""
+Benchmark de vazão do servidor de produção (gunicorn + wsgi.py) por número de workers.
+
+Para cada valor de --workers sobe `gunicorn -c gunicorn.conf.py wsgi:application`
+com modelos sintéticos gravados como .pkl (ou os reais, se disponíveis), espera
+o /pronto e dispara --requisicoes POST /predict com --concorrencia conexões
+keep-alive. Mostra:
+
+    req/s        vazão total
+    p50/p95 ms   latência das requisições
+    RSS / PSS    memória somada dos workers; PSS divide as páginas compartilhadas
+                 entre os processos, então PSS << RSS indica que os modelos
+                 carregados no mestre (preload_app) estão sendo compartilhados
+
+Com --sem-preload os workers carregam os modelos cada um por conta própria,
+para comparar a memória. Faz sentido em uma máquina com vários núcleos; com
+--saida grava o resultado em JSON.
+
+Uso:
+    python benchmarks/bench_servidor.py [--workers 1 2 4 8] [--threads 4] [--requisicoes 2000] [--concorrencia 32]
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import joblib
+import modelos_sinteticos
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def preparar_diretorio(num_cidades):
+    """Diretório temporário com os três modelos em .pkl e os arquivos de dados da API."""
+    diretorio = tempfile.mkdtemp(prefix="bench-servidor-")
+    os.makedirs(os.path.join(diretorio, "modelos"))
+    categoria, localizacao, impacto, cidades = modelos_sinteticos.obter_modelos(num_cidades=num_cidades)
+    for nome, modelo in (("modelo_evento_final", categoria), ("modelo_local_final", localizacao),
+                         ("modelo_impacto_final", impacto)):
+        joblib.dump(modelo, os.path.join(diretorio, "modelos", f"{nome}.pkl"), compress=3)
+    return diretorio, cidades
+
+
+def ambiente(diretorio, porta, **env_extra):
+    return dict(
+        os.environ,
+        PORT=str(porta),
+        MODEL_DIR=os.path.join(diretorio, "modelos"),
+        MODEL_CACHE_DIR=os.path.join(diretorio, "modelos", "model_cache"),
+        REAL_POSTS_FILE=os.path.join(diretorio, "real_posts.json"),
+        POSTS_DB_PATH=os.path.join(diretorio, "real_posts.db"),
+        POSTS_LOG_DIR=os.path.join(diretorio, "real_posts_log"),
+        MODEL_WATCH_INTERVAL_S="0",
+        # Sem cache de predições: cada requisição passa pelos modelos
+        PREDICTION_CACHE_SIZE="0",
+        **env_extra
+    )
+
+
+def subir_servidor(comando, env, porta, timeout=300):
+    processo = subprocess.Popen(comando, cwd=modelos_sinteticos.BASE_DIR, env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError(f"servidor terminou com código {processo.returncode}: {' '.join(comando)}")
+        try:
+            conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=2)
+            conexao.request("GET", "/pronto")
+            if conexao.getresponse().status == 200:
+                return processo
+        except OSError:
+            pass
+        time.sleep(0.2)
+    parar_servidor(processo)
+    raise TimeoutError("servidor não ficou pronto a tempo")
+
+
+def parar_servidor(processo):
+    try:
+        os.killpg(processo.pid, signal.SIGTERM)
+        processo.wait(30)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(processo.pid, signal.SIGKILL)
+
+
+def memoria(pid_mestre):
+    """(RSS, PSS) somados dos filhos do mestre, em MB (Linux; None se indisponível)."""
+    try:
+        with open(f"/proc/{pid_mestre}/task/{pid_mestre}/children") as f:
+            filhos = [int(p) for p in f.read().split()]
+        rss = pss = 0
+        for pid in filhos:
+            with open(f"/proc/{pid}/smaps_rollup") as f:
+                for linha in f:
+                    campo, valor = linha.split()[:2]
+                    if campo == "Rss:":
+                        rss += int(valor)
+                    elif campo == "Pss:":
+                        pss += int(valor)
+        return rss / 1024, pss / 1024
+    except (OSError, ValueError):
+        return None, None
+
+
+def disparar(porta, metodo, rota, corpos, concorrencia, timeout=60):
+    """Envia cada corpo (JSON) com `concorrencia` conexões keep-alive; devolve
+    (latências em segundos, erros, duração total)."""
+    local = threading.local()
+    erros = []
+
+    def enviar(corpo):
+        conexao = getattr(local, "conexao", None)
+        if conexao is None:
+            conexao = local.conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=timeout)
+        dados = json.dumps(corpo).encode("utf-8") if corpo is not None else None
+        inicio = time.perf_counter()
+        try:
+            conexao.request(metodo, rota, body=dados, headers={"Content-Type": "application/json"})
+            resposta = conexao.getresponse()
+            resposta.read()
+            if resposta.status >= 500:
+                erros.append(resposta.status)
+        except (OSError, http.client.HTTPException) as e:
+            local.conexao = None
+            erros.append(type(e).__name__)
+        return time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        latencias = list(executor.map(enviar, corpos))
+    return latencias, erros, time.perf_counter() - inicio
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def corpos_predict(cidades, quantidade):
+    mensagens = modelos_sinteticos.gerar_mensagens(cidades, quantidade, seed=5)
+    return [{"titulo": "", "conteudo": m["texto"], "lat": m["lat"], "lon": m["lon"]} for m in mensagens]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--requisicoes", type=int, default=2000)
+    parser.add_argument("--concorrencia", type=int, default=32)
+    parser.add_argument("--cidades", type=int, default=1000, help="cidades dos modelos sintéticos")
+    parser.add_argument("--sem-preload", action="store_true", help="cada worker carrega os próprios modelos")
+    parser.add_argument("--saida", help="grava o resultado em JSON")
+    args = parser.parse_args()
+
+    if shutil.which("gunicorn") is None:
+        sys.exit("❌ gunicorn não encontrado (pip install gunicorn).")
+    diretorio, cidades = preparar_diretorio(args.cidades)
+    corpos = corpos_predict(cidades, args.requisicoes)
+    comando = ["gunicorn", "-c", "gunicorn.conf.py", "wsgi:application"]
+    resultados = []
+    try:
+        for workers in args.workers:
+            porta = porta_livre()
+            env = ambiente(diretorio, porta, WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(args.threads),
+                           GUNICORN_PRELOAD="0" if args.sem_preload else "1")
+            processo = subir_servidor(comando, env, porta)
+            try:
+                disparar(porta, "POST", "/predict", corpos[:200], args.concorrencia)
+                latencias, erros, duracao = disparar(porta, "POST", "/predict", corpos, args.concorrencia)
+                rss, pss = memoria(processo.pid)
+            finally:
+                parar_servidor(processo)
+            resultados.append({
+                "workers": workers,
+                "threads": args.threads,
+                "req_s": len(corpos) / duracao,
+                "p50_ms": percentil(latencias, 50) * 1000,
+                "p95_ms": percentil(latencias, 95) * 1000,
+                "media_ms": statistics.mean(latencias) * 1000,
+                "erros": len(erros),
+                "rss_mb": rss,
+                "pss_mb": pss,
+            })
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+    print(f"\n=== POST /predict: {len(corpos)} requisições, concorrência {args.concorrencia}, "
+          f"{args.threads} threads/worker, {os.cpu_count()} CPUs{', sem preload' if args.sem_preload else ''} ===")
+    print(f"{'workers':>7} {'req/s':>8} {'escala':>7} {'p50 ms':>8} {'p95 ms':>8} {'erros':>6} {'RSS MB':>8} {'PSS MB':>8}")
+    base = resultados[0]["req_s"]
+    for r in resultados:
+        memoria_txt = f"{r['rss_mb']:8.0f} {r['pss_mb']:8.0f}" if r["rss_mb"] is not None else f"{'-':>8} {'-':>8}"
+        print(f"{r['workers']:>7} {r['req_s']:8.1f} {r['req_s'] / base:6.2f}x {r['p50_ms']:8.1f} "
+              f"{r['p95_ms']:8.1f} {r['erros']:>6} {memoria_txt}")
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark do motor TF-IDF compartilhado (inferencia.SharedTfidfEngine).
+
+Compara três chamadas pipeline.predict separadas (categoria, localização e
+impacto) com o motor que analisa cada texto uma única vez, verificando que as
+predições são idênticas.
+
+Uso:
+    python benchmarks/bench_tfidf_compartilhado.py [--textos 2000]
+"""
+import argparse
+import time
+from modelos_sinteticos import obter_modelos, gerar_mensagens
+from inferencia import SharedTfidfEngine
+
+
+def _tempo(func, repeticoes):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = func()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--textos", type=int, default=2000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    categoria, local, impacto, cidades = obter_modelos()
+    pipelines = {"categoria": categoria, "localizacao": local, "impacto": impacto}
+    engine = SharedTfidfEngine(pipelines)
+    textos = [m["texto"] for m in gerar_mensagens(cidades, args.textos)]
+
+    print(f"\n{'modo':>10} | {'separado (ms)':>14} | {'compartilhado (ms)':>19} | {'ganho':>6}")
+    for modo, tamanho in (("unitário", 1), ("lote", len(textos))):
+        def separado():
+            if tamanho == 1:
+                return [{n: p.predict([t]) for n, p in pipelines.items()} for t in textos[:200]]
+            return {n: p.predict(textos) for n, p in pipelines.items()}
+
+        def compartilhado():
+            if tamanho == 1:
+                return [engine.predict([t]) for t in textos[:200]]
+            return engine.predict(textos)
+
+        t_sep, r_sep = _tempo(separado, args.repeticoes)
+        t_comp, r_comp = _tempo(compartilhado, args.repeticoes)
+        pares = zip(r_sep, r_comp) if tamanho == 1 else [(r_sep, r_comp)]
+        for a, b in pares:
+            assert all(list(a[n]) == list(b[n]) for n in pipelines), "predições divergentes"
+        print(f"{modo:>10} | {t_sep * 1000:>14.1f} | {t_comp * 1000:>19.1f} | {t_sep / t_comp:>5.2f}x")
+    print("✅ Predições idênticas às dos pipelines separados.")
+
+
+if __name__ == "__main__":
+    main()
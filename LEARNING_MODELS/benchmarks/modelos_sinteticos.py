@@ -0,0 +1,110 @@
+"""
+Modelos usados pelos benchmarks.
+
+Os arquivos .pkl do repositório ficam no Git LFS; quando eles não estão
+disponíveis, treinamos pipelines sintéticos com a mesma configuração de
+treinar_modelo.py (TF-IDF com bigramas + SGDClassifier log_loss) para que
+os benchmarks continuem representativos.
+"""
+import os
+import sys
+import random
+import joblib
+from sklearn.pipeline import Pipeline
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import SGDClassifier
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+MAX_FEATURES_EVENT_IMPACT = 10000
+MAX_FEATURES_LOCATION = 20000
+
+CATEGORIAS = {
+    "desastre_hidrico": ["enchente forte", "alagamento severo", "rio transborda", "chuva torrencial"],
+    "queimada": ["fogo em vegetação", "mata em chamas", "fumaça densa", "incêndio de mata"],
+    "seca": ["estiagem prolongada", "falta de chuva", "reservatório vazio", "solo seco"],
+    "deslizamento": ["queda de terra", "encosta caindo", "morro caindo", "lama escorrendo"],
+    "tempestade": ["temporal forte", "ventos fortes", "chuva de granizo forte", "raios e trovões"],
+}
+IMPACTOS = {
+    "baixo": ["pequeno", "leve", "localizado", "controlado"],
+    "moderado": ["moderado", "considerável", "significativo", "parcial"],
+    "alto": ["grande", "severo", "extremo", "devastador"],
+}
+TEMPLATES = [
+    "{filler} {sinonimo} {intensidade} em {cidade}, {estado}",
+    "{sinonimo} de impacto {intensidade} na cidade de {cidade}/{estado}",
+    "{filler} Registro de {sinonimo} {intensidade} localizado em {cidade}, {estado}",
+    "{sinonimo} {intensidade} na região de {cidade}, {estado} (Lat: {lat}, Lon: {lon})",
+]
+FILLERS = ["Atenção!", "Urgente!", "Defesa Civil informa:", "Comunicado oficial:", ""]
+
+
+def carregar_cidades(limite=None):
+    from NEWapp import load_brazilian_cities_from_json
+    cidades = load_brazilian_cities_from_json(os.path.join(BASE_DIR, "brazil_states_cities_geocoded.json"))
+    cidades = [c for c in cidades if c["latitude"] is not None]
+    return cidades[:limite] if limite else cidades
+
+
+def gerar_mensagens(cidades, quantidade, seed=42):
+    rng = random.Random(seed)
+    mensagens = []
+    for _ in range(quantidade):
+        cidade = rng.choice(cidades)
+        categoria = rng.choice(list(CATEGORIAS))
+        impacto = rng.choice(list(IMPACTOS))
+        texto = rng.choice(TEMPLATES).format(
+            filler=rng.choice(FILLERS),
+            sinonimo=rng.choice(CATEGORIAS[categoria]),
+            intensidade=rng.choice(IMPACTOS[impacto]),
+            cidade=cidade["cidade"],
+            estado=cidade["estado"],
+            lat=f"{cidade['latitude']:.4f}",
+            lon=f"{cidade['longitude']:.4f}",
+        ).strip()
+        mensagens.append({
+            "texto": texto,
+            "categoria": categoria,
+            "impacto": impacto,
+            "cidade": cidade["cidade"],
+            "estado": cidade["estado"],
+            "lat": cidade["latitude"],
+            "lon": cidade["longitude"],
+        })
+    return mensagens
+
+
+def _pipeline(max_features):
+    return Pipeline([
+        ("tfidf", TfidfVectorizer(max_features=max_features, ngram_range=(1, 2))),
+        ("clf", SGDClassifier(loss='log_loss', max_iter=1000, random_state=42))
+    ])
+
+
+def _carregar_pkl(nome):
+    caminho = os.path.join(BASE_DIR, f"{nome}.pkl")
+    try:
+        return joblib.load(caminho)
+    except Exception:
+        return None
+
+
+def obter_modelos(num_cidades=500, amostras_por_cidade=4, usar_pkl=True):
+    """Devolve (categoria, localizacao, impacto, cidades)."""
+    cidades = carregar_cidades()
+    if usar_pkl:
+        modelos = [_carregar_pkl(n) for n in ("modelo_evento_final", "modelo_local_final", "modelo_impacto_final")]
+        if all(modelos):
+            print("🔁 Usando os modelos .pkl reais.")
+            return modelos[0], modelos[1], modelos[2], cidades
+    print(f"⚠️ Modelos .pkl indisponíveis; treinando pipelines sintéticos ({num_cidades} cidades).")
+    subconjunto = cidades[:num_cidades]
+    mensagens = gerar_mensagens(subconjunto, num_cidades * amostras_por_cidade)
+    textos = [m["texto"] for m in mensagens]
+    categoria = _pipeline(MAX_FEATURES_EVENT_IMPACT).fit(textos, [m["categoria"] for m in mensagens])
+    impacto = _pipeline(MAX_FEATURES_EVENT_IMPACT).fit(textos, [m["impacto"] for m in mensagens])
+    local = _pipeline(MAX_FEATURES_LOCATION).fit(textos, [m["cidade"] for m in mensagens])
+    return categoria, local, impacto, subconjunto
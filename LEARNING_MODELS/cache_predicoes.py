@@ -0,0 +1,141 @@
+"""
+Cache LRU de predições completas, indexado pelo hash do texto.
+
+Reposts e respostas com citação repetem o mesmo texto muitas vezes; o
+resultado dos modelos para um texto só muda quando os artefatos carregados
+mudam. Por isso a chave é o SHA-256 do texto e todo o cache pertence a uma
+"versão de modelo": quando a versão muda, o conteúdo anterior é descartado.
+Opcionalmente, entradas expulsas da memória são gravadas em disco e
+recuperadas em um acesso posterior.
+"""
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class PredictionCache:
+    def __init__(self, maxsize=10000, spill_dir=None):
+        self.maxsize = maxsize
+        self.spill_dir = spill_dir
+        self.model_version = None
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    # --- Versão dos modelos ---
+    def set_model_version(self, version):
+        """Associa o cache a uma versão de modelo; trocar a versão invalida tudo."""
+        with self._lock:
+            if version == self.model_version:
+                return False
+            had_version = self.model_version is not None
+            self.model_version = version
+            self._data.clear()
+            if had_version:
+                self.invalidations += 1
+        if self.spill_dir:
+            self._clear_spill(keep=version)
+        return True
+
+    # --- Disco ---
+    def _version_dir(self):
+        return os.path.join(self.spill_dir, str(self.model_version))
+
+    def _spill_path(self, key):
+        return os.path.join(self._version_dir(), key[:2], f"{key}.pkl")
+
+    def _clear_spill(self, keep=None):
+        if not os.path.isdir(self.spill_dir):
+            return
+        for name in os.listdir(self.spill_dir):
+            if name != str(keep):
+                shutil.rmtree(os.path.join(self.spill_dir, name), ignore_errors=True)
+
+    def _write_spill(self, entries):
+        for key, value in entries:
+            path = self._spill_path(key)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"⚠️ Não foi possível gravar predição em cache no disco: {e}")
+
+    def _read_spill(self, key):
+        try:
+            with open(self._spill_path(key), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    # --- Acesso ---
+    def get(self, key, version=None):
+        # `version`: quem usa modelos de uma versão já substituída não lê (nem grava) o cache da nova
+        with self._lock:
+            if version is not None and version != self.model_version:
+                return None
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+        value = self._read_spill(key) if self.spill_dir else None
+        if value is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.disk_hits += 1
+        self.put(key, value, version)
+        return value
+
+    def put(self, key, value, version=None):
+        evicted = []
+        with self._lock:
+            if version is not None and version != self.model_version:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                evicted.append(self._data.popitem(last=False))
+                self.evictions += 1
+        if evicted and self.spill_dir:
+            self._write_spill(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+        if self.spill_dir:
+            self._clear_spill()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "tamanho": len(self._data),
+                "capacidade": self.maxsize,
+                "hits": self.hits,
+                "hits_disco": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidacoes": self.invalidations,
+                "taxa_acerto": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "versao_modelo": self.model_version,
+                "disco": self.spill_dir
+            }
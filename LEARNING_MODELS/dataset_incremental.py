@@ -0,0 +1,187 @@
+"""
+Estado persistido da geração incremental do dataset de publicações reais.
+
+Ao lado do CSV ficam dois arquivos:
+
+    <csv>.hashes       um SHA-256 (titulo + conteudo) por linha já gravada no CSV
+    <csv>.estado.json  marca d'água (maior seq de publicação já examinado),
+                       publicações adiadas, versão do modelo, origem das
+                       publicações e a "impressão digital" (tamanho, mtime) do CSV
+    <csv>.lock         trava exclusiva entre processos (fcntl.flock) durante
+                       uma execução: com vários workers, duas gerações
+                       simultâneas anexariam as mesmas linhas ao CSV
+
+Cada execução examina só as publicações com seq acima da marca d'água (mais
+as adiadas) e anexa as linhas novas ao CSV em vez de reescrevê-lo. Se o CSV
+foi alterado por fora (a impressão digital não bate), o índice é refeito a
+partir do próprio CSV; se a versão do modelo ou a origem das publicações
+mudou, a marca d'água volta a zero, já que as rejeições anteriores dependiam
+delas. O resultado é o mesmo da reconstrução completa feita antes.
+"""
+import csv
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+
+
+@contextmanager
+def exclusive_lock(path):
+    """Trava exclusiva entre processos em `path`; espera quem estiver com ela."""
+    import fcntl
+    with open(path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def row_hash(titulo, conteudo):
+    return hashlib.sha256(f"{titulo}{conteudo}".encode('utf-8')).hexdigest()
+
+
+class DatasetState:
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.state_path = f"{csv_path}.estado.json"
+        self.hashes_path = f"{csv_path}.hashes"
+        self.lock_path = f"{csv_path}.lock"
+        self.processed = set()
+        self.columns = None
+        self.watermark = 0
+        self.deferred = {}
+        self.model_version = None
+        self.source = None
+        self.rebuilds = 0
+        self._fingerprint = None
+        self._state_stamp = None
+
+    def _csv_fingerprint(self):
+        try:
+            stat = os.stat(self.csv_path)
+        except OSError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _state_file_stamp(self):
+        try:
+            return os.stat(self.state_path).st_mtime_ns
+        except OSError:
+            return None
+
+    # --- Carga ---
+    def load(self):
+        """Sincroniza com o disco; só relê o CSV inteiro se ele mudou por fora."""
+        fingerprint = self._csv_fingerprint()
+        # O estado também é comparado: outro processo pode ter avançado só a marca d'água
+        if (self._fingerprint is not None and fingerprint == self._fingerprint
+                and self._state_file_stamp() == self._state_stamp):
+            return
+        state = None
+        if os.path.exists(self.state_path) and os.path.exists(self.hashes_path):
+            try:
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                state = None
+        if state is not None and state.get("csv") == fingerprint:
+            with open(self.hashes_path, 'r', encoding='utf-8') as f:
+                self.processed = {line.strip() for line in f if line.strip()}
+            self.columns = state.get("colunas")
+            self.watermark = state.get("marca_dagua", 0)
+            self.deferred = state.get("adiadas", {})
+            self.model_version = state.get("versao_modelo")
+            self.source = state.get("origem")
+            self._fingerprint = fingerprint
+            self._state_stamp = self._state_file_stamp()
+        else:
+            self._rebuild(fingerprint)
+
+    def _rebuild(self, fingerprint):
+        print(f"🔄 Reconstruindo índice de hashes a partir de '{self.csv_path}'...")
+        self.processed = set()
+        self.columns = None
+        if fingerprint is not None:
+            with open(self.csv_path, 'r', encoding='utf-8', newline='') as f:
+                reader = csv.reader(f)
+                self.columns = next(reader, None)
+                if self.columns and "titulo" in self.columns and "conteudo" in self.columns:
+                    i_titulo = self.columns.index("titulo")
+                    i_conteudo = self.columns.index("conteudo")
+                    for row in reader:
+                        if len(row) > max(i_titulo, i_conteudo):
+                            self.processed.add(row_hash(row[i_titulo], row[i_conteudo]))
+        self.watermark = 0
+        self.deferred = {}
+        self.model_version = None
+        self.source = None
+        self.rebuilds += 1
+        self._fingerprint = fingerprint
+        with open(self.hashes_path, 'w', encoding='utf-8') as f:
+            f.writelines(h + "\n" for h in self.processed)
+        self.save()
+
+    # --- Execução ---
+    def start_run(self, model_version, source):
+        """Zera a marca d'água se o modelo ou a origem das publicações mudou desde a última execução."""
+        if (model_version, source) != (self.model_version, self.source):
+            self.watermark = 0
+            self.deferred = {}
+            self.model_version = model_version
+            self.source = source
+
+    def append_rows(self, rows, columns):
+        """Anexa as linhas novas ao CSV (e seus hashes ao índice)."""
+        if not rows:
+            return
+        new_file = self._fingerprint is None or not self.columns
+        import pandas as pd
+        if not new_file and list(self.columns) != list(columns):
+            # Cabeçalho diferente: uma última reescrita completa, como era feito antes
+            df_existing = pd.read_csv(self.csv_path)
+            df_combined = pd.concat([df_existing, pd.DataFrame(rows, columns=columns)], ignore_index=True)
+            df_combined = df_combined.drop_duplicates(subset=['titulo', 'conteudo']).reset_index(drop=True)
+            df_combined.to_csv(self.csv_path, index=False, encoding='utf-8')
+            self.columns = list(df_combined.columns)
+        else:
+            pd.DataFrame(rows, columns=columns).to_csv(
+                self.csv_path, mode='a', header=new_file, index=False, encoding='utf-8'
+            )
+            if new_file:
+                self.columns = list(columns)
+        hashes = [row_hash(row["titulo"], row["conteudo"]) for row in rows]
+        with open(self.hashes_path, 'a', encoding='utf-8') as f:
+            f.writelines(h + "\n" for h in hashes)
+        self.processed.update(hashes)
+        self._fingerprint = self._csv_fingerprint()
+
+    def finish_run(self, watermark, deferred):
+        self.watermark = watermark
+        self.deferred = deferred
+        self.save()
+
+    def save(self):
+        state = {
+            "csv": self._fingerprint,
+            "colunas": self.columns,
+            "marca_dagua": self.watermark,
+            "adiadas": self.deferred,
+            "versao_modelo": self.model_version,
+            "origem": self.source,
+            "linhas": len(self.processed)
+        }
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+        self._state_stamp = self._state_file_stamp()
+
+    def stats(self):
+        return {
+            "linhas": len(self.processed),
+            "marca_dagua": self.watermark,
+            "adiadas": len(self.deferred),
+            "versao_modelo": self.model_version,
+            "reconstrucoes": self.rebuilds
+        }
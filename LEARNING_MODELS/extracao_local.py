@@ -0,0 +1,171 @@
+"""
+Extração de menções explícitas de cidade e estado no texto das publicações.
+
+Boa parte dos relatos já diz onde aconteceu ("Enchente em Petrópolis/RJ",
+"Queimada em Belo Horizonte, Minas Gerais"). LocationMatcher procura todos
+os nomes de cidades e estados do gazetteer, as siglas dos estados e alguns
+apelidos (Sampa, BH, Floripa...) com um único autômato de Aho-Corasick e,
+quando a menção aponta para uma única cidade, a localização sai daí; o
+modelo de localização (~5.570 classes) só é usado quando o texto não cita
+cidade nenhuma ou a menção é ambígua.
+
+Regras da resolução:
+- texto e nomes são comparados sem acentos e sem maiúsculas; pontuação vira
+  espaço ("Embu-Guaçu" casa com "Embu Guaçu");
+- nomes só valem com inicial maiúscula (em textos todo em minúsculas, os de
+  mais de uma palavra valem assim mesmo); os de uma palavra exigem também a
+  grafia acentuada correta ("Natal", "Pará"), para não confundir com
+  palavras comuns ("natal", "para"); siglas de estado só valem em maiúsculas;
+- nome de uma palavra no começo da frase ("Registro de queimada...") é fraco:
+  só conta se não houver outra cidade citada e o estado citado o confirmar;
+- uma menção contida em outra maior é descartada ("Alegre" em "Porto Alegre");
+- cidades homônimas ("Bom Jesus") são resolvidas pelo estado citado no texto,
+  que também desempata menções de cidades diferentes;
+- nome de estado só conta como cidade quando não há outra cidade citada e é
+  a capital homônima ("São Paulo", "Rio de Janeiro") ou aparece repetido
+  ("Goiás, Goiás").
+"""
+import unicodedata
+from collections import namedtuple
+from automato import AhoCorasick
+
+SIGLAS_ESTADOS = {
+    "AC": "Acre", "AL": "Alagoas", "AP": "Amapá", "AM": "Amazonas", "BA": "Bahia",
+    "CE": "Ceará", "DF": "Distrito Federal", "ES": "Espírito Santo", "GO": "Goiás",
+    "MA": "Maranhão", "MT": "Mato Grosso", "MS": "Mato Grosso do Sul", "MG": "Minas Gerais",
+    "PA": "Pará", "PB": "Paraíba", "PR": "Paraná", "PE": "Pernambuco", "PI": "Piauí",
+    "RJ": "Rio de Janeiro", "RN": "Rio Grande do Norte", "RS": "Rio Grande do Sul",
+    "RO": "Rondônia", "RR": "Roraima", "SC": "Santa Catarina", "SP": "São Paulo",
+    "SE": "Sergipe", "TO": "Tocantins"
+}
+
+# Apelidos usados nas redes: apelido -> (cidade, estado)
+APELIDOS_CIDADES = {
+    "Sampa": ("São Paulo", "São Paulo"),
+    "BH": ("Belo Horizonte", "Minas Gerais"),
+    "Beagá": ("Belo Horizonte", "Minas Gerais"),
+    "Floripa": ("Florianópolis", "Santa Catarina"),
+    "POA": ("Porto Alegre", "Rio Grande do Sul"),
+    "BSB": ("Brasília", "Distrito Federal"),
+    "Sanca": ("São Carlos", "São Paulo"),
+    "Sampa City": ("São Paulo", "São Paulo"),
+}
+
+# Capitais com o mesmo nome do estado: uma menção sozinha quase sempre é a cidade
+CAPITAIS_HOMONIMAS = {"sao paulo", "rio de janeiro"}
+
+# Resultado da extração: a cidade resolvida (ou None), se havia candidatas demais
+# e as menções encontradas, para diagnóstico e benchmarks
+LocationMatch = namedtuple("LocationMatch", ["location", "ambiguous", "cities", "states"])
+
+
+class _FoldTable(dict):
+    """Tabela para str.translate: cada caractere vira um único caractere ASCII
+    minúsculo (ou espaço), mantendo as posições alinhadas com o texto original."""
+
+    def __missing__(self, code):
+        ch = chr(code)
+        if ch.isalnum():
+            ascii_chars = [c for c in unicodedata.normalize("NFKD", ch) if c.isascii() and c.isalnum()]
+            folded = ascii_chars[0].lower() if ascii_chars else " "
+        else:
+            folded = " "
+        self[code] = folded
+        return folded
+
+
+_FOLD = _FoldTable()
+
+
+def fold(text):
+    return unicodedata.normalize("NFC", text).translate(_FOLD)
+
+
+def _sentence_start(text, position):
+    before = text[:position].rstrip()
+    return not before or before[-1] in ".!?:;\n"
+
+
+class LocationMatcher:
+    def __init__(self, gazetteer):
+        self.gazetteer = gazetteer
+        self.states = sorted({loc["estado"] for loc in gazetteer.locations})
+        self.automaton = AhoCorasick()
+        # Cidades agrupadas pelo nome já dobrado (homônimas de estados diferentes juntas)
+        self.cities = {}
+        for loc in gazetteer.locations:
+            self.cities.setdefault(fold(loc["cidade"]).strip(), []).append(loc)
+        for key, locs in self.cities.items():
+            self.automaton.add(key, ("cidade", key, frozenset(loc["cidade"].lower() for loc in locs)))
+        for state in self.states:
+            self.automaton.add(fold(state).strip(), ("estado", state, frozenset([state.lower()])))
+        for sigla, state in SIGLAS_ESTADOS.items():
+            if state in self.states:
+                self.automaton.add(sigla.lower(), ("sigla", state, frozenset([sigla])))
+        for apelido, (cidade, estado) in APELIDOS_CIDADES.items():
+            loc = gazetteer.find(cidade, estado)
+            if loc is not None:
+                self.automaton.add(fold(apelido), ("apelido", loc, frozenset()))
+        self.automaton.build()
+
+    def _mentions(self, text):
+        """Menções válidas em `text`: lista de (início, fim, tipo, alvo)."""
+        text = unicodedata.normalize("NFC", text)
+        folded = text.translate(_FOLD)
+        lowercase_text = text == text.lower()
+        found = []
+        for start, end, (kind, target, spellings) in self.automaton.iter_matches(folded, whole_words=True):
+            original = text[start:end]
+            if kind == "sigla":
+                if original not in spellings or text.isupper():
+                    continue
+            elif kind != "apelido":
+                single_word = " " not in folded[start:end]
+                if not original[0].isupper() and (single_word or not lowercase_text):
+                    continue
+                if single_word:
+                    if original.lower() not in spellings:
+                        continue
+                    if kind == "cidade" and _sentence_start(text, start):
+                        kind = "cidade_fraca"
+            found.append((start, end, kind, target))
+        # Descarta menções contidas em outra maior ("Alegre" dentro de "Porto Alegre")
+        spans = {(start, end) for start, end, _, _ in found}
+        return [
+            m for m in found
+            if not any(s <= m[0] and m[1] <= e and (s, e) != (m[0], m[1]) for s, e in spans)
+        ]
+
+    def match(self, text):
+        """Resolve a cidade citada em `text`; LocationMatch.location é None se não houver
+        menção ou se ela não apontar para uma única cidade."""
+        if not text:
+            return LocationMatch(None, False, [], [])
+        mentions = self._mentions(text)
+        states = {target for _, _, kind, target in mentions if kind in ("estado", "sigla")}
+        state_spans = {(start, end) for start, end, kind, _ in mentions if kind == "estado"}
+        cities = [target for start, end, kind, target in mentions if kind == "cidade" and (start, end) not in state_spans]
+        aliases = [target for _, _, kind, target in mentions if kind == "apelido"]
+        if not cities and not aliases:
+            # Só nomes de estado: vira cidade a capital homônima ou o nome repetido ("Goiás, Goiás")
+            state_names = [target for start, end, kind, target in mentions if kind == "cidade" and (start, end) in state_spans]
+            cities = [name for name in set(state_names) if name in CAPITAIS_HOMONIMAS or state_names.count(name) > 1]
+        if not cities and not aliases:
+            # Menções fracas (começo de frase) só valem confirmadas pelo estado citado
+            cities = [target for _, _, kind, target in mentions
+                      if kind == "cidade_fraca" and any(loc["estado"] in states for loc in self.cities[target])]
+        candidates = {}
+        for loc in [loc for name in cities for loc in self.cities[name]] + aliases:
+            candidates[(loc["cidade"], loc["estado"])] = loc
+        # Com estado citado, ficam só as candidatas daquele estado ("Queimadas em Natal, RN");
+        # se nenhuma for de lá, o estado não ajuda e valem todas
+        in_states = {key: loc for key, loc in candidates.items() if loc["estado"] in states}
+        if in_states:
+            candidates = in_states
+        city_names = sorted({key[0] for key in candidates})
+        location = next(iter(candidates.values())) if len(candidates) == 1 else None
+        return LocationMatch(location, len(candidates) > 1, city_names, sorted(states))
+
+    def resolve(self, text):
+        """A cidade (dict do gazetteer) citada sem ambiguidade em `text`, ou None."""
+        return self.match(text).location
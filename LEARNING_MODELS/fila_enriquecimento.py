@@ -0,0 +1,175 @@
+"""
+Fila de enriquecimento em segundo plano para novas publicações.
+
+/publicar só grava a publicação e enfileira o id_hash; um conjunto limitado
+de threads preenche REALcidade, área e predições depois. A fila tem
+capacidade máxima: quando está cheia, submit() devolve False e quem chamou
+responde com 503 (backpressure) em vez de acumular trabalho sem limite.
+
+Quem precisa gravar antes de enfileirar reserva a vaga com reserve(), grava
+e só então chama enqueue(); se a gravação falhar, release() devolve a vaga.
+Assim nenhuma thread recebe uma chave que ainda não existe no armazenamento.
+"""
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class EnrichmentQueue:
+    def __init__(self, enrich_func, workers=2, maxsize=1000, status_history=10000):
+        self.enrich_func = enrich_func
+        self.workers = workers
+        self.maxsize = maxsize
+        self.status_history = status_history
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._pid = None
+        self._pending = 0
+        self._in_flight = 0
+        self._status = OrderedDict()
+        self._wait_times = deque(maxlen=1000)
+        self._run_times = deque(maxlen=1000)
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    # --- Ciclo de vida ---
+    def start(self):
+        """Inicia as threads (também depois de um fork, já que threads não sobrevivem a ele)."""
+        with self._lock:
+            if self._pid == os.getpid() and all(t.is_alive() for t in self._threads):
+                return
+            self._pid = os.getpid()
+            self._threads = [
+                threading.Thread(target=self._worker, name=f"enriquecimento-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=5):
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._pid = None
+
+    def join(self, timeout=None):
+        """Espera a fila esvaziar (útil em testes e no desligamento)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if self._pending == 0 and self._in_flight == 0:
+                    return True
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.005)
+
+    # --- Enfileiramento ---
+    def submit(self, key):
+        if not self.reserve():
+            return False
+        self.enqueue(key)
+        return True
+
+    def reserve(self):
+        """Ocupa uma vaga sem enfileirar nada; False se a fila está cheia."""
+        with self._lock:
+            if self._pending >= self.maxsize:
+                self.rejected += 1
+                return False
+            self._pending += 1
+            return True
+
+    def release(self):
+        """Devolve uma vaga reservada que não vai ser usada."""
+        with self._lock:
+            self._pending -= 1
+
+    def enqueue(self, key):
+        """Enfileira `key` na vaga reservada antes com reserve()."""
+        with self._lock:
+            self.submitted += 1
+            self._set_status(key, {"status": "pendente", "enfileirado_em": time.time()})
+        self.start()
+        self._queue.put((key, time.monotonic()))
+
+    def _set_status(self, key, values):
+        entry = self._status.pop(key, {})
+        entry.update(values)
+        self._status[key] = entry
+        while len(self._status) > self.status_history:
+            self._status.popitem(last=False)
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            key, enqueued_at = item
+            started = time.monotonic()
+            with self._lock:
+                self._pending -= 1
+                self._in_flight += 1
+                self._wait_times.append(started - enqueued_at)
+                self._set_status(key, {"status": "processando"})
+            try:
+                self.enrich_func(key)
+                status = {"status": "concluido"}
+            except Exception as e:
+                print(f"❌ Erro ao enriquecer publicação {str(key)[:8]}...: {e}")
+                status = {"status": "falhou", "erro": str(e)}
+            finished = time.monotonic()
+            with self._lock:
+                self._in_flight -= 1
+                self._run_times.append(finished - started)
+                if status["status"] == "concluido":
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                status["concluido_em"] = time.time()
+                status["duracao_ms"] = round((finished - started) * 1000, 3)
+                self._set_status(key, status)
+
+    # --- Observabilidade ---
+    def status(self, key):
+        with self._lock:
+            entry = self._status.get(key)
+            return dict(entry) if entry else None
+
+    @property
+    def depth(self):
+        return self._pending
+
+    @staticmethod
+    def _summary(samples):
+        if not samples:
+            return {"media": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+        ordered = sorted(samples)
+        pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+        return {
+            "media": round(sum(ordered) / len(ordered) * 1000, 3),
+            "p50": round(pick(0.50), 3),
+            "p95": round(pick(0.95), 3),
+            "max": round(ordered[-1] * 1000, 3)
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                "profundidade": self._pending,
+                "capacidade": self.maxsize,
+                "workers": self.workers,
+                "em_processamento": self._in_flight,
+                "enfileiradas": self.submitted,
+                "concluidas": self.completed,
+                "falhas": self.failed,
+                "rejeitadas": self.rejected,
+                "espera_ms": self._summary(self._wait_times),
+                "processamento_ms": self._summary(self._run_times)
+            }
@@ -0,0 +1,60 @@
+"""
+Gazetteer das cidades brasileiras com índices em dicionário.
+
+Montado uma única vez a partir de locations_data, substitui as buscas
+lineares `next(loc for loc in locations_data if ...)` por consultas O(1)
+pelo nome exato, pelo nome normalizado (sem acentos/minúsculo) e pelo
+código IBGE. Nomes que existem em mais de um estado (ex.: "Bom Jesus")
+são resolvidos pelo estado quando ele é informado; sem estado, vale a
+primeira ocorrência do arquivo, como nas buscas antigas.
+"""
+from normalizacao import normalize_text
+
+
+class Gazetteer:
+    def __init__(self, locations):
+        self.locations = locations
+        self.by_name = {}
+        self.by_normalized = {}
+        self.by_ibge = {}
+        self.by_state = {}
+        for loc in locations:
+            normalized = normalize_text(loc["cidade"])
+            self.by_name.setdefault(loc["cidade"], []).append(loc)
+            self.by_normalized.setdefault(normalized, []).append(loc)
+            if loc.get("cod_ibge"):
+                self.by_ibge[str(loc["cod_ibge"])] = loc
+            self.by_state.setdefault(normalize_text(loc["estado"]), {}).setdefault(normalized, loc)
+
+    def __len__(self):
+        return len(self.locations)
+
+    def _resolve(self, candidates, state):
+        if not candidates:
+            return None
+        if state:
+            normalized_state = normalize_text(state)
+            for loc in candidates:
+                if normalize_text(loc["estado"]) == normalized_state:
+                    return loc
+            return None
+        return candidates[0]
+
+    def find(self, name, state=None):
+        """Busca pelo nome exato; com `state`, escolhe a cidade daquele estado."""
+        return self._resolve(self.by_name.get(name), state)
+
+    def find_normalized(self, name, state=None):
+        """Busca ignorando acentos, maiúsculas e espaços nas pontas."""
+        if state:
+            return self.by_state.get(normalize_text(state), {}).get(normalize_text(name))
+        return self._resolve(self.by_normalized.get(normalize_text(name)), None)
+
+    def find_by_ibge(self, cod_ibge):
+        return self.by_ibge.get(str(cod_ibge)) if cod_ibge is not None else None
+
+    def states_of(self, name):
+        return [loc["estado"] for loc in self.by_normalized.get(normalize_text(name), [])]
+
+    def is_ambiguous(self, name):
+        return len(self.by_normalized.get(normalize_text(name), [])) > 1
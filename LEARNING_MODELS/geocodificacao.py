@@ -0,0 +1,36 @@
+"""
+Geocodificação reversa offline a partir do gazetteer local.
+
+O município de um ponto é aproximado pela sede municipal mais próxima em
+brazil_states_cities_geocoded.json, consultada no índice espacial
+(geoespacial.CityIndex). Não há rede envolvida, então a resposta sai em
+microssegundos e não sofre o limite de 1 requisição/s do Nominatim.
+Pontos longe de qualquer sede (oceano, outros países) não são resolvidos.
+"""
+
+
+class OfflineReverseGeocoder:
+    def __init__(self, city_index, max_distance_km=60):
+        self.city_index = city_index
+        self.max_distance_km = max_distance_km
+
+    def _result(self, loc, distance):
+        if loc is None:
+            return None
+        return {
+            "cidade": loc["cidade"],
+            "estado": loc["estado"],
+            "cod_ibge": loc.get("cod_ibge"),
+            "distancia_km": round(distance, 3),
+            "fonte": "offline"
+        }
+
+    def reverse(self, lat, lon):
+        """Devolve {"cidade", "estado", "cod_ibge", "distancia_km", "fonte"} ou None."""
+        return self.reverse_many([(lat, lon)])[0]
+
+    def reverse_many(self, coordinates):
+        return [
+            self._result(loc, distance)
+            for loc, distance in self.city_index.nearest_many(coordinates, max_distance_km=self.max_distance_km)
+        ]
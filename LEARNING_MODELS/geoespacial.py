@@ -0,0 +1,139 @@
+"""
+Índice espacial das cidades do gazetteer.
+
+As coordenadas são convertidas uma única vez para pontos 3D na esfera
+unitária e guardadas em uma scipy.spatial.cKDTree. A distância euclidiana
+entre dois pontos da esfera (corda) é monotônica com a distância de
+grande círculo, então a cidade mais próxima na árvore é também a mais
+próxima sobre a superfície; a corda é convertida de volta para km.
+
+Também guarda as coordenadas em radianos para validar distâncias em lote
+com a fórmula de haversine (esfera), bem mais barata que o geodésico
+elipsoidal do geopy e suficiente para a tolerância de 100 km usada na
+validação.
+"""
+import math
+import numpy as np
+from scipy.spatial import cKDTree
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def to_unit_xyz(lats, lons):
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lon = np.radians(np.asarray(lons, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2, 0, 1))
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Distância de grande círculo em km (entradas em graus; aceita arrays)."""
+    return haversine_rad(np.radians(lat1), np.radians(lon1), np.radians(lat2), np.radians(lon2))
+
+
+def haversine_rad(lat1, lon1, lat2, lon2, cos_lat2=None):
+    """Mesma fórmula com entradas já em radianos; `cos_lat2` pode vir pré-calculado."""
+    lat1 = np.asarray(lat1, dtype=np.float64)
+    lat2 = np.asarray(lat2, dtype=np.float64)
+    if cos_lat2 is None:
+        cos_lat2 = np.cos(lat2)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * cos_lat2 * np.sin((np.asarray(lon2) - np.asarray(lon1)) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def km_to_chord(distance_km):
+    # Distâncias maiores que meia volta ao mundo cobrem a esfera inteira
+    return 2 * math.sin(min(distance_km / (2 * EARTH_RADIUS_KM), math.pi / 2))
+
+
+class CityIndex:
+    """Consultas de vizinho mais próximo (e k vizinhos) em O(log n)."""
+
+    def __init__(self, locations):
+        self.locations = [
+            loc for loc in locations
+            if loc.get("latitude") is not None and loc.get("longitude") is not None
+        ]
+        self.lats = np.array([loc["latitude"] for loc in self.locations], dtype=np.float64)
+        self.lons = np.array([loc["longitude"] for loc in self.locations], dtype=np.float64)
+        self.tree = cKDTree(to_unit_xyz(self.lats, self.lons)) if self.locations else None
+        # Coordenadas em radianos pré-calculadas para o haversine vetorizado
+        self.lat_rad = np.radians(self.lats)
+        self.lon_rad = np.radians(self.lons)
+        self.cos_lat = np.cos(self.lat_rad)
+        # Posição de cada localidade no índice (as localidades do gazetteer são os mesmos objetos)
+        self._position_by_id = {id(loc): i for i, loc in enumerate(self.locations)}
+
+    def __len__(self):
+        return len(self.locations)
+
+    def query(self, lats, lons, k=1, max_distance_km=None):
+        """Consulta em lote. Devolve (distâncias em km, índices), ambos com forma (n, k).
+
+        Pontos inválidos ou sem vizinho dentro de `max_distance_km` recebem
+        distância inf e índice -1.
+        """
+        lats = np.asarray(lats, dtype=np.float64).reshape(-1)
+        lons = np.asarray(lons, dtype=np.float64).reshape(-1)
+        n = len(lats)
+        distances = np.full((n, k), np.inf)
+        indices = np.full((n, k), -1, dtype=np.intp)
+        if self.tree is None or n == 0:
+            return distances, indices
+        valid = np.isfinite(lats) & np.isfinite(lons)
+        if not valid.any():
+            return distances, indices
+        bound = km_to_chord(max_distance_km) * (1 + 1e-12) if max_distance_km is not None else np.inf
+        chords, found = self.tree.query(to_unit_xyz(lats[valid], lons[valid]), k=k, distance_upper_bound=bound)
+        chords = np.asarray(chords, dtype=np.float64).reshape(-1, k)
+        found = np.asarray(found).reshape(-1, k)
+        hit = np.isfinite(chords)
+        km = np.where(hit, chord_to_km(np.where(hit, chords, 0)), np.inf)
+        if max_distance_km is not None:
+            hit &= km <= max_distance_km
+            km = np.where(hit, km, np.inf)
+        distances[valid] = km
+        indices[valid] = np.where(hit, found, -1)
+        return distances, indices
+
+    def position_of(self, loc):
+        return self._position_by_id.get(id(loc)) if loc is not None else None
+
+    def distances_to(self, positions, lats, lons):
+        """Haversine em lote entre cada ponto (graus) e a cidade na posição correspondente do índice."""
+        positions = np.asarray(positions, dtype=np.intp)
+        return haversine_rad(
+            np.radians(np.asarray(lats, dtype=np.float64)), np.radians(np.asarray(lons, dtype=np.float64)),
+            self.lat_rad[positions], self.lon_rad[positions], self.cos_lat[positions]
+        )
+
+    def nearest(self, lat, lon, max_distance_km=None):
+        """Devolve (localidade, distância_km) ou (None, None)."""
+        return self.nearest_many([(lat, lon)], max_distance_km)[0]
+
+    def nearest_many(self, coordinates, max_distance_km=None):
+        return [matches[0] if matches else (None, None) for matches in self.k_nearest_many(coordinates, 1, max_distance_km)]
+
+    def k_nearest(self, lat, lon, k, max_distance_km=None):
+        return self.k_nearest_many([(lat, lon)], k, max_distance_km)[0]
+
+    def k_nearest_many(self, coordinates, k, max_distance_km=None):
+        """Para cada (lat, lon), lista de até k pares (localidade, distância_km) em ordem crescente."""
+        lats = []
+        lons = []
+        for lat, lon in coordinates:
+            try:
+                lats.append(float(lat))
+                lons.append(float(lon))
+            except (ValueError, TypeError):
+                lats.append(np.nan)
+                lons.append(np.nan)
+        distances, indices = self.query(lats, lons, k=k, max_distance_km=max_distance_km)
+        return [
+            [(self.locations[i], float(d)) for d, i in zip(row_d, row_i) if i >= 0]
+            for row_d, row_i in zip(distances, indices)
+        ]
@@ -0,0 +1,53 @@
+"""
+Configuração do gunicorn para a API (gunicorn -c gunicorn.conf.py wsgi:application).
+
+preload_app carrega gazetteer, índices e modelos uma única vez no processo
+mestre; os workers nascem por fork e compartilham essas páginas
+(copy-on-write) em vez de cada um carregar a própria cópia.
+
+Variáveis de ambiente:
+    WEB_CONCURRENCY    número de workers (padrão: número de CPUs)
+    GUNICORN_THREADS   threads por worker (padrão: 4; ajudam nas rotas de I/O,
+                       a inferência continua limitada pelo GIL de cada worker)
+    PORT               porta (padrão: 5000)
+    GUNICORN_TIMEOUT   segundos até um worker travado ser reiniciado (padrão: 120)
+    GUNICORN_PRELOAD   0 faz cada worker carregar os próprios modelos (comparação de memória)
+
+Com vários workers, a recarga de modelos vale por processo: o observador de
+arquivos de cada worker detecta o .pkl novo; /admin/recarregar_modelos só
+recarrega o worker que atendeu a requisição.
+
+POSTS_BACKEND=jsonl só funciona com um worker: o LogPostStore guarda as
+publicações em memória em cada processo e o PostLog de cada worker anexaria
+ao mesmo segmento. Com WEB_CONCURRENCY > 1 a configuração é recusada; use o
+backend sqlite (padrão), que coordena os processos pelo próprio banco.
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY") or multiprocessing.cpu_count())
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+worker_class = "gthread"
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") != "0"
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+graceful_timeout = 30
+keepalive = 5
+# Heartbeat dos workers em memória (o /tmp de containers pode ser overlay lento)
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+accesslog = "-"
+errorlog = "-"
+
+if os.environ.get("POSTS_BACKEND", "sqlite") == "jsonl" and workers > 1:
+    raise RuntimeError(f"POSTS_BACKEND=jsonl não suporta {workers} workers; use WEB_CONCURRENCY=1 ou POSTS_BACKEND=sqlite")
+
+
+def pre_fork(server, worker):
+    import NEWapp
+    NEWapp.prepare_fork()
+
+
+def post_fork(server, worker):
+    import NEWapp
+    NEWapp.start_worker()
+    server.log.info("Worker %s pronto (pid %s)", worker.age, worker.pid)
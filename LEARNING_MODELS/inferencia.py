@@ -0,0 +1,282 @@
+"""
+Motor de inferência compartilhado pelos modelos de categoria, impacto e localização.
+
+Os três pipelines salvos por treinar_modelo.py têm o mesmo formato
+(TfidfVectorizer com ngram_range=(1, 2) + SGDClassifier), mas cada um tokeniza
+e monta os bigramas do texto por conta própria. Aqui o texto é analisado uma
+única vez por configuração de analisador; para cada pipeline sobram apenas a
+busca no vocabulário, a ponderação IDF e a normalização, feitas com as mesmas
+operações do scikit-learn para que as predições sejam idênticas.
+"""
+from collections import Counter, namedtuple
+from contextlib import nullcontext
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import SGDClassifier, LogisticRegression
+from sklearn.preprocessing import normalize
+from scipy.special import expit
+
+# Parâmetros que definem o resultado de TfidfVectorizer.build_analyzer()
+ANALYZER_PARAMS = (
+    "input", "encoding", "decode_error", "strip_accents", "lowercase",
+    "preprocessor", "tokenizer", "analyzer", "token_pattern", "stop_words", "ngram_range"
+)
+
+
+def _analyzer_signature(vectorizer):
+    params = vectorizer.get_params(deep=False)
+    signature = []
+    for name in ANALYZER_PARAMS:
+        value = params.get(name)
+        # Funções e listas de stop words são comparadas pela identidade do objeto
+        if callable(value) or isinstance(value, (list, set, frozenset)):
+            value = ("id", id(value))
+        signature.append(value)
+    return tuple(signature)
+
+
+class _TfidfHead:
+    def __init__(self, name, pipeline):
+        self.name = name
+        self.pipeline = pipeline
+        self.vectorizer = None
+        self.estimator = None
+        steps = getattr(pipeline, "steps", None)
+        if steps and len(steps) == 2 and isinstance(steps[0][1], TfidfVectorizer) and hasattr(steps[0][1], "vocabulary_"):
+            self.vectorizer = steps[0][1]
+            self.estimator = steps[1][1]
+            self.vocabulary = self.vectorizer.vocabulary_
+            self.n_features = len(self.vocabulary)
+            self.tfidf = self.vectorizer._tfidf
+            self.idf = self.tfidf.idf_ if self.vectorizer.use_idf else None
+
+    @property
+    def shared(self):
+        return self.vectorizer is not None
+
+    def vectorize(self, counted_docs):
+        """Monta a matriz TF-IDF a partir das contagens de n-gramas já calculadas."""
+        vocabulary = self.vocabulary
+        j_indices = []
+        values = []
+        indptr = [0]
+        for counts in counted_docs:
+            for term, count in counts.items():
+                idx = vocabulary.get(term)
+                if idx is not None:
+                    j_indices.append(idx)
+                    values.append(count)
+            indptr.append(len(j_indices))
+        X = sp.csr_matrix(
+            (np.asarray(values, dtype=self.vectorizer.dtype),
+             np.asarray(j_indices, dtype=np.int32),
+             np.asarray(indptr, dtype=np.int32)),
+            shape=(len(indptr) - 1, self.n_features),
+            dtype=self.vectorizer.dtype
+        )
+        X.sort_indices()
+        if self.vectorizer.binary:
+            X.data.fill(1)
+        # Mesmas operações de TfidfTransformer.transform
+        if self.tfidf.sublinear_tf:
+            np.log(X.data, X.data)
+            X.data += 1.0
+        if self.idf is not None:
+            X.data *= self.idf[X.indices]
+        if self.tfidf.norm is not None:
+            X = normalize(X, norm=self.tfidf.norm, copy=False)
+        return X
+
+
+class SharedTfidfEngine:
+    """Executa vários pipelines TF-IDF + classificador analisando cada texto uma vez só.
+
+    `pipelines` é um dicionário nome -> Pipeline; entradas None (modelo não
+    carregado) são ignoradas. Pipelines que não seguem o formato
+    TfidfVectorizer + estimador continuam funcionando pelo caminho normal.
+    """
+
+    def __init__(self, pipelines):
+        self.heads = {name: _TfidfHead(name, p) for name, p in pipelines.items() if p is not None}
+        self._analyzers = {}
+        self._groups = {}
+        for name, head in self.heads.items():
+            if not head.shared:
+                continue
+            signature = _analyzer_signature(head.vectorizer)
+            if signature not in self._analyzers:
+                self._analyzers[signature] = head.vectorizer.build_analyzer()
+                self._groups[signature] = []
+            self._groups[signature].append(name)
+
+    def __contains__(self, name):
+        return name in self.heads
+
+    @property
+    def analysis_groups(self):
+        return len(self._analyzers)
+
+    def transform(self, texts, heads=None):
+        """Devolve {nome: matriz TF-IDF} para os pipelines compartilháveis (só `heads`, se informado)."""
+        features = {}
+        for signature, names in self._groups.items():
+            if heads is not None:
+                names = [name for name in names if name in heads]
+                if not names:
+                    continue
+            analyze = self._analyzers[signature]
+            counted_docs = [Counter(analyze(text)) for text in texts]
+            for name in names:
+                features[name] = self.heads[name].vectorize(counted_docs)
+        return features
+
+    def predict(self, texts, features=None):
+        """Devolve {nome: array de rótulos}, equivalente a pipeline.predict(texts)."""
+        if features is None:
+            features = self.transform(texts)
+        predictions = {}
+        for name, head in self.heads.items():
+            if name in features:
+                predictions[name] = head.estimator.predict(features[name])
+            else:
+                predictions[name] = head.pipeline.predict(texts)
+        return predictions
+
+    def predict_proba(self, name, texts, features=None):
+        head = self.heads[name]
+        if features is not None and name in features:
+            return head.estimator.predict_proba(features[name])
+        return head.pipeline.predict_proba(texts)
+
+
+def _no_timer(stage):
+    return _NULL_TIMER
+
+
+_NULL_TIMER = nullcontext()
+
+# Resultado de uma cabeça do preditor: rótulo, probabilidade do rótulo e
+# lista de (rótulo, probabilidade) com as melhores alternativas.
+HeadPrediction = namedtuple("HeadPrediction", ["label", "probability", "top_k"])
+
+
+class _LinearScorer:
+    """Calcula decision_function/predict_proba direto dos coeficientes,
+    sem a validação de entrada que o scikit-learn faz a cada chamada."""
+
+    def __init__(self, estimator):
+        self.estimator = estimator
+        self.classes = np.asarray(estimator.classes_)
+        self.class_index = {label: i for i, label in enumerate(self.classes.tolist())}
+        # Coeficientes compactos (modelo_compacto.CompactLinearClassifier) calculam os próprios scores
+        self.compact = hasattr(estimator, "linear_scores")
+        self.linear = self.compact or (hasattr(estimator, "coef_") and hasattr(estimator, "intercept_") and hasattr(estimator, "classes_"))
+        if self.linear and not self.compact:
+            # coef_.T é uma visão não contígua: o scipy copiaria a matriz a cada X @ coef_t
+            self.coef_t = np.ascontiguousarray(estimator.coef_.T)
+            self.intercept = estimator.intercept_
+        # Mesma fórmula de _predict_proba_lr do scikit-learn (regressão logística OvR)
+        loss = getattr(estimator, "loss", None)
+        self.logistic = self.linear and (
+            (isinstance(estimator, SGDClassifier) and loss == "log_loss") or
+            (isinstance(estimator, LogisticRegression) and len(self.classes) == 2) or
+            (self.compact and estimator.logistic)
+        )
+        self.has_proba = hasattr(estimator, "predict_proba")
+
+    def scores(self, X):
+        if not self.linear:
+            return None
+        if self.compact:
+            return self.estimator.linear_scores(X)
+        scores = X @ self.coef_t + self.intercept
+        return scores.ravel() if scores.shape[1] == 1 else scores
+
+    def evaluate(self, X):
+        """Devolve (índices das classes preditas, matriz de probabilidades ou None)."""
+        scores = self.scores(X)
+        if scores is None:
+            labels = self.estimator.predict(X)
+            indices = np.array([self.class_index[label] for label in labels.tolist()], dtype=np.intp)
+            return indices, (self.estimator.predict_proba(X) if self.has_proba else None)
+        indices = (scores > 0).astype(np.intp) if scores.ndim == 1 else scores.argmax(axis=1)
+        if self.logistic:
+            prob = expit(scores)
+            if prob.ndim == 1:
+                return indices, np.vstack([1 - prob, prob]).T
+            prob /= prob.sum(axis=1).reshape((prob.shape[0], -1))
+            return indices, prob
+        return indices, (self.estimator.predict_proba(X) if self.has_proba else None)
+
+
+class FusedPredictor:
+    """Rótulo, probabilidade e top-k de todas as cabeças em uma única passada.
+
+    Cada texto é vetorizado uma vez pelo SharedTfidfEngine e cada classificador
+    linear é avaliado com um único produto matriz-coeficientes; o rótulo e as
+    probabilidades saem da mesma matriz de scores.
+
+    `stage_timer(etapa)` devolve um gerenciador de contexto que cronometra a
+    vetorização ("vetorizacao") e cada classificador ("classificador_<cabeça>").
+    """
+
+    def __init__(self, engine, top_k=3, stage_timer=None):
+        self.engine = engine
+        self.top_k = top_k
+        self.stage_timer = stage_timer or _no_timer
+        self._stage_names = {name: f"classificador_{name}" for name in engine.heads}
+        self.scorers = {
+            name: _LinearScorer(head.estimator)
+            for name, head in engine.heads.items() if head.shared and hasattr(head.estimator, "classes_")
+        }
+
+    def __contains__(self, name):
+        return name in self.engine
+
+    def class_index(self, name):
+        return self.scorers[name].class_index if name in self.scorers else {}
+
+    def _head_predictions(self, name, texts, features, top_k):
+        scorer = self.scorers.get(name)
+        if scorer is None:
+            # Pipeline fora do formato TF-IDF + estimador: caminho normal do scikit-learn
+            pipeline = self.engine.heads[name].pipeline
+            labels = pipeline.predict(texts).tolist()
+            if not hasattr(pipeline, "predict_proba"):
+                return [HeadPrediction(label, None, []) for label in labels]
+            proba = pipeline.predict_proba(texts)
+            classes = np.asarray(pipeline.classes_)
+            index = {label: i for i, label in enumerate(classes.tolist())}
+            indices = np.array([index[label] for label in labels], dtype=np.intp)
+        else:
+            indices, proba = scorer.evaluate(features[name])
+            classes = scorer.classes
+            labels = classes[indices].tolist()
+        if proba is None:
+            return [HeadPrediction(label, None, []) for label in labels]
+        probabilities = proba[np.arange(len(labels)), indices].tolist()
+        k = min(top_k, proba.shape[1])
+        alternatives = [[] for _ in labels]
+        if k > 0:
+            top = np.argpartition(-proba, k - 1, axis=1)[:, :k] if k < proba.shape[1] else np.tile(np.arange(proba.shape[1]), (len(labels), 1))
+            for row, cols in enumerate(top):
+                ordered = cols[np.argsort(-proba[row, cols], kind="stable")]
+                alternatives[row] = list(zip(classes[ordered].tolist(), proba[row, ordered].tolist()))
+        return [HeadPrediction(label, probability, alt) for label, probability, alt in zip(labels, probabilities, alternatives)]
+
+    def predict(self, texts, top_k=None, heads=None):
+        """Devolve, para cada texto, {nome_da_cabeça: HeadPrediction}; `heads` limita as cabeças avaliadas."""
+        top_k = self.top_k if top_k is None else top_k
+        names = [name for name in self.engine.heads if heads is None or name in heads]
+        timer = self.stage_timer
+        with timer("vetorizacao"):
+            features = self.engine.transform(texts, heads=names)
+        per_head = {}
+        for name in names:
+            with timer(self._stage_names[name]):
+                per_head[name] = self._head_predictions(name, texts, features, top_k)
+        return [{name: per_head[name][i] for name in per_head} for i in range(len(texts))]
+
+    def predict_one(self, text, top_k=None):
+        return self.predict([text], top_k=top_k)[0]
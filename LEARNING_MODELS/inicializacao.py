@@ -0,0 +1,145 @@
+"""
+Inicialização rápida da API: cronometragem das etapas, aquecimento em
+segundo plano e carga dos modelos por memory-map.
+
+- StartupTimer guarda a duração de cada etapa (importações, gazetteer,
+  modelos, publicações, índices) para comparar entre versões.
+- WarmUp executa o aquecimento uma única vez, na hora (modo "eager") ou em
+  uma thread (modo "background"), e informa se o serviço já está pronto.
+- load_joblib_mmap mantém uma cópia não comprimida de cada .pkl em um
+  diretório de cache; a partir da segunda inicialização os arrays dos
+  modelos são abertos com mmap_mode='r' em vez de lidos e descomprimidos,
+  e as páginas ficam compartilhadas entre processos.
+- LazyObject adia a criação de objetos cujo import é caro e raramente usado.
+"""
+import glob
+import os
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    def __init__(self):
+        self.steps = []
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.steps.append((name, seconds))
+
+    @contextmanager
+    def step(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def report(self):
+        with self._lock:
+            steps = list(self.steps)
+        return {
+            "etapas": [{"nome": name, "ms": round(seconds * 1000, 2)} for name, seconds in steps],
+            "total_ms": round(sum(seconds for _, seconds in steps) * 1000, 2)
+        }
+
+
+class WarmUp:
+    def __init__(self, func):
+        self.func = func
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, background=False):
+        """Executa o aquecimento uma vez; em segundo plano devolve imediatamente."""
+        with self._lock:
+            if self.started_at is not None:
+                return
+            self.started_at = time.perf_counter()
+        if background:
+            self._thread = threading.Thread(target=self._run, name="aquecimento", daemon=True)
+            self._thread.start()
+        else:
+            self._run(raise_errors=True)
+
+    def _run(self, raise_errors=False):
+        try:
+            self.func()
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            print(f"❌ Erro no aquecimento da API: {self.error}")
+            traceback.print_exc()
+            if raise_errors:
+                raise
+        finally:
+            self.finished_at = time.perf_counter()
+            self._done.set()
+
+    @property
+    def ready(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def status(self):
+        status = {"pronto": self.ready, "erro": self.error}
+        if self.ready:
+            status["aquecimento_ms"] = round((self.finished_at - self.started_at) * 1000, 2)
+        return status
+
+
+class LazyObject:
+    """Cria o objeto real (e faz os imports dele) no primeiro acesso a um atributo."""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._obj = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if self._obj is None:
+            with self._lock:
+                if self._obj is None:
+                    self._obj = self._factory()
+        return getattr(self._obj, name)
+
+
+def _cache_name(path, stat):
+    return f"{os.path.basename(path)}.{stat.st_mtime_ns:x}-{stat.st_size:x}.mmap"
+
+
+def load_joblib_mmap(path, cache_dir):
+    """Carrega um artefato joblib a partir da cópia não comprimida no cache (memory-map).
+
+    Na primeira carga (ou depois que o .pkl mudou) lê o original e grava a cópia;
+    cópias de versões anteriores do mesmo arquivo são removidas.
+    """
+    import joblib
+    stat = os.stat(path)
+    cache_path = os.path.join(cache_dir, _cache_name(path, stat))
+    if os.path.isfile(cache_path):
+        try:
+            return joblib.load(cache_path, mmap_mode='r')
+        except Exception as e:
+            print(f"⚠️ Cache mmap inválido '{cache_path}', recarregando o original: {e}")
+    model = joblib.load(path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        joblib.dump(model, tmp_path, compress=0)
+        os.replace(tmp_path, cache_path)
+        for stale in glob.glob(os.path.join(cache_dir, f"{glob.escape(os.path.basename(path))}.*.mmap")):
+            if stale != cache_path:
+                os.remove(stale)
+    except OSError as e:
+        print(f"⚠️ Não foi possível gravar o cache mmap de '{path}': {e}")
+    return model
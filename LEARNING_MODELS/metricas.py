@@ -0,0 +1,185 @@
+"""
+Métricas da API no formato de texto do Prometheus (servidas em GET /metrics).
+
+- Histogram conta observações (durações em segundos) em faixas fixas e soma
+  os valores; `time(*rótulos)` cronometra um bloco `with`.
+- Counter acumula eventos por rótulo (ex.: publicações aceitas e recusadas).
+- Gauge não guarda nada: a função informada é chamada só na coleta, então
+  tamanhos de armazenamento, caches e filas não custam nada por requisição.
+
+No caminho das requisições cada observação custa uma busca binária nas
+faixas e um lock curto. Com o registro desativado (enabled=False) nada é
+registrado e os cronômetros viram um contexto vazio compartilhado.
+
+Cada processo mantém as próprias métricas: com vários workers do gunicorn
+cada coleta vê o worker que a atendeu, como sem o modo multiprocesso do
+prometheus_client.
+"""
+import bisect
+import threading
+import time
+from contextlib import nullcontext
+
+# Limites (s) das faixas dos histogramas de latência: de 50 µs a 10 s
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+_NULL_TIMER = nullcontext()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.registry = registry
+        # rótulos -> [contagem por faixa (a última é +Inf), soma]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        if self.registry is not None and not self.registry.enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def time(self, *labels):
+        if self.registry is not None and not self.registry.enabled:
+            return _NULL_TIMER
+        return _Timer(self, labels)
+
+    def samples(self):
+        with self._lock:
+            series = {labels: (list(counts), total) for labels, (counts, total) in self._series.items()}
+        for labels, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                yield f"{self.name}_bucket{_label_text(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_label_text(self.labelnames, labels)} {_number(total)}"
+            yield f"{self.name}_count{_label_text(self.labelnames, labels)} {cumulative}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = registry
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        if self.registry is not None and not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_label_text(self.labelnames, labels)} {_number(value)}"
+
+
+class Gauge:
+    """Valor lido na coleta: `func()` devolve um número (sem rótulos) ou um
+    dicionário {tupla de rótulos: número}; None omite a métrica."""
+    kind = "gauge"
+
+    def __init__(self, name, documentation, func, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.func = func
+        self.labelnames = tuple(labelnames)
+        self.registry = registry
+
+    def samples(self):
+        try:
+            value = self.func()
+        except Exception as e:
+            print(f"⚠️ Erro ao coletar a métrica {self.name}: {e}")
+            return
+        if value is None:
+            return
+        values = value if self.labelnames else {(): value}
+        for labels, number in sorted(values.items()):
+            if number is not None:
+                yield f"{self.name}{_label_text(self.labelnames, labels)} {_number(number)}"
+
+
+class MetricsRegistry:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._metrics = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"métrica {metric.name} já registrada")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets, registry=self))
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames, registry=self))
+
+    def gauge(self, name, documentation, func, labelnames=()):
+        return self._register(Gauge(name, documentation, func, labelnames, registry=self))
+
+    def render(self):
+        """Todas as métricas no formato de exposição em texto do Prometheus (0.0.4)."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,175 @@
+"""
+Formato compacto para os classificadores lineares dos pipelines salvos.
+
+O modelo de localização tem uma classe por município (~5.570) sobre 20 mil
+features TF-IDF: o coef_ em float64 ocupa perto de 900 MB por processo. Aqui
+os coeficientes são guardados transpostos (features x classes) em:
+
+    float32   metade da memória, predições praticamente idênticas
+    int8      um quarto da float32, com uma escala por classe (quantização simétrica)
+
+e, opcionalmente, podados para uma matriz CSR que mantém só a fração
+`densidade` dos pesos de maior módulo.
+
+CompactLinearClassifier pontua direto desse formato: para cada texto só as
+linhas das features presentes (algumas dezenas) são lidas e convertidas, sem
+materializar a matriz inteira em float64 — o que também combina com o
+memory-map do cache de modelos (só as páginas usadas são lidas do disco).
+O pipeline exportado continua sendo um Pipeline do scikit-learn salvo com
+joblib, então carregar_modelo_mais_recente e a recarga a quente o aceitam;
+o FusedPredictor (inferencia.py) usa linear_scores() em vez de coef_.
+
+Uso:
+    python modelo_compacto.py modelo_local_final.pkl --formato int8 --densidade 0.2 \
+        --saida modelo_local_final_20250801.pkl
+"""
+import argparse
+import numpy as np
+import scipy.sparse as sp
+from scipy.special import expit
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.pipeline import Pipeline
+
+FORMATOS = ("float32", "int8")
+
+
+class CompactLinearClassifier(ClassifierMixin, BaseEstimator):
+    # Os parâmetros ficam como recebidos (contrato de get_params/clone);
+    # compact_estimator() já os entrega como arrays no formato final
+    def __init__(self, classes, coef_t, intercept, scale=None, logistic=True):
+        self.classes = classes
+        self.coef_t = coef_t
+        self.intercept = intercept
+        self.scale = scale
+        self.logistic = logistic
+
+    def __sklearn_is_fitted__(self):
+        return True
+
+    @property
+    def classes_(self):
+        return np.asarray(self.classes)
+
+    def fit(self, X, y):
+        raise TypeError("CompactLinearClassifier não é treinável: gere-o de um classificador treinado com compact_estimator()")
+
+    @property
+    def n_features_in_(self):
+        return self.coef_t.shape[0]
+
+    @property
+    def sparse(self):
+        return sp.issparse(self.coef_t)
+
+    def linear_scores(self, X):
+        """Scores lineares (X @ coef_.T + intercept) lendo só as linhas das features presentes."""
+        X = sp.csr_matrix(X)
+        n_classes = self.coef_t.shape[1]
+        scores = np.zeros((X.shape[0], n_classes), dtype=np.float32)
+        for row in range(X.shape[0]):
+            start, end = X.indptr[row], X.indptr[row + 1]
+            if start == end:
+                continue
+            block = self.coef_t[X.indices[start:end]]
+            if sp.issparse(block):
+                block = block.toarray()
+            scores[row] = X.data[start:end].astype(np.float32) @ block.astype(np.float32, copy=False)
+        if self.scale is not None:
+            scores *= self.scale
+        scores += self.intercept
+        return scores.ravel() if n_classes == 1 else scores
+
+    def decision_function(self, X):
+        return self.linear_scores(X)
+
+    def predict(self, X):
+        scores = self.linear_scores(X)
+        indices = (scores > 0).astype(np.intp) if scores.ndim == 1 else scores.argmax(axis=1)
+        return self.classes_[indices]
+
+    def predict_proba(self, X):
+        if not self.logistic:
+            raise AttributeError("predict_proba só existe para classificadores logísticos")
+        # Mesma fórmula de _predict_proba_lr do scikit-learn (regressão logística OvR)
+        prob = expit(self.linear_scores(X))
+        if prob.ndim == 1:
+            return np.vstack([1 - prob, prob]).T
+        prob /= prob.sum(axis=1).reshape((prob.shape[0], -1))
+        return prob
+
+    def memory_bytes(self):
+        if self.sparse:
+            coef = self.coef_t.data.nbytes + self.coef_t.indices.nbytes + self.coef_t.indptr.nbytes
+        else:
+            coef = self.coef_t.nbytes
+        return coef + np.asarray(self.intercept).nbytes + (np.asarray(self.scale).nbytes if self.scale is not None else 0)
+
+
+def _is_logistic(estimator):
+    from sklearn.linear_model import SGDClassifier, LogisticRegression
+    if isinstance(estimator, SGDClassifier):
+        return estimator.loss == "log_loss"
+    return isinstance(estimator, LogisticRegression) and len(estimator.classes_) == 2
+
+
+def compact_estimator(estimator, formato="float32", densidade=None):
+    """Converte um classificador linear treinado (coef_, intercept_, classes_) para o formato compacto."""
+    if formato not in FORMATOS:
+        raise ValueError(f"formato deve ser um de {FORMATOS}")
+    if not (hasattr(estimator, "coef_") and hasattr(estimator, "intercept_") and hasattr(estimator, "classes_")):
+        raise ValueError(f"{type(estimator).__name__} não é um classificador linear treinado")
+    coef_t = np.ascontiguousarray(np.asarray(estimator.coef_, dtype=np.float32).T)
+    if densidade is not None and densidade < 1:
+        magnitude = np.abs(coef_t).ravel()
+        keep = max(1, int(round(magnitude.size * densidade)))
+        threshold = np.partition(magnitude, magnitude.size - keep)[magnitude.size - keep]
+        del magnitude
+        coef_t[np.abs(coef_t) < threshold] = 0
+    scale = None
+    if formato == "int8":
+        scale = np.abs(coef_t).max(axis=0) / 127
+        scale[scale == 0] = 1
+        coef_t = np.clip(np.rint(coef_t / scale), -127, 127).astype(np.int8)
+    if densidade is not None and densidade < 1:
+        coef_t = sp.csr_matrix(coef_t)
+    return CompactLinearClassifier(np.asarray(estimator.classes_), coef_t,
+                                   np.asarray(estimator.intercept_, dtype=np.float32),
+                                   scale=None if scale is None else scale.astype(np.float32, copy=False),
+                                   logistic=_is_logistic(estimator))
+
+
+def compact_pipeline(pipeline, formato="float32", densidade=None):
+    """Mesmo pipeline, com o classificador final trocado pela versão compacta."""
+    steps = list(pipeline.steps)
+    name, estimator = steps[-1]
+    steps[-1] = (name, compact_estimator(estimator, formato, densidade))
+    return Pipeline(steps)
+
+
+def coef_memory_bytes(estimator):
+    if isinstance(estimator, CompactLinearClassifier):
+        return estimator.memory_bytes()
+    return np.asarray(estimator.coef_).nbytes + np.asarray(estimator.intercept_).nbytes
+
+
+def main():
+    import joblib
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("entrada", help=".pkl de um pipeline TF-IDF + classificador linear")
+    parser.add_argument("--saida", required=True)
+    parser.add_argument("--formato", choices=FORMATOS, default="float32")
+    parser.add_argument("--densidade", type=float, default=None, help="fração dos pesos mantida (poda para CSR)")
+    args = parser.parse_args()
+
+    pipeline = joblib.load(args.entrada)
+    compacto = compact_pipeline(pipeline, args.formato, args.densidade)
+    # Sem compressão: o cache de modelos abre os arrays por memory-map
+    joblib.dump(compacto, args.saida, compress=0)
+    antes = coef_memory_bytes(pipeline.steps[-1][1]) / 1e6
+    depois = coef_memory_bytes(compacto.steps[-1][1]) / 1e6
+    print(f"✅ '{args.saida}' gravado: coeficientes {antes:.1f} MB -> {depois:.1f} MB "
+          f"({args.formato}{f', densidade {args.densidade}' if args.densidade else ''}).")
+
+
+if __name__ == "__main__":
+    main()
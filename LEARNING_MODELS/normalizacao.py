@@ -0,0 +1,8 @@
+import unicodedata
+
+# === Normalização de Nomes de Cidades e Textos ===
+def normalize_text(text):
+    if not text:
+        return ""
+    text = unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII')
+    return text.lower().strip()
@@ -0,0 +1,109 @@
+"""
+Perfilador por amostragem das requisições, ligado sob demanda.
+
+Uma requisição é perfilada quando pedida explicitamente (cabeçalho
+X-Perfilar com o token administrativo) ou sorteada com a taxa configurada
+em /admin/perfilador. Enquanto houver alguma requisição perfilada, uma
+thread amostradora lê a pilha de cada thread marcada a cada `interval`
+segundos (sys._current_frames) e conta as pilhas no formato "collapsed"
+(`rota;arquivo.py:funcao;... contagem`), aceito por flamegraph.pl e
+speedscope.
+
+Desligado (taxa 0 e nenhum cabeçalho) o custo por requisição é uma
+comparação: não há thread amostradora nem sys.setprofile, e o código das
+requisições roda sem nenhuma instrumentação.
+
+Como as métricas, o perfilador é de cada processo: com vários workers a
+taxa configurada e as pilhas acumuladas valem para o worker que atendeu
+/admin/perfilador.
+"""
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+
+def collapse_stack(frame, root):
+    """Pilha do quadro mais externo até `frame`, no formato collapsed."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    names.append(root)
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    def __init__(self, interval=0.005, rate=0.0, max_stacks=20000):
+        self.interval = interval
+        self.rate = rate
+        self.max_stacks = max_stacks
+        self.profiled_requests = 0
+        self.samples = 0
+        self._stacks = Counter()
+        # ident da thread -> rótulo da requisição (raiz das pilhas)
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def should_profile(self, forced=False):
+        return forced or (self.rate > 0 and random.random() < self.rate)
+
+    def start(self, label):
+        """Passa a amostrar a thread atual; a amostradora só existe enquanto houver requisições marcadas."""
+        with self._lock:
+            self._active[threading.get_ident()] = label
+            self.profiled_requests += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="perfilador", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                active = dict(self._active)
+            frames = sys._current_frames()
+            stacks = [collapse_stack(frames[ident], label) for ident, label in active.items()
+                      if ident != me and ident in frames]
+            with self._lock:
+                for stack in stacks:
+                    if stack in self._stacks or len(self._stacks) < self.max_stacks:
+                        self._stacks[stack] += 1
+                    else:
+                        self._stacks["[outras pilhas]"] += 1
+                self.samples += len(stacks)
+            time.sleep(self.interval)
+
+    def collapsed(self):
+        """Pilhas agregadas, uma por linha: `quadro;quadro;... contagem`."""
+        with self._lock:
+            items = self._stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+            self.profiled_requests = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "taxa": self.rate,
+                "intervalo_ms": round(self.interval * 1000, 3),
+                "requisicoes_perfiladas": self.profiled_requests,
+                "em_andamento": len(self._active),
+                "amostras": self.samples,
+                "pilhas_distintas": len(self._stacks),
+            }
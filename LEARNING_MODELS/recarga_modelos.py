@@ -0,0 +1,123 @@
+"""
+Recarga dos modelos sem reiniciar o processo.
+
+ModelReloader observa os artefatos (.pkl) em uma thread e, quando algum muda
+(ou quando /admin/recarregar_modelos é chamado), carrega os modelos novos em
+segundo plano, valida o conjunto com uma predição de teste e só então troca
+todos de uma vez. Se qualquer etapa falhar, os modelos atuais continuam em uso.
+
+As funções de carga, validação e troca vêm de quem usa a classe (NEWapp); a
+troca precisa ser atômica em relação à leitura dos modelos pelas requisições.
+"""
+import datetime
+import os
+import threading
+import time
+import traceback
+
+
+class ModelReloader:
+    def __init__(self, fingerprint_func, load_func, validate_func, swap_func):
+        self.fingerprint_func = fingerprint_func
+        self.load_func = load_func
+        self.validate_func = validate_func
+        self.swap_func = swap_func
+        self.loaded_fingerprint = None
+        self.failed_fingerprint = None
+        self.reloads = 0
+        self.failures = 0
+        self.last_result = None
+        self._reload_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._watcher = None
+        self._watcher_pid = None
+        self._stop = threading.Event()
+
+    # --- Recarga ---
+    def reload(self, force=False):
+        """Carrega, valida e troca os modelos. Devolve um dict com o resultado."""
+        if not self._reload_lock.acquire(blocking=False):
+            return {"status": "em_andamento"}
+        try:
+            fingerprint = self.fingerprint_func()
+            if not force and fingerprint == self.loaded_fingerprint:
+                result = {"status": "inalterado"}
+            else:
+                start = time.perf_counter()
+                try:
+                    candidate = self.load_func()
+                    self.validate_func(candidate)
+                except Exception as e:
+                    self.failures += 1
+                    self.failed_fingerprint = fingerprint
+                    result = {"status": "falhou", "erro": f"{type(e).__name__}: {e}"}
+                    print(f"❌ Recarga dos modelos rejeitada, mantendo os atuais: {result['erro']}")
+                    traceback.print_exc()
+                else:
+                    self.swap_func(candidate)
+                    self.loaded_fingerprint = fingerprint
+                    self.failed_fingerprint = None
+                    self.reloads += 1
+                    result = {"status": "recarregado", "ms": round((time.perf_counter() - start) * 1000, 2)}
+                    print(f"🔁 Modelos recarregados em {result['ms']} ms.")
+            self.last_result = dict(result, em=datetime.datetime.now().isoformat())
+            return result
+        finally:
+            self._reload_lock.release()
+
+    def reload_async(self, force=False):
+        """Dispara a recarga em uma thread; False se já houver uma em andamento."""
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return False
+            self._worker = threading.Thread(target=self.reload, kwargs={"force": force},
+                                            name="recarga-modelos", daemon=True)
+            self._worker.start()
+            return True
+
+    def wait(self, timeout=None):
+        worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+
+    # --- Observação dos arquivos ---
+    def start_watcher(self, interval):
+        """Inicia (uma vez por processo) a thread que verifica os artefatos a cada `interval` segundos."""
+        with self._lock:
+            if self._watcher_pid == os.getpid() and self._watcher is not None and self._watcher.is_alive():
+                return
+            self._stop.clear()
+            self._watcher_pid = os.getpid()
+            self._watcher = threading.Thread(target=self._watch, args=(interval,),
+                                             name="observador-modelos", daemon=True)
+            self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
+
+    def _watch(self, interval):
+        # Só recarrega quando a mudança é vista em duas verificações seguidas:
+        # um .pkl ainda sendo copiado muda de tamanho/mtime entre elas
+        seen = None
+        while not self._stop.wait(interval):
+            try:
+                fingerprint = self.fingerprint_func()
+            except OSError:
+                continue
+            if fingerprint in (self.loaded_fingerprint, self.failed_fingerprint):
+                seen = None
+            elif fingerprint != seen:
+                seen = fingerprint
+            else:
+                seen = None
+                self.reload()
+
+    def stats(self):
+        return {
+            "recargas": self.reloads,
+            "falhas": self.failures,
+            "ultima": self.last_result,
+            "em_andamento": self._reload_lock.locked(),
+            "observador_ativo": self._watcher is not None and self._watcher.is_alive() and not self._stop.is_set()
+        }
@@ -0,0 +1,50 @@
+"""
+Busca dos sinônimos de categoria e de intensidade usados na validação.
+
+validate_category e validate_impact procuravam cada sinônimo com
+`sinonimo in texto`, dezenas de buscas por publicação (e duas vezes a mesma
+lista no impacto). SynonymMatcher compila todos os sinônimos de
+disaster_synonyms_validation (mais o nome da própria categoria) e de
+impact_data em um único autômato de Aho-Corasick (automato.py): uma passada
+pelo texto normalizado devolve todas as categorias e níveis de impacto com
+algum sinônimo presente, e o resultado é compartilhado pelos validadores.
+
+A semântica é a mesma do `in`: busca de substring, sem exigir palavra
+inteira, com os sinônimos exatamente como estão nos dicionários.
+"""
+from collections import namedtuple
+from automato import AhoCorasick
+
+# Categorias e níveis de impacto com pelo menos um sinônimo no texto
+SynonymHits = namedtuple("SynonymHits", ["categories", "impacts"])
+
+
+class SynonymMatcher:
+    def __init__(self, category_synonyms, impact_data):
+        self.categories = set(category_synonyms)
+        self.impacts = set(impact_data)
+        self.automaton = AhoCorasick()
+        for category, synonyms in category_synonyms.items():
+            # Inclui a própria categoria como sinônimo válido
+            for synonym in set(synonyms) | {category}:
+                self.automaton.add(synonym, ("categoria", category))
+        for level, details in impact_data.items():
+            for synonym in set(details["sinonimos_intensidade"]):
+                self.automaton.add(synonym, ("impacto", level))
+        self.automaton.build()
+
+    def scan(self, normalized_text):
+        """Uma passada pelo texto já normalizado (normalize_text)."""
+        categories, impacts = set(), set()
+        for kind, key in self.automaton.values_in(normalized_text or ""):
+            (categories if kind == "categoria" else impacts).add(key)
+        return SynonymHits(frozenset(categories), frozenset(impacts))
+
+    def has_category(self, hits, normalized_text, category):
+        if category in self.categories:
+            return category in hits.categories
+        # Categoria fora do dicionário: só o próprio nome conta, como antes
+        return category in (normalized_text or "")
+
+    def has_impact(self, hits, level):
+        return (level if level in self.impacts else "indefinido") in hits.impacts
@@ -0,0 +1,10 @@
+"""
+Ponto de entrada WSGI da API para servidores de produção.
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+O servidor de desenvolvimento (python NEWapp.py) continua disponível para uso local.
+"""
+from NEWapp import create_app
+
+application = create_app()
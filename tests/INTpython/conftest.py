@@ -0,0 +1,58 @@
+import os
+import tempfile
+import pytest
+from sklearn.pipeline import Pipeline
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import SGDClassifier
+
+# Mensagens curtas no formato gerado por treinar_modelo.py / BDTEST.py
+MENSAGENS_TREINO = [
+    ("Enchente forte em São Paulo, São Paulo com ruas alagadas e casas destruídas", "desastre_hidrico", "alto", "São Paulo"),
+    ("Alagamento severo na cidade de Rio de Janeiro/Rio de Janeiro após chuva torrencial", "desastre_hidrico", "moderado", "Rio de Janeiro"),
+    ("Queimada de grandes proporções em Belo Horizonte, Minas Gerais, fumaça densa", "queimada", "alto", "Belo Horizonte"),
+    ("Fogo em vegetação localizado em Garanhuns, Pernambuco, incêndio controlado", "queimada", "baixo", "Garanhuns"),
+    ("Estiagem prolongada em Garanhuns, Pernambuco, reservatório vazio e solo seco", "seca", "moderado", "Garanhuns"),
+    ("Seca severa em Belo Horizonte, Minas Gerais, falta de chuva há meses", "seca", "alto", "Belo Horizonte"),
+    ("Deslizamento de terra em Rio de Janeiro, Rio de Janeiro, encosta caindo", "deslizamento", "alto", "Rio de Janeiro"),
+    ("Morro caindo na região de São Paulo, São Paulo, pequeno deslizamento", "deslizamento", "baixo", "São Paulo"),
+]
+
+# NEWapp carrega (e migra) as publicações ao ser importado: os testes não podem tocar nos arquivos do repositório
+_DADOS_TESTE = tempfile.mkdtemp(prefix="forumweb-testes-")
+os.environ.setdefault("REAL_POSTS_FILE", os.path.join(_DADOS_TESTE, "real_posts.json"))
+os.environ.setdefault("POSTS_LOG_DIR", os.path.join(_DADOS_TESTE, "real_posts_log"))
+os.environ.setdefault("POSTS_DB_PATH", os.path.join(_DADOS_TESTE, "real_posts.db"))
+os.environ.setdefault("MODEL_CACHE_DIR", os.path.join(_DADOS_TESTE, "model_cache"))
+os.environ.setdefault("MODEL_WATCH_INTERVAL_S", "0")
+
+
+def _pipeline(max_features):
+    return Pipeline([
+        ("tfidf", TfidfVectorizer(max_features=max_features, ngram_range=(1, 2))),
+        ("clf", SGDClassifier(loss='log_loss', max_iter=1000, random_state=42))
+    ])
+
+
+@pytest.fixture(scope="session")
+def modelos_sinteticos():
+    textos = [m[0] for m in MENSAGENS_TREINO]
+    categoria = _pipeline(10000).fit(textos, [m[1] for m in MENSAGENS_TREINO])
+    impacto = _pipeline(10000).fit(textos, [m[2] for m in MENSAGENS_TREINO])
+    local = _pipeline(20000).fit(textos, [m[3] for m in MENSAGENS_TREINO])
+    return {"categoria": categoria, "impacto": impacto, "local": local, "textos": textos, "mensagens": MENSAGENS_TREINO}
+
+
+@pytest.fixture
+def app_sintetico(monkeypatch, tmp_path, modelos_sinteticos):
+    """Cliente do NEWapp com os modelos sintéticos, geocodificação offline e publicações em tmp_path."""
+    import NEWapp
+    cidades = os.path.join(os.path.dirname(NEWapp.__file__), "brazil_states_cities_geocoded.json")
+    monkeypatch.setattr(NEWapp, "locations_data", NEWapp.load_brazilian_cities_from_json(cidades))
+    monkeypatch.setattr(NEWapp, "REAL_POSTS_FILE", str(tmp_path / "real_posts.json"))
+    monkeypatch.setattr(NEWapp, "POSTS_LOG_DIR", str(tmp_path / "real_posts_log"))
+    monkeypatch.setattr(NEWapp, "POSTS_DB_PATH", str(tmp_path / "real_posts.db"))
+    monkeypatch.setattr(NEWapp, "GEOCODER_MODE", "offline")
+    monkeypatch.setattr(NEWapp, "modelo_categoria", modelos_sinteticos["categoria"])
+    monkeypatch.setattr(NEWapp, "modelo_impacto", modelos_sinteticos["impacto"])
+    monkeypatch.setattr(NEWapp, "modelo_localizacao", modelos_sinteticos["local"])
+    return NEWapp.app.test_client()
@@ -0,0 +1,140 @@
+import json
+import os
+import pytest
+import NEWapp
+from armazenamento import PostLog, LogPostStore, SQLitePostStore, migrate_legacy_posts
+
+
+def _post(i, **extra):
+    return {"id_hash": f"h{i:04d}", "titulo": f"Publicação {i}", "conteudo": "Alagamento na avenida.", **extra}
+
+
+def test_replay_vale_o_ultimo_registro_e_mantem_a_ordem(tmp_path):
+    log = PostLog(str(tmp_path / "log"), fsync_interval=0)
+    for i in range(3):
+        log.append(_post(i, status_enriquecimento="pendente"))
+    log.append(_post(1, status_enriquecimento="concluido", REALcidade="Recife"))
+    log.close()
+    posts = PostLog(str(tmp_path / "log")).replay()
+    assert [p["id_hash"] for p in posts] == ["h0000", "h0001", "h0002"]
+    assert posts[1]["REALcidade"] == "Recife"
+    assert posts[0]["status_enriquecimento"] == "pendente"
+
+
+def test_linha_truncada_no_fim_do_segmento_e_ignorada(tmp_path):
+    log = PostLog(str(tmp_path / "log"), fsync_interval=0)
+    log.append(_post(0))
+    log.close()
+    with open(tmp_path / "log" / "segment-000001.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"op": "put", "post": {"id_ha')
+    reaberto = PostLog(str(tmp_path / "log"), fsync_interval=0)
+    assert [p["id_hash"] for p in reaberto.replay()] == ["h0000"]
+    # Depois de reiniciar, as gravações vão para um segmento novo
+    reaberto.append(_post(1))
+    reaberto.close()
+    assert sorted(os.listdir(tmp_path / "log")) == ["segment-000001.jsonl", "segment-000002.jsonl"]
+    assert len(PostLog(str(tmp_path / "log")).replay()) == 2
+
+
+def test_rotacao_e_compactacao_em_segundo_plano(tmp_path):
+    log = PostLog(str(tmp_path / "log"), segment_max_bytes=200, compact_after=3, fsync_interval=0)
+    for i in range(20):
+        log.append(_post(i))
+    if log._compactor is not None:
+        log._compactor.join(5)
+    log.compact()
+    log.append(_post(20))
+    log.close()
+    arquivos = sorted(os.listdir(tmp_path / "log"))
+    snapshots = [a for a in arquivos if a.startswith("snapshot-")]
+    assert len(snapshots) == 1
+    # Só sobram os segmentos posteriores ao snapshot
+    assert all(a >= snapshots[0].replace("snapshot", "segment") for a in arquivos if a.startswith("segment-"))
+    assert [p["id_hash"] for p in PostLog(str(tmp_path / "log")).replay()] == [f"h{i:04d}" for i in range(21)]
+    assert log.stats()["compactacoes"] >= 1
+
+
+def test_migracao_unica_do_real_posts_json(tmp_path):
+    antigo = tmp_path / "real_posts.json"
+    antigo.write_text(json.dumps([_post(0), {"titulo": "Sem hash", "conteudo": "x"}]), encoding="utf-8")
+    log = PostLog(str(tmp_path / "log"))
+    assert log.migrate_from(str(antigo)) is True
+    assert not antigo.exists() and (tmp_path / "real_posts.json.migrado").exists()
+    assert len(log.replay()) == 2
+    antigo.write_text("[]", encoding="utf-8")
+    assert log.migrate_from(str(antigo)) is False
+
+
+@pytest.fixture(params=["sqlite", "jsonl"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        store = SQLitePostStore(str(tmp_path / "posts.db"))
+    else:
+        store = LogPostStore(PostLog(str(tmp_path / "log"), fsync_interval=0))
+    yield store
+    store.close()
+
+
+def test_store_deduplica_e_atualiza_sem_mudar_a_ordem(store):
+    assert store.insert(_post(0, status_enriquecimento="pendente"))
+    assert store.insert(_post(1, status_enriquecimento="pendente"))
+    assert store.insert(_post(0)) is False
+    store.update(_post(0, status_enriquecimento="concluido", REALcidade="Recife"))
+    assert "h0000" in store and "h9999" not in store
+    assert store.count() == 2
+    assert store.get("h0000")["REALcidade"] == "Recife"
+    assert [p["id_hash"] for p in store.iter_posts()] == ["h0000", "h0001"]
+    assert [p["id_hash"] for p in store.iter_posts(status="pendente")] == ["h0001"]
+
+
+def test_store_filtra_por_data_cidade_bbox_e_cursor(store):
+    store.insert_many([
+        _post(0, timestamp="2025-07-01T10:00:00", REALcidade="Garanhuns", lat=-8.88, lon=-36.48),
+        _post(1, timestamp="2025-07-02T10:00:00", REALcidade="Recife", lat=-8.05, lon=-34.88),
+        _post(2, timestamp="2025-07-03T10:00:00", REALcidade="Garanhuns", lat="-8.89", lon="-36.49"),
+        _post(3, timestamp="2025-07-04T10:00:00", REALcidade=None, lat=None, lon=None),
+    ])
+    ids = lambda **filtros: [p["id_hash"] for p in store.iter_posts(**filtros)]
+    assert ids(since="2025-07-02") == ["h0001", "h0002", "h0003"]
+    assert ids(cidade="Garanhuns") == ["h0000", "h0002"]
+    assert ids(bbox=(-9.0, -36.6, -8.8, -36.4)) == ["h0000", "h0002"]
+    assert ids(bbox=(-9.0, -37.0, -8.0, -34.0), since="2025-07-02") == ["h0001", "h0002"]
+    primeira = list(store.scan(limit=2))
+    assert [p["id_hash"] for _, p in primeira] == ["h0000", "h0001"]
+    assert [p["id_hash"] for _, p in store.scan(after_seq=primeira[-1][0])] == ["h0002", "h0003"]
+
+
+def test_migracao_para_sqlite_prefere_o_log(tmp_path):
+    log = PostLog(str(tmp_path / "log"), fsync_interval=0)
+    log.append(_post(0))
+    log.close()
+    antigo = tmp_path / "real_posts.json"
+    antigo.write_text(json.dumps([_post(7)]), encoding="utf-8")
+    store = SQLitePostStore(str(tmp_path / "posts.db"))
+    assert migrate_legacy_posts(store, str(tmp_path / "log"), str(antigo)) == 1
+    assert [p["id_hash"] for p in store.iter_posts()] == ["h0000"]
+    # Store já populado: nada é importado de novo
+    assert migrate_legacy_posts(store, str(tmp_path / "log"), str(antigo)) == 0
+    outro = SQLitePostStore(str(tmp_path / "outro.db"))
+    assert migrate_legacy_posts(outro, None, str(antigo)) == 1
+    assert (tmp_path / "real_posts.json.migrado").exists()
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "jsonl"])
+def test_app_grava_publicacoes_e_recarrega(monkeypatch, tmp_path, backend):
+    antigo = tmp_path / "real_posts.json"
+    antigo.write_text(json.dumps([{"titulo": "Antiga", "conteudo": "Queimada."}]), encoding="utf-8")
+    monkeypatch.setattr(NEWapp, "REAL_POSTS_FILE", str(antigo))
+    monkeypatch.setattr(NEWapp, "POSTS_BACKEND", backend)
+    monkeypatch.setattr(NEWapp, "POSTS_LOG_DIR", str(tmp_path / "real_posts_log"))
+    monkeypatch.setattr(NEWapp, "POSTS_DB_PATH", str(tmp_path / "real_posts.db"))
+    monkeypatch.setattr(NEWapp, "ENRICHMENT_WORKERS", 0)
+    monkeypatch.setattr(NEWapp, "enrich_post", lambda message_hash: NEWapp.get_post_store().get(message_hash))
+    assert NEWapp.get_post_store().count() == 1
+    client = NEWapp.app.test_client()
+    assert client.post('/publicar', json={"titulo": "Nova", "conteudo": "Deslizamento."}).status_code == 201
+    assert client.post('/publicar', json={"titulo": "Nova", "conteudo": "Deslizamento."}).json["status"] == "ignored"
+    NEWapp._post_store_cache.clear()
+    publicacoes = client.get('/publicacoes').json
+    assert [p["titulo"] for p in publicacoes] == ["Antiga", "Nova"]
+    assert set(publicacoes[0]) == {"id", "titulo", "conteudo", "lat", "lon", "endereco", "marcacao", "REALcidade"}
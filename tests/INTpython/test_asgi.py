@@ -0,0 +1,88 @@
+import asyncio
+import json
+import threading
+import time
+import NEWapp
+from asgi import AsgiApp, build_environ
+
+
+async def chamar(app, metodo, rota, corpo=None):
+    """Uma requisição HTTP pela interface ASGI; devolve (status, cabeçalhos, corpo)."""
+    dados = json.dumps(corpo).encode("utf-8") if corpo is not None else b""
+    scope = {"type": "http", "http_version": "1.1", "method": metodo, "path": rota, "query_string": b"",
+             "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(dados)).encode())],
+             "scheme": "http", "server": ("testserver", 80), "client": ("127.0.0.1", 1234)}
+    mensagens = [{"type": "http.request", "body": dados, "more_body": False}]
+    enviadas = []
+
+    async def receive():
+        return mensagens.pop(0) if mensagens else {"type": "http.disconnect"}
+
+    async def send(mensagem):
+        enviadas.append(mensagem)
+
+    await app(scope, receive, send)
+    inicio = enviadas[0]
+    assert inicio["type"] == "http.response.start" and not enviadas[-1].get("more_body")
+    return inicio["status"], dict(inicio["headers"]), b"".join(m.get("body", b"") for m in enviadas[1:])
+
+
+def test_environ_traduz_cabecalhos_e_caminho():
+    scope = {"method": "POST", "path": "/publicar/ação", "query_string": b"x=1", "http_version": "1.1",
+             "headers": [(b"content-type", b"application/json"), (b"x-teste", b"a"), (b"x-teste", b"b")]}
+    environ = build_environ(scope, b"{}")
+    assert environ["CONTENT_TYPE"] == "application/json" and environ["CONTENT_LENGTH"] == "2"
+    assert environ["HTTP_X_TESTE"] == "a,b" and environ["QUERY_STRING"] == "x=1"
+    assert environ["PATH_INFO"].encode("latin-1").decode("utf-8") == "/publicar/ação"
+
+
+def test_rotas_respondem_como_no_app_wsgi(app_sintetico, modelos_sinteticos):
+    app = AsgiApp(NEWapp.app, inference_workers=1, inference_queue=4, io_workers=2)
+    corpo = {"titulo": "", "conteudo": modelos_sinteticos["textos"][0]}
+
+    async def cenario():
+        try:
+            return await chamar(app, "GET", "/"), await chamar(app, "POST", "/predict", corpo)
+        finally:
+            app.shutdown()
+
+    (status, _, saude), (status_predict, cabecalhos, predicao) = asyncio.run(cenario())
+    assert status == 200 and json.loads(saude)["status"] == app_sintetico.get("/").get_json()["status"]
+    esperado = app_sintetico.post("/predict", json=corpo)
+    assert status_predict == esperado.status_code == 200
+    assert cabecalhos[b"content-type"] == b"application/json"
+    assert json.loads(predicao)["categoria"] == esperado.get_json()["categoria"]
+
+
+def test_inferencia_saturada_recusa_e_a_saude_continua_respondendo(monkeypatch):
+    liberar = threading.Event()
+
+    def predicao_lenta(*args, **kwargs):
+        liberar.wait(10)
+        raise RuntimeError("modelo indisponível")
+
+    monkeypatch.setattr(NEWapp, "predict_texts", predicao_lenta)
+    app = AsgiApp(NEWapp.app, inference_workers=1, inference_queue=1, io_workers=2)
+    corpo = {"titulo": "", "conteudo": "Enchente forte em São Paulo"}
+
+    async def cenario():
+        await app.startup()
+        try:
+            ocupadas = [asyncio.create_task(chamar(app, "POST", "/predict", corpo)) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            recusada = await chamar(app, "POST", "/predict", corpo)
+            inicio = time.perf_counter()
+            saude = await chamar(app, "GET", "/pronto")
+            espera_saude = time.perf_counter() - inicio
+            liberar.set()
+            return recusada, saude, espera_saude, await asyncio.gather(*ocupadas)
+        finally:
+            liberar.set()
+            app.shutdown()
+
+    recusada, saude, espera_saude, ocupadas = asyncio.run(cenario())
+    assert recusada[0] == 503 and recusada[1][b"retry-after"] == b"1"
+    assert saude[0] in (200, 503) and espera_saude < 2
+    assert json.loads(saude[2])["pronto"] is NEWapp.startup_warmup.ready
+    # As que entraram no pool terminam normalmente (com o erro do modelo, como no app WSGI)
+    assert [status for status, _, _ in ocupadas] == [500, 500]
@@ -0,0 +1,84 @@
+import copy
+import datetime
+import os
+import pytest
+import NEWapp
+from cache_predicoes import PredictionCache
+
+JSON_CIDADES = os.path.join(os.path.dirname(NEWapp.__file__), "brazil_states_cities_geocoded.json")
+
+
+def _posts(mensagens, n, timestamp):
+    locais = {loc["cidade"]: loc for loc in NEWapp.load_brazilian_cities_from_json(JSON_CIDADES)}
+    posts = []
+    for i in range(n):
+        texto, _, _, cidade = mensagens[i % len(mensagens)]
+        posts.append({
+            "id_hash": NEWapp.hashlib.sha256(f"Relato {i}{texto}".encode("utf-8")).hexdigest(),
+            "titulo": f"Relato {i}", "conteudo": texto, "marcacao": None,
+            "lat": locais[cidade]["latitude"], "lon": locais[cidade]["longitude"],
+            "REALcidade": cidade, "timestamp": timestamp
+        })
+    return posts
+
+
+@pytest.fixture
+def avaliacao(app_sintetico, monkeypatch):
+    monkeypatch.setattr(NEWapp, "verdict_cache", PredictionCache(maxsize=1000))
+    lotes = []
+    predict_texts = NEWapp.predict_texts
+    monkeypatch.setattr(NEWapp, "predict_texts", lambda texts: lotes.append(len(texts)) or predict_texts(texts))
+    return app_sintetico, lotes
+
+
+def test_modelos_rodam_uma_vez_por_lote_e_refresh_usa_o_cache(avaliacao, modelos_sinteticos):
+    client, lotes = avaliacao
+    store = NEWapp.get_post_store()
+    store.insert_many(_posts(modelos_sinteticos["mensagens"], 16, datetime.datetime.now().isoformat()))
+    primeira = client.get('/avaliar_publicacoes').json
+    assert len(lotes) == 1 and lotes[0] == 16
+    assert primeira["total_evaluated"] == 16 and primeira["total_cached"] == 0
+    assert primeira["total_accepted"] > 0 and primeira["total_rejected"] > 0
+
+    lotes.clear()
+    segunda = client.get('/avaliar_publicacoes').json
+    assert lotes == []
+    assert segunda["total_cached"] == 16
+    assert segunda["evaluations"] == primeira["evaluations"]
+
+    # Só a publicação alterada é reavaliada
+    alterada = next(store.iter_posts())
+    store.update(dict(alterada, REALcidade="Recife"))
+    terceira = client.get('/avaliar_publicacoes').json
+    assert lotes == [1] and terceira["total_cached"] == 15
+    assert terceira["evaluations"][0]["status"] == "rejected"
+
+
+def test_nova_versao_do_modelo_invalida_os_veredictos(avaliacao, monkeypatch, modelos_sinteticos):
+    client, lotes = avaliacao
+    NEWapp.get_post_store().insert_many(_posts(modelos_sinteticos["mensagens"], 8, datetime.datetime.now().isoformat()))
+    client.get('/avaliar_publicacoes')
+    monkeypatch.setattr(NEWapp, "modelo_impacto", copy.deepcopy(modelos_sinteticos["impacto"]))
+    lotes.clear()
+    assert client.get('/avaliar_publicacoes').json["total_cached"] == 0
+    assert lotes == [8]
+
+
+def test_veredicto_aceito_expira_com_o_timestamp(avaliacao, modelos_sinteticos):
+    _, lotes = avaliacao
+    store = NEWapp.get_post_store()
+    agora = datetime.datetime.now()
+    posts = _posts(modelos_sinteticos["mensagens"], 8, (agora - datetime.timedelta(days=30)).isoformat())
+    posts.append(dict(posts[0], id_hash="curto", titulo="", conteudo="Chuva forte."))
+    store.insert_many(posts)
+    NEWapp.verdict_cache.set_model_version(NEWapp._verdict_version())
+    avaliacoes, _ = NEWapp.evaluate_posts_batch(posts, store, agora)
+    assert any(a["status"] == "accepted" for a in avaliacoes)
+    _, hits = NEWapp.evaluate_posts_batch(posts, store, agora + datetime.timedelta(hours=1))
+    assert hits == 9
+    # Dois dias depois o timestamp passou do limite de 30 dias: tudo que dependia dele é reavaliado;
+    # a rejeição pelo texto continua valendo
+    lotes.clear()
+    _, hits = NEWapp.evaluate_posts_batch(posts, store, agora + datetime.timedelta(days=2))
+    assert hits == 1
+    assert lotes == [8]
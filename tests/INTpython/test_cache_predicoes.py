@@ -0,0 +1,46 @@
+import NEWapp
+from cache_predicoes import PredictionCache, text_hash
+
+
+def test_lru_expulsa_o_menos_usado():
+    cache = PredictionCache(maxsize=2)
+    cache.set_model_version("v1")
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["tamanho"]) == (3, 1, 1, 2)
+
+
+def test_transbordo_para_disco_e_invalidacao(tmp_path):
+    cache = PredictionCache(maxsize=1, spill_dir=str(tmp_path))
+    cache.set_model_version("v1")
+    cache.put("a", {"categoria": ("seca", 0.9, [])})
+    cache.put("b", {"categoria": ("queimada", 0.8, [])})
+    assert cache.get("a") == {"categoria": ("seca", 0.9, [])}
+    assert cache.stats()["hits_disco"] == 1
+    assert cache.set_model_version("v2") is True
+    assert len(cache) == 0
+    assert cache.get("a") is None and cache.get("b") is None
+    assert [p.name for p in tmp_path.iterdir()] in ([], ["v2"])
+    assert cache.stats()["invalidacoes"] == 1
+
+
+def test_predict_usa_cache_e_invalida_ao_trocar_modelo(app_sintetico, monkeypatch, modelos_sinteticos):
+    monkeypatch.setattr(NEWapp, "prediction_cache", PredictionCache(maxsize=10))
+    client = app_sintetico
+    post = {"titulo": "Enchente", "conteudo": "Ruas alagadas em São Paulo, São Paulo"}
+    primeira = client.post('/predict', json=post).json
+    assert client.post('/predict', json=post).json == primeira
+    stats = client.get('/cache_predicoes').json
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert NEWapp.prediction_cache.get(text_hash("Enchente Ruas alagadas em São Paulo, São Paulo")) is not None
+
+    monkeypatch.setattr(NEWapp, "modelo_impacto", modelos_sinteticos["categoria"])
+    client.post('/predict', json=post)
+    stats = client.get('/cache_predicoes').json
+    assert stats["invalidacoes"] == 1
+    assert stats["tamanho"] == 1
@@ -0,0 +1,88 @@
+import gzip
+import tracemalloc
+import pytest
+import NEWapp
+
+
+@pytest.fixture
+def dataset_grande(monkeypatch, tmp_path):
+    caminho = tmp_path / "dataset_real_coletado.csv"
+    linha = "Relato {i},Ruas alagadas no centro após chuva forte.,Alagamento,Alto,Recife,PE\n"
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write("titulo,conteudo,categoria,impacto,cidade,estado\n")
+        for i in range(300000):
+            f.write(linha.format(i=i))
+    monkeypatch.setattr(NEWapp, "DATASET_REAL_COMBINED_PATH", str(caminho))
+    return NEWapp.app.test_client(), caminho
+
+
+def _baixar_medindo_pico(client, **headers):
+    tracemalloc.start()
+    try:
+        response = client.get('/api/dataset_real', headers=headers, buffered=False)
+        tamanho = sum(len(bloco) for bloco in response.response)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        response.close()
+    return response, tamanho, pico
+
+
+def test_download_e_transmitido_em_blocos_com_memoria_constante(dataset_grande):
+    client, caminho = dataset_grande
+    total = caminho.stat().st_size
+    assert total > 20 * 1024 * 1024
+    response, tamanho, pico = _baixar_medindo_pico(client)
+    assert response.status_code == 200 and tamanho == total
+    assert pico < 2 * 1024 * 1024
+    response, tamanho, pico = _baixar_medindo_pico(client, **{"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert tamanho < total // 5
+    assert pico < 2 * 1024 * 1024
+
+
+def test_gzip_etag_e_304(dataset_grande):
+    client, caminho = dataset_grande
+    conteudo = caminho.read_bytes()
+    comprimido = client.get('/api/dataset_real', headers={"Accept-Encoding": "gzip, deflate"})
+    assert gzip.decompress(comprimido.data) == conteudo
+    assert "Accept-Encoding" in comprimido.headers["Vary"]
+    simples = client.get('/api/dataset_real')
+    assert simples.data == conteudo and "Content-Encoding" not in simples.headers
+    assert simples.headers["Content-Type"] == "text/csv; charset=utf-8"
+    assert comprimido.headers["ETag"] != simples.headers["ETag"]
+
+    for response in (comprimido, simples):
+        headers = {"If-None-Match": response.headers["ETag"]}
+        if "Content-Encoding" in response.headers:
+            headers["Accept-Encoding"] = "gzip"
+        assert client.get('/api/dataset_real', headers=headers).status_code == 304
+    assert client.get('/api/dataset_real', headers={
+        "If-Modified-Since": simples.headers["Last-Modified"]}).status_code == 304
+
+    # Linhas novas no CSV mudam o ETag
+    with open(caminho, "a", encoding="utf-8") as f:
+        f.write("Novo,Deslizamento.,Deslizamento,Baixo,Recife,PE\n")
+    novo = client.get('/api/dataset_real', headers={"If-None-Match": simples.headers["ETag"]})
+    assert novo.status_code == 200 and novo.data.endswith(b"Deslizamento,Baixo,Recife,PE\n")
+
+
+def test_range_retoma_download_parcial(dataset_grande):
+    client, caminho = dataset_grande
+    conteudo = caminho.read_bytes()
+    inicio = len(conteudo) - 1000
+    # Range tem precedência sobre o gzip: o job de re-treino retoma a partir dos bytes do arquivo
+    response = client.get('/api/dataset_real', headers={"Range": f"bytes={inicio}-", "Accept-Encoding": "gzip"})
+    assert response.status_code == 206
+    assert response.data == conteudo[inicio:]
+    assert response.headers["Content-Range"] == f"bytes {inicio}-{len(conteudo) - 1}/{len(conteudo)}"
+    etag = client.get('/api/dataset_real').headers["ETag"]
+    assert client.get('/api/dataset_real', headers={"Range": "bytes=0-9", "If-Range": etag}).data == conteudo[:10]
+    # If-Range com ETag antigo: arquivo mudou, volta o arquivo inteiro
+    assert client.get('/api/dataset_real', headers={"Range": "bytes=0-9", "If-Range": '"velho"'}).status_code == 200
+    assert client.get('/api/dataset_real', headers={"Range": f"bytes={len(conteudo) + 10}-"}).status_code == 416
+
+
+def test_dataset_ausente_retorna_404(monkeypatch, tmp_path):
+    monkeypatch.setattr(NEWapp, "DATASET_REAL_COMBINED_PATH", str(tmp_path / "nao_existe.csv"))
+    assert NEWapp.app.test_client().get('/api/dataset_real').status_code == 404
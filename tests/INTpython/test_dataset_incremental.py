@@ -0,0 +1,114 @@
+import copy
+import datetime
+import multiprocessing
+import os
+import pandas as pd
+import pytest
+import NEWapp
+
+JSON_CIDADES = os.path.join(os.path.dirname(NEWapp.__file__), "brazil_states_cities_geocoded.json")
+
+
+def _posts(mensagens, inicio, n):
+    locais = {loc["cidade"]: loc for loc in NEWapp.load_brazilian_cities_from_json(JSON_CIDADES)}
+    posts = []
+    for i in range(inicio, inicio + n):
+        texto, _, _, cidade = mensagens[i % len(mensagens)]
+        posts.append({
+            "id_hash": f"h{i:04d}", "titulo": f"Relato {i}", "conteudo": texto,
+            "lat": locais[cidade]["latitude"], "lon": locais[cidade]["longitude"], "marcacao": None,
+            "REALcidade": cidade, "REALestado": locais[cidade]["estado"],
+            "timestamp": datetime.datetime.now().isoformat(), "status_enriquecimento": "concluido"
+        })
+    return posts
+
+
+@pytest.fixture
+def app_dataset(app_sintetico, monkeypatch, tmp_path):
+    monkeypatch.setattr(NEWapp, "DATASET_REAL_COMBINED_PATH", str(tmp_path / "dataset_real_coletado.csv"))
+    # A intensidade é sorteada; fixa a escolha para comparar arquivos
+    monkeypatch.setattr(NEWapp.random, "choice", lambda opcoes: opcoes[0])
+    chamadas = []
+    predict_texts = NEWapp.predict_texts
+    monkeypatch.setattr(NEWapp, "predict_texts", lambda texts: chamadas.extend(texts) or predict_texts(texts))
+    return app_sintetico, chamadas, tmp_path
+
+
+def test_execucoes_incrementais_equivalem_a_reconstrucao_completa(app_dataset, monkeypatch, modelos_sinteticos):
+    client, chamadas, tmp_path = app_dataset
+    store = NEWapp.get_post_store()
+    store.insert_many(_posts(modelos_sinteticos["mensagens"], 0, 16))
+    primeira = client.post('/gerar_dataset_real').json
+    assert primeira["total_processed"] > 0
+    store.insert_many(_posts(modelos_sinteticos["mensagens"], 16, 16))
+    chamadas.clear()
+    segunda = client.post('/gerar_dataset_real').json
+    # Só as 16 publicações novas são examinadas
+    assert 0 < len(chamadas) <= 16
+    assert segunda["total_received"] == 32
+    chamadas.clear()
+    assert client.post('/gerar_dataset_real').json["total_processed"] == 0
+    assert chamadas == []
+    incremental = pd.read_csv(tmp_path / "dataset_real_coletado.csv")
+
+    monkeypatch.setattr(NEWapp, "DATASET_REAL_COMBINED_PATH", str(tmp_path / "completo.csv"))
+    completo = client.post('/gerar_dataset_real').json
+    assert completo["total_processed"] == primeira["total_processed"] + segunda["total_processed"]
+    pd.testing.assert_frame_equal(incremental, pd.read_csv(tmp_path / "completo.csv"))
+    assert list(incremental.columns) == NEWapp.DATASET_REAL_COLUMNS
+
+
+def test_publicacao_pendente_e_adiada_ate_ser_enriquecida(app_dataset, modelos_sinteticos):
+    client, chamadas, _ = app_dataset
+    store = NEWapp.get_post_store()
+    post = _posts(modelos_sinteticos["mensagens"], 2, 1)[0]  # Belo Horizonte, aceita pelas validações
+    store.insert(dict(post, REALcidade=None, status_enriquecimento="pendente"))
+    assert client.post('/gerar_dataset_real').json["total_processed"] == 0
+    assert NEWapp.get_dataset_state().deferred == {"h0002": 1}
+    store.update(post)
+    assert client.post('/gerar_dataset_real').json["total_processed"] == 1
+    assert NEWapp.get_dataset_state().deferred == {}
+
+
+def test_troca_de_modelo_ou_csv_alterado_reexamina_tudo(app_dataset, monkeypatch, modelos_sinteticos):
+    client, chamadas, tmp_path = app_dataset
+    NEWapp.get_post_store().insert_many(_posts(modelos_sinteticos["mensagens"], 0, 8))
+    aceitas = client.post('/gerar_dataset_real').json["total_processed"]
+    chamadas.clear()
+    # Mesmo conteúdo, novo objeto de modelo: nova versão, rejeições anteriores são revistas
+    monkeypatch.setattr(NEWapp, "modelo_categoria", copy.deepcopy(modelos_sinteticos["categoria"]))
+    assert client.post('/gerar_dataset_real').json["total_processed"] == 0
+    assert len(chamadas) == 8 - aceitas
+    # CSV apagado por fora: índice reconstruído e tudo volta a ser gravado
+    os.remove(tmp_path / "dataset_real_coletado.csv")
+    assert client.post('/gerar_dataset_real').json["total_processed"] == aceitas
+    assert NEWapp.get_dataset_state().rebuilds >= 2
+
+
+def test_geracoes_simultaneas_em_dois_processos_nao_duplicam_linhas(app_dataset, monkeypatch, modelos_sinteticos):
+    client, _, tmp_path = app_dataset
+    NEWapp.get_post_store().insert_many(_posts(modelos_sinteticos["mensagens"], 0, 24))
+    contexto = multiprocessing.get_context("fork")
+    largada = contexto.Barrier(2)
+    resultados = contexto.Queue()
+
+    def gerar():
+        # Workers distintos: cada processo tem o próprio estado em memória
+        NEWapp._dataset_state_cache.clear()
+        largada.wait()
+        resultados.put(client.post('/gerar_dataset_real').json["total_processed"])
+
+    processos = [contexto.Process(target=gerar) for _ in range(2)]
+    for processo in processos:
+        processo.start()
+    processados = [resultados.get(timeout=60) for _ in processos]
+    for processo in processos:
+        processo.join(timeout=60)
+        assert processo.exitcode == 0
+    concorrente = pd.read_csv(tmp_path / "dataset_real_coletado.csv")
+    assert not concorrente.duplicated(subset=["titulo", "conteudo"]).any()
+
+    monkeypatch.setattr(NEWapp, "DATASET_REAL_COMBINED_PATH", str(tmp_path / "completo.csv"))
+    completo = client.post('/gerar_dataset_real').json["total_processed"]
+    assert sorted(processados) == [0, completo]
+    pd.testing.assert_frame_equal(concorrente, pd.read_csv(tmp_path / "completo.csv"))
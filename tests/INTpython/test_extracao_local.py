@@ -0,0 +1,74 @@
+import os
+import pytest
+import NEWapp
+from automato import AhoCorasick
+from cache_predicoes import PredictionCache
+from extracao_local import LocationMatcher
+from gazetteer import Gazetteer
+
+JSON_CIDADES = os.path.join(os.path.dirname(NEWapp.__file__), "brazil_states_cities_geocoded.json")
+
+
+@pytest.fixture(scope="module")
+def locais():
+    return NEWapp.load_brazilian_cities_from_json(JSON_CIDADES)
+
+
+@pytest.fixture(scope="module")
+def matcher(locais):
+    return LocationMatcher(Gazetteer(locais))
+
+
+def test_automato_encontra_sobreposicoes_e_respeita_palavras_inteiras():
+    automato = AhoCorasick([("he", 1), ("she", 2), ("hers", 3), ("his", 4)])
+    assert sorted(automato.find_all("ushers")) == [(1, 4, 2), (2, 4, 1), (2, 6, 3)]
+    automato = AhoCorasick([("chuva", "c"), ("chuva forte", "cf")])
+    assert automato.values_in("chuvarada e chuva forte") == {"c", "cf"}
+    assert automato.find_all("chuvarada", whole_words=True) == []
+
+
+@pytest.mark.parametrize("texto,esperado", [
+    ("Enchente em São Paulo, São Paulo", ("São Paulo", "São Paulo")),
+    ("Deslizamento em Petrópolis/RJ", ("Petrópolis", "Rio de Janeiro")),
+    ("Alagamento forte em Porto Alegre", ("Porto Alegre", "Rio Grande do Sul")),
+    ("Chuva em Bom Jesus, Piauí", ("Bom Jesus", "Piauí")),
+    ("Queimadas em Natal, RN", ("Natal", "Rio Grande do Norte")),
+    ("enchente em sao paulo", ("São Paulo", "São Paulo")),
+    ("Árvores caídas em BH depois do temporal", ("Belo Horizonte", "Minas Gerais")),
+    ("Temporal em Embu Guaçu SP", ("Embu-guaçu", "São Paulo")),
+])
+def test_mencao_explicita_resolve_a_cidade(matcher, texto, esperado):
+    local = matcher.resolve(texto)
+    assert (local["cidade"], local["estado"]) == esperado
+
+
+@pytest.mark.parametrize("texto", [
+    "Chuva em Bom Jesus",                  # homônima sem estado
+    "Seca para o Pará",                    # só o estado
+    "Para ajudar, queimadas no natal",     # palavras comuns
+    "Enchente em Recife e Olinda",         # duas cidades
+    "",
+])
+def test_sem_mencao_unica_fica_com_o_modelo(matcher, texto):
+    assert matcher.resolve(texto) is None
+
+
+def test_predict_usa_a_cidade_citada_sem_avaliar_a_cabeca_de_localizacao(app_sintetico, monkeypatch, modelos_sinteticos):
+    monkeypatch.setattr(NEWapp, "prediction_cache", PredictionCache(maxsize=10))
+    predictor = NEWapp.get_predictor()
+    cabecas = []
+    predict = predictor.predict
+    monkeypatch.setattr(predictor, "predict", lambda texts, **kw: cabecas.append(kw.get("heads")) or predict(texts, **kw))
+
+    citado = "Deslizamento de terra em Petrópolis/RJ com casas soterradas"
+    preds = NEWapp.predict_texts([citado])[0]
+    assert preds["localizacao"].label == "Petrópolis" and preds["localizacao"].probability == 1.0
+    assert cabecas == [("categoria", "impacto")]
+
+    # Sem menção o modelo decide; com LOCATION_MATCHER desligado o cache completa a cabeça que faltava
+    cabecas.clear()
+    sem_cidade = "Deslizamento de terra com casas soterradas e muitas famílias desalojadas"
+    assert NEWapp.predict_texts([sem_cidade])[0]["localizacao"].label in modelos_sinteticos["local"].classes_
+    monkeypatch.setattr(NEWapp, "LOCATION_MATCHER", False)
+    assert NEWapp.predict_texts([citado])[0]["localizacao"].label in modelos_sinteticos["local"].classes_
+    assert cabecas == [None, None]
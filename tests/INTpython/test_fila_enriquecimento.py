@@ -0,0 +1,131 @@
+import multiprocessing
+import threading
+import pytest
+import NEWapp
+from fila_enriquecimento import EnrichmentQueue
+
+
+
+def test_fila_processa_e_reporta_status():
+    processados = []
+    fila = EnrichmentQueue(lambda chave: processados.append(chave) if chave != "ruim" else 1 / 0, workers=2, maxsize=10)
+    for chave in ("a", "b", "ruim"):
+        assert fila.submit(chave)
+    assert fila.join(timeout=5)
+    assert sorted(processados) == ["a", "b"]
+    assert fila.status("a")["status"] == "concluido"
+    assert fila.status("ruim")["status"] == "falhou"
+    stats = fila.stats()
+    assert (stats["concluidas"], stats["falhas"], stats["profundidade"]) == (2, 1, 0)
+    fila.stop()
+
+
+def test_backpressure_com_fila_cheia():
+    liberar = threading.Event()
+    fila = EnrichmentQueue(lambda chave: liberar.wait(5), workers=1, maxsize=2)
+    assert fila.submit("1")
+    assert fila.join(timeout=0.2) is False
+    assert fila.submit("2") and fila.submit("3")
+    assert fila.submit("4") is False
+    assert fila.stats()["rejeitadas"] == 1
+    liberar.set()
+    assert fila.join(timeout=5)
+    fila.stop()
+
+
+@pytest.fixture
+def app_isolado(app_sintetico, monkeypatch):
+    fila = EnrichmentQueue(NEWapp.enrich_post, workers=1, maxsize=5)
+    monkeypatch.setattr(NEWapp, "enrichment_queue", fila)
+    monkeypatch.setattr(NEWapp, "ENRICHMENT_WORKERS", 1)
+    yield app_sintetico, fila
+    fila.stop()
+
+
+def test_publicar_responde_202_e_enriquece_em_segundo_plano(app_isolado):
+    client, fila = app_isolado
+    response = client.post('/publicar', json={
+        "titulo": "Queimada em Garanhuns", "conteudo": "Fogo em vegetação perto do centro.",
+        "lat": -8.8803, "lon": -36.4795,
+        "marcacao": '{"type": "Feature", "geometry": {"type": "Polygon", "coordinates": [[[-36.5,-8.9],[-36.4,-8.9],[-36.4,-8.8],[-36.5,-8.9]]]}}'
+    })
+    assert response.status_code == 202
+    id_hash = response.json["id_hash"]
+    assert fila.join(timeout=5)
+    status = client.get(f'/publicar/{id_hash}').json
+    assert status["status"] == "concluido"
+    assert status["REALcidade"] == "Garanhuns"
+    assert status["area_km2"] > 0
+    assert set(status["predicao"]) == {"categoria", "localizacao", "impacto"}
+    assert client.get('/fila_enriquecimento').json["concluidas"] == 1
+    assert client.get('/publicar/inexistente').status_code == 404
+
+
+def test_publicar_recusa_com_503_quando_a_fila_esta_cheia(app_isolado, monkeypatch):
+    client, fila = app_isolado
+    monkeypatch.setattr(fila, "maxsize", 0)
+    response = client.post('/publicar', json={"titulo": "Seca", "conteudo": "Estiagem prolongada em Garanhuns"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+    assert NEWapp.get_post_store().count() == 0
+
+
+def test_falha_ao_gravar_devolve_a_vaga_sem_enfileirar(app_isolado, monkeypatch):
+    client, fila = app_isolado
+    store = NEWapp.get_post_store()
+
+    def insert_falho(post):
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(store, "insert", insert_falho)
+    response = client.post('/publicar', json={"titulo": "Seca", "conteudo": "Estiagem prolongada em Garanhuns"})
+    assert response.status_code == 500
+    assert fila.depth == 0
+    assert fila.stats()["enfileiradas"] == 0
+
+
+def test_insert_recusado_por_outro_worker_conta_como_duplicada(app_isolado, monkeypatch):
+    client, fila = app_isolado
+    store = NEWapp.get_post_store()
+    insert = store.insert
+
+    def insert_concorrente(post):
+        # Outro processo grava a mesma publicação depois da checagem de duplicata deste
+        insert(dict(post))
+        return insert(post)
+
+    monkeypatch.setattr(store, "insert", insert_concorrente)
+    response = client.post('/publicar', json={"titulo": "Seca", "conteudo": "Estiagem prolongada em Garanhuns"})
+    assert response.status_code == 200 and response.json["status"] == "ignored"
+    assert fila.depth == 0
+    assert fila.stats()["enfileiradas"] == 0
+
+
+def test_pendentes_sao_retomadas_por_um_unico_processo(app_isolado, monkeypatch):
+    store = NEWapp.get_post_store()
+    for i in range(3):
+        store.insert({"id_hash": f"p{i}", "titulo": f"Relato {i}", "conteudo": "Alagamento",
+                      "status_enriquecimento": "pendente"})
+    contexto = multiprocessing.get_context("fork")
+    retomadas = contexto.Queue()
+    largada = contexto.Barrier(2)
+    monkeypatch.setattr(NEWapp, "_enrichment_resumed_pid", None)
+
+    def worker():
+        # Cada worker do gunicorn recebe a primeira requisição com a própria fila
+        fila = EnrichmentQueue(retomadas.put, workers=1)
+        NEWapp.enrichment_queue = fila
+        NEWapp.resume_pending_enrichment()
+        fila.join(timeout=5)
+        largada.wait(timeout=10)  # a trava do primeiro segue aberta enquanto o segundo tenta
+
+    processos = [contexto.Process(target=worker) for _ in range(2)]
+    for processo in processos:
+        processo.start()
+    for processo in processos:
+        processo.join(timeout=30)
+        assert processo.exitcode == 0
+    chaves = []
+    while not retomadas.empty():
+        chaves.append(retomadas.get(timeout=1))
+    assert sorted(chaves) == ["p0", "p1", "p2"]
@@ -0,0 +1,52 @@
+import os
+import pytest
+import NEWapp
+from gazetteer import Gazetteer
+from normalizacao import normalize_text
+
+JSON_CIDADES = os.path.join(os.path.dirname(NEWapp.__file__), "brazil_states_cities_geocoded.json")
+
+
+@pytest.fixture(scope="module")
+def cidades():
+    return NEWapp.load_brazilian_cities_from_json(JSON_CIDADES)
+
+
+def test_indices_equivalem_a_busca_linear(cidades):
+    gazetteer = Gazetteer(cidades)
+    for nome in ("São Paulo", "Bom Jesus", "Garanhuns", "Inexistente"):
+        esperado = next((loc for loc in cidades if loc["cidade"] == nome), None)
+        assert gazetteer.find(nome) is esperado
+        esperado_norm = next((loc for loc in cidades if normalize_text(loc["cidade"]) == normalize_text(nome)), None)
+        assert gazetteer.find_normalized(nome.upper()) is esperado_norm
+
+
+def test_homonimos_resolvidos_pelo_estado(cidades):
+    gazetteer = Gazetteer(cidades)
+    assert gazetteer.is_ambiguous("Bom Jesus")
+    estados = gazetteer.states_of("Bom Jesus")
+    assert len(set(estados)) > 1
+    for estado in estados:
+        assert gazetteer.find("Bom Jesus", estado)["estado"] == estado
+        assert gazetteer.find_normalized("bom jesus", normalize_text(estado))["estado"] == estado
+    assert gazetteer.find("Bom Jesus", "Estado Inexistente") is None
+    assert not gazetteer.is_ambiguous("Garanhuns")
+
+
+def test_busca_por_codigo_ibge(cidades):
+    gazetteer = Gazetteer(cidades)
+    acrelandia = gazetteer.find_by_ibge("1200013")
+    assert acrelandia["cidade"] == "Acrelândia"
+    assert gazetteer.find_by_ibge(1200013) is acrelandia
+    assert gazetteer.find_by_ibge(None) is None
+
+
+def test_validadores_usam_o_gazetteer(monkeypatch, cidades):
+    monkeypatch.setattr(NEWapp, "locations_data", cidades)
+    estados = NEWapp.get_gazetteer().states_of("Bom Jesus")
+    alvo = NEWapp.get_gazetteer().find("Bom Jesus", estados[-1])
+    ok, _ = NEWapp.validate_geographic_proximity(alvo["latitude"], alvo["longitude"], "Bom Jesus", method="geodesic", state=estados[-1])
+    assert ok
+    assert NEWapp.validate_geographic_proximity_batch([(alvo["latitude"], alvo["longitude"], "Bom Jesus")], states=[estados[-1]])[0][0]
+    assert NEWapp.validate_regional_context("vulcao", "sao paulo")[0] is False
+    assert NEWapp.validate_regional_context("seca", "São Paulo")[0] is True
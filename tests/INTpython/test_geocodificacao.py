@@ -0,0 +1,58 @@
+import os
+import pytest
+import NEWapp
+from geoespacial import CityIndex
+from geocodificacao import OfflineReverseGeocoder
+
+JSON_CIDADES = os.path.join(os.path.dirname(NEWapp.__file__), "brazil_states_cities_geocoded.json")
+
+
+@pytest.fixture(scope="module")
+def cidades():
+    return NEWapp.load_brazilian_cities_from_json(JSON_CIDADES)
+
+
+@pytest.fixture
+def sem_rede(monkeypatch, cidades):
+    def falha(*args, **kwargs):
+        raise AssertionError("Nominatim não deveria ser chamado")
+    monkeypatch.setattr(NEWapp.geolocator, "reverse", falha)
+    monkeypatch.setattr(NEWapp, "locations_data", cidades)
+
+
+def test_geocodificador_offline(cidades):
+    geocoder = OfflineReverseGeocoder(CityIndex(cidades), max_distance_km=60)
+    resultado = geocoder.reverse(-23.5505, -46.6333)
+    assert (resultado["cidade"], resultado["estado"], resultado["fonte"]) == ("São Paulo", "São Paulo", "offline")
+    assert geocoder.reverse(0.0, -20.0) is None
+    assert [r["cidade"] if r else None for r in geocoder.reverse_many([(-8.8803, -36.4795), (None, None)])] == ["Garanhuns", None]
+
+
+def test_modo_offline_nao_usa_rede(monkeypatch, sem_rede):
+    monkeypatch.setattr(NEWapp, "GEOCODER_MODE", "offline")
+    assert NEWapp.get_city_from_coordinates(-22.9068, -43.1729) == "Rio de Janeiro"
+    assert NEWapp.get_city_from_coordinates(0.0, -20.0) is None
+
+
+def test_modo_fallback_so_consulta_nominatim_quando_necessario(monkeypatch, sem_rede):
+    chamadas = []
+    monkeypatch.setattr(NEWapp, "GEOCODER_MODE", "fallback")
+    monkeypatch.setattr(NEWapp, "get_city_from_nominatim", lambda lat, lon: chamadas.append((lat, lon)) or "Oceano")
+    assert NEWapp.get_city_from_coordinates(-22.9068, -43.1729) == "Rio de Janeiro"
+    assert chamadas == []
+    assert NEWapp.reverse_geocode(0.0, -20.0)["fonte"] == "nominatim"
+    assert chamadas == [(0.0, -20.0)]
+
+
+def test_publicar_preenche_realcidade_offline(monkeypatch, tmp_path, sem_rede):
+    monkeypatch.setattr(NEWapp, "GEOCODER_MODE", "offline")
+    monkeypatch.setattr(NEWapp, "REAL_POSTS_FILE", str(tmp_path / "real_posts.json"))
+    monkeypatch.setattr(NEWapp, "POSTS_LOG_DIR", str(tmp_path / "real_posts_log"))
+    monkeypatch.setattr(NEWapp, "POSTS_DB_PATH", str(tmp_path / "real_posts.db"))
+    monkeypatch.setattr(NEWapp, "ENRICHMENT_WORKERS", 0)
+    response = NEWapp.app.test_client().post('/publicar', json={
+        "titulo": "Inundação em Garanhuns", "conteudo": "Ruas alagadas no centro.", "lat": -8.8803, "lon": -36.4795
+    })
+    assert response.status_code == 201
+    assert response.json["REALcidade"] == "Garanhuns"
+    assert next(NEWapp.get_post_store().iter_posts())["REALestado"] == "Pernambuco"
@@ -0,0 +1,71 @@
+import math
+import os
+import random
+import pytest
+import NEWapp
+from geoespacial import CityIndex, EARTH_RADIUS_KM
+
+JSON_CIDADES = os.path.join(os.path.dirname(NEWapp.__file__), "brazil_states_cities_geocoded.json")
+
+
+@pytest.fixture(scope="module")
+def cidades():
+    return NEWapp.load_brazilian_cities_from_json(JSON_CIDADES)
+
+
+def _grande_circulo(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def test_vizinho_mais_proximo_igual_a_busca_exaustiva(cidades):
+    index = CityIndex(cidades)
+    validas = [c for c in cidades if c["latitude"] is not None]
+    assert len(index) == len(validas)
+    rng = random.Random(7)
+    pontos = [(rng.uniform(-33, 5), rng.uniform(-73, -35)) for _ in range(50)]
+    resultados = index.nearest_many(pontos)
+    for (lat, lon), (loc, distancia) in zip(pontos, resultados):
+        esperado = min(validas, key=lambda c: _grande_circulo(lat, lon, c["latitude"], c["longitude"]))
+        assert distancia == pytest.approx(_grande_circulo(lat, lon, esperado["latitude"], esperado["longitude"]), abs=1e-6)
+        assert distancia == pytest.approx(_grande_circulo(lat, lon, loc["latitude"], loc["longitude"]), abs=1e-6)
+
+
+def test_k_vizinhos_limite_e_pontos_invalidos(cidades):
+    index = CityIndex(cidades)
+    vizinhos = index.k_nearest(-23.5505, -46.6333, 5)
+    assert vizinhos[0][0]["cidade"] == "São Paulo"
+    assert [d for _, d in vizinhos] == sorted(d for _, d in vizinhos)
+    assert index.nearest(0.0, 0.0, max_distance_km=100) == (None, None)
+    assert index.nearest_many([(None, 1), ("x", "y"), (float("nan"), 0)]) == [(None, None)] * 3
+    assert len(index.k_nearest(-23.5505, -46.6333, 50, max_distance_km=20)) < 50
+
+
+def test_find_closest_city_usa_o_indice(monkeypatch, cidades):
+    monkeypatch.setattr(NEWapp, "locations_data", cidades)
+    assert NEWapp.find_closest_city(-22.9068, -43.1729) == "Rio de Janeiro"
+    assert NEWapp.find_closest_city(0, 0) is None
+    assert NEWapp.find_closest_cities([(-22.9068, -43.1729), (0, 0), (None, None)]) == ["Rio de Janeiro", None, None]
+    assert NEWapp.find_k_closest_cities(-8.8803, -36.4795, k=2)[0][:2] == ("Garanhuns", "Pernambuco")
+
+
+def test_haversine_vetorizado_proximo_do_geodesico(monkeypatch, cidades):
+    from geopy.distance import geodesic
+    from geoespacial import haversine_km
+    monkeypatch.setattr(NEWapp, "locations_data", cidades)
+    triplas = [
+        (-23.60, -46.70, "São Paulo"),
+        (-22.00, -43.17, "Rio de Janeiro"),
+        (-10.00, -50.00, "Garanhuns"),
+        (None, -46.0, "São Paulo"),
+        (-23.5, -46.6, "Cidade Inexistente"),
+    ]
+    rapidos = NEWapp.validate_geographic_proximity_batch(triplas)
+    exatos = [NEWapp.validate_geographic_proximity(*t, method="geodesic") for t in triplas]
+    assert rapidos == exatos
+    assert NEWapp.validate_geographic_proximity(*triplas[0], method="haversine") == exatos[0]
+    assert NEWapp.validate_geographic_proximity_batch(triplas, method="geodesic") == exatos
+    exato = geodesic((-23.5505, -46.6333), (-22.9068, -43.1729)).km
+    assert abs(float(haversine_km(-23.5505, -46.6333, -22.9068, -43.1729)) - exato) / exato < 0.005
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from sklearn.pipeline import Pipeline
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.naive_bayes import MultinomialNB
+from inferencia import SharedTfidfEngine
+
+TEXTOS = [
+    "Enchente em São Paulo, São Paulo com ruas alagadas",
+    "QUEIMADA de grandes proporções!!! fumaça densa em Belo Horizonte",
+    "texto completamente fora do vocabulário xyz",
+    "",
+    "seca seca seca seca em Garanhuns, Pernambuco",
+]
+
+
+def _pipelines(modelos):
+    return {"categoria": modelos["categoria"], "localizacao": modelos["local"], "impacto": modelos["impacto"]}
+
+
+def test_predicoes_identicas_aos_pipelines(modelos_sinteticos):
+    pipelines = _pipelines(modelos_sinteticos)
+    engine = SharedTfidfEngine(pipelines)
+    assert engine.analysis_groups == 1
+    features = engine.transform(TEXTOS)
+    preds = engine.predict(TEXTOS, features)
+    for name, pipeline in pipelines.items():
+        esperado = pipeline[0].transform(TEXTOS)
+        assert np.array_equal(features[name].toarray(), esperado.toarray())
+        assert list(preds[name]) == list(pipeline.predict(TEXTOS))
+        assert np.array_equal(engine.predict_proba(name, TEXTOS, features), pipeline.predict_proba(TEXTOS))
+
+
+@pytest.mark.parametrize("params", [{"sublinear_tf": True}, {"binary": True, "norm": "l1"}, {"use_idf": False, "ngram_range": (1, 3)}])
+def test_variacoes_de_tfidf(modelos_sinteticos, params):
+    textos = modelos_sinteticos["textos"]
+    pipeline = Pipeline([("tfidf", TfidfVectorizer(**params)), ("clf", SGDClassifier(random_state=0))])
+    pipeline.fit(textos, list(range(len(textos))))
+    engine = SharedTfidfEngine({"modelo": pipeline})
+    assert np.allclose(engine.transform(TEXTOS)["modelo"].toarray(), pipeline[0].transform(TEXTOS).toarray(), rtol=0, atol=0)
+
+
+def test_pipeline_fora_do_formato_e_modelo_ausente(modelos_sinteticos):
+    textos = modelos_sinteticos["textos"]
+    outro = Pipeline([("tfidf", TfidfVectorizer()), ("sel", "passthrough"), ("clf", MultinomialNB())]).fit(textos, [0, 1] * 4)
+    engine = SharedTfidfEngine({"outro": outro, "ausente": None, "categoria": modelos_sinteticos["categoria"]})
+    assert "ausente" not in engine
+    preds = engine.predict(TEXTOS)
+    assert list(preds["outro"]) == list(outro.predict(TEXTOS))
+    assert "outro" not in engine.transform(TEXTOS)
+
+
+def test_preditor_fundido_igual_ao_scikit_learn(modelos_sinteticos):
+    from inferencia import FusedPredictor
+    pipelines = _pipelines(modelos_sinteticos)
+    predictor = FusedPredictor(SharedTfidfEngine(pipelines), top_k=3)
+    resultados = predictor.predict(TEXTOS)
+    for name, pipeline in pipelines.items():
+        labels = pipeline.predict(TEXTOS)
+        proba = pipeline.predict_proba(TEXTOS)
+        classes = pipeline.classes_.tolist()
+        for i, resultado in enumerate(resultados):
+            head = resultado[name]
+            assert head.label == labels[i]
+            assert head.probability == pytest.approx(proba[i][classes.index(labels[i])], rel=1e-12)
+            assert len(head.top_k) == min(3, len(classes))
+            assert head.top_k[0][0] == head.label
+            assert [p for _, p in head.top_k] == sorted((p for _, p in head.top_k), reverse=True)
+        assert predictor.class_index(name) == {c: i for i, c in enumerate(classes)}
+        assert predictor.scorers[name].coef_t.flags.c_contiguous
+
+
+def test_preditor_fundido_classificacao_binaria_e_sem_proba(modelos_sinteticos):
+    from inferencia import FusedPredictor
+    textos = modelos_sinteticos["textos"]
+    binario = Pipeline([("tfidf", TfidfVectorizer()), ("clf", SGDClassifier(loss="log_loss", random_state=0))]).fit(textos, ["a", "b"] * 4)
+    hinge = Pipeline([("tfidf", TfidfVectorizer()), ("clf", SGDClassifier(random_state=0))]).fit(textos, ["a", "b", "c", "d"] * 2)
+    resultados = FusedPredictor(SharedTfidfEngine({"binario": binario, "hinge": hinge})).predict(TEXTOS)
+    for i, resultado in enumerate(resultados):
+        assert resultado["binario"].label == binario.predict(TEXTOS)[i]
+        assert resultado["binario"].probability == pytest.approx(binario.predict_proba(TEXTOS)[i].max())
+        assert resultado["hinge"] == (hinge.predict(TEXTOS)[i], None, [])
@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+import threading
+import joblib
+import numpy as np
+import NEWapp
+from inicializacao import WarmUp, load_joblib_mmap
+
+
+def test_modelo_aberto_por_mmap_a_partir_do_cache(tmp_path, modelos_sinteticos):
+    original = tmp_path / "modelo_evento_final.pkl"
+    joblib.dump(modelos_sinteticos["categoria"], original, compress=3)
+    cache = tmp_path / "cache"
+    primeiro = load_joblib_mmap(str(original), str(cache))
+    assert len(os.listdir(cache)) == 1
+    segundo = load_joblib_mmap(str(original), str(cache))
+    assert isinstance(segundo.named_steps["clf"].coef_, np.memmap)
+    textos = modelos_sinteticos["textos"]
+    assert list(segundo.predict(textos)) == list(primeiro.predict(textos))
+    assert np.allclose(segundo.predict_proba(textos), primeiro.predict_proba(textos))
+
+    # .pkl novo: nova cópia, a antiga é removida
+    joblib.dump(modelos_sinteticos["impacto"], original, compress=3)
+    os.utime(original, ns=(1, 1))
+    terceiro = load_joblib_mmap(str(original), str(cache))
+    assert len(os.listdir(cache)) == 1
+    assert list(terceiro.classes_) == list(modelos_sinteticos["impacto"].classes_)
+
+
+def test_aquecimento_em_segundo_plano_e_prontidao(monkeypatch):
+    liberar = threading.Event()
+    aquecimento = WarmUp(lambda: liberar.wait(10))
+    monkeypatch.setattr(NEWapp, "startup_warmup", aquecimento)
+    monkeypatch.setattr(NEWapp, "STARTUP_WAIT_S", 0.05)
+    client = NEWapp.app.test_client()
+    aquecimento.start(background=True)
+    assert client.get('/').json["pronto"] is False
+    assert client.get('/pronto').status_code == 503
+    assert client.get('/publicacoes').status_code == 503
+    liberar.set()
+    assert aquecimento.wait(5)
+    assert client.get('/pronto').status_code == 200
+    assert client.get('/publicacoes').status_code == 200
+    relatorio = client.get('/inicializacao').json
+    assert relatorio["pronto"] and relatorio["aquecimento_ms"] >= 0
+    assert {"importacoes", "gazetteer_json", "publicacoes"} <= {e["nome"] for e in relatorio["etapas"]}
+
+
+def test_erro_no_aquecimento_aparece_na_prontidao(monkeypatch):
+    aquecimento = WarmUp(lambda: 1 / 0)
+    monkeypatch.setattr(NEWapp, "startup_warmup", aquecimento)
+    aquecimento.start(background=True)
+    aquecimento.wait(5)
+    resposta = NEWapp.app.test_client().get('/pronto')
+    assert resposta.status_code == 503 and "ZeroDivisionError" in resposta.json["erro"]
+
+
+def test_imports_pesados_ficam_para_quando_sao_usados(tmp_path):
+    # Mesmo com o aquecimento completo (modo eager), nada disso é necessário
+    codigo = (
+        "import sys, NEWapp\n"
+        "print(sorted(m for m in ('pandas', 'geopy', 'turfpy', 'geojson') if m in sys.modules))\n"
+    )
+    env = dict(os.environ, STARTUP_MODE="eager", POSTS_DB_PATH=str(tmp_path / "posts.db"),
+               REAL_POSTS_FILE=str(tmp_path / "real_posts.json"), POSTS_LOG_DIR=str(tmp_path / "log"),
+               MODEL_CACHE_DIR=str(tmp_path / "cache"))
+    saida = subprocess.run([sys.executable, "-c", codigo], cwd=os.path.dirname(NEWapp.__file__),
+                           env=env, capture_output=True, text=True, timeout=60)
+    assert saida.returncode == 0, saida.stderr
+    assert saida.stdout.strip().splitlines()[-1] == "[]"
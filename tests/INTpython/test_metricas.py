@@ -0,0 +1,75 @@
+import re
+import NEWapp
+from metricas import MetricsRegistry
+
+MARCACAO = '{"type": "Feature", "geometry": {"type": "Polygon", "coordinates": [[[-36.5,-8.9],[-36.4,-8.9],[-36.4,-8.8],[-36.5,-8.9]]]}}'
+
+
+def amostra(texto, serie):
+    """Valor de uma linha `serie valor` do formato de texto do Prometheus (0 se ausente)."""
+    encontrado = re.search(rf"^{re.escape(serie)} (\S+)$", texto, re.MULTILINE)
+    return float(encontrado.group(1)) if encontrado else 0.0
+
+
+def test_formato_de_texto_do_prometheus():
+    registro = MetricsRegistry()
+    histograma = registro.histogram("latencia_segundos", "Latência.", ["etapa"], buckets=(0.01, 0.1))
+    histograma.observe(0.005, "parse")
+    histograma.observe(0.05, "parse")
+    histograma.observe(3, "parse")
+    contador = registro.counter("eventos_total", "Eventos.", ["motivo"])
+    contador.inc('com "aspas"')
+    registro.gauge("fila", "Fila.", lambda: 7)
+    registro.gauge("caches", "Caches.", lambda: {("a",): 1, ("b",): None}, ["cache"])
+    texto = registro.render()
+    assert "# TYPE latencia_segundos histogram" in texto
+    assert amostra(texto, 'latencia_segundos_bucket{etapa="parse",le="0.01"}') == 1
+    assert amostra(texto, 'latencia_segundos_bucket{etapa="parse",le="0.1"}') == 2
+    assert amostra(texto, 'latencia_segundos_bucket{etapa="parse",le="+Inf"}') == 3
+    assert amostra(texto, 'latencia_segundos_count{etapa="parse"}') == 3
+    assert amostra(texto, 'latencia_segundos_sum{etapa="parse"}') == 3.055
+    assert amostra(texto, 'eventos_total{motivo="com \\"aspas\\""}') == 1
+    assert amostra(texto, "fila") == 7 and amostra(texto, 'caches{cache="a"}') == 1
+    assert 'cache="b"' not in texto
+
+
+def test_registro_desativado_nao_registra_nada():
+    registro = MetricsRegistry(enabled=False)
+    histograma = registro.histogram("latencia_segundos", "Latência.", ["etapa"])
+    with histograma.time("parse"):
+        pass
+    histograma.observe(1, "parse")
+    registro.counter("eventos_total", "Eventos.").inc()
+    assert "latencia_segundos_count" not in registro.render()
+    assert amostra(registro.render(), "eventos_total") == 0
+
+
+def test_metrics_mostra_etapas_contadores_e_gauges(app_sintetico, monkeypatch):
+    monkeypatch.setattr(NEWapp, "ENRICHMENT_WORKERS", 0)
+    client = app_sintetico
+    antes = client.get("/metrics").get_data(as_text=True)
+
+    publicacao = {"titulo": "Queimada em Garanhuns", "conteudo": "Fogo em vegetação perto do centro.",
+                  "lat": -8.8803, "lon": -36.4795, "marcacao": MARCACAO}
+    assert client.post("/publicar", json=publicacao).status_code == 201
+    assert client.post("/publicar", json=publicacao).status_code == 200
+    assert client.post("/publicar", json={}).status_code == 400
+    assert client.post("/predict", json={"titulo": "", "conteudo": "Seca severa", "lat": -8.88, "lon": -36.47}).status_code == 200
+    assert client.get("/avaliar_publicacoes").status_code == 200
+
+    resposta = client.get("/metrics")
+    assert resposta.content_type.startswith("text/plain; version=0.0.4")
+    depois = resposta.get_data(as_text=True)
+    delta = lambda serie: amostra(depois, serie) - amostra(antes, serie)
+    for etapa in ("parse", "vetorizacao", "classificador_categoria", "classificador_impacto", "cidade_mais_proxima",
+                  "geocodificacao_reversa", "area_turfpy", "persistencia"):
+        assert delta(f'forumweb_etapa_segundos_count{{etapa="{etapa}"}}') >= 1, etapa
+    assert delta('forumweb_requisicao_segundos_count{rota="predict"}') == 1
+    for resultado, quantidade in (("aceita", 1), ("duplicada", 1), ("invalida", 1)):
+        assert delta(f'forumweb_publicacoes_recebidas_total{{resultado="{resultado}"}}') == quantidade
+    avaliacoes = re.findall(r'^forumweb_avaliacoes_total\{resultado="(\w+)",motivo="([^"]*)"\} ', depois, re.MULTILINE)
+    assert avaliacoes and all((resultado == "accepted") == (motivo == "") for resultado, motivo in avaliacoes)
+    assert all(":" not in motivo for _, motivo in avaliacoes)
+    assert amostra(depois, "forumweb_publicacoes_armazenadas") == 1
+    assert amostra(depois, 'forumweb_cache_entradas{cache="predicoes"}') == len(NEWapp.prediction_cache)
+    assert amostra(depois, "forumweb_fila_enriquecimento_profundidade") == NEWapp.enrichment_queue.depth
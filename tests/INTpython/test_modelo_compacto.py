@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from inferencia import SharedTfidfEngine, FusedPredictor
+from inicializacao import load_joblib_mmap
+from modelo_compacto import compact_pipeline, coef_memory_bytes
+import joblib
+
+
+@pytest.mark.parametrize("formato,densidade", [("float32", None), ("int8", None), ("float32", 0.3), ("int8", 0.3)])
+def test_formato_compacto_preserva_as_predicoes(modelos_sinteticos, formato, densidade):
+    original = modelos_sinteticos["local"]
+    textos = modelos_sinteticos["textos"]
+    compacto = compact_pipeline(original, formato, densidade)
+    clf = compacto.steps[-1][1]
+    assert sp.issparse(clf.coef_t) == (densidade is not None)
+    assert coef_memory_bytes(clf) <= coef_memory_bytes(original.steps[-1][1]) / 2
+    assert list(compacto.predict(textos)) == list(original.predict(textos))
+    if densidade is None:
+        # A poda muda as probabilidades de um modelo tão pequeno; sem poda a diferença é só de precisão
+        tolerancia = 1e-5 if formato == "float32" else 0.01
+        assert np.allclose(compacto.predict_proba(textos), original.predict_proba(textos), atol=tolerancia)
+
+
+def test_preditor_fundido_usa_os_coeficientes_compactos(modelos_sinteticos):
+    textos = modelos_sinteticos["textos"]
+    compacto = compact_pipeline(modelos_sinteticos["local"], "int8", 0.5)
+    predictor = FusedPredictor(SharedTfidfEngine({"localizacao": compacto}), top_k=2)
+    assert predictor.scorers["localizacao"].compact
+    resultados = predictor.predict(textos)
+    proba = compacto.predict_proba(textos)
+    assert [r["localizacao"].label for r in resultados] == list(compacto.predict(textos))
+    assert np.allclose([r["localizacao"].probability for r in resultados], proba.max(axis=1))
+    assert all(len(r["localizacao"].top_k) == 2 for r in resultados)
+
+
+def test_classificador_binario(modelos_sinteticos):
+    from sklearn.base import clone
+    textos = modelos_sinteticos["textos"]
+    rotulos = ["alto" if m[2] == "alto" else "outro" for m in modelos_sinteticos["mensagens"]]
+    binario = clone(modelos_sinteticos["impacto"]).fit(textos, rotulos)
+    compacto = compact_pipeline(binario, "float32")
+    assert list(compacto.predict(textos)) == list(binario.predict(textos))
+    assert np.allclose(compacto.predict_proba(textos), binario.predict_proba(textos), atol=1e-5)
+
+
+def test_parametros_respeitam_o_contrato_do_scikit_learn(modelos_sinteticos):
+    from sklearn.base import clone
+    from modelo_compacto import CompactLinearClassifier
+    compacto = compact_pipeline(modelos_sinteticos["local"], "int8")
+    clf = compacto.steps[-1][1]
+    X = compacto[:-1].transform(modelos_sinteticos["textos"])
+    # O construtor guarda os argumentos sem convertê-los (listas, float64...)
+    params = dict(clf.get_params(), classes=list(clf.classes_), intercept=clf.intercept.astype(np.float64))
+    novo = CompactLinearClassifier(**params)
+    assert all(novo.get_params()[nome] is valor for nome, valor in params.items())
+    copia = clone(novo)
+    assert list(copia.predict(X)) == list(clf.predict(X))
+    with pytest.raises(TypeError):
+        copia.fit(modelos_sinteticos["textos"], modelos_sinteticos["mensagens"])
+
+
+def test_pipeline_compacto_salvo_e_aberto_por_mmap(tmp_path, modelos_sinteticos):
+    compacto = compact_pipeline(modelos_sinteticos["local"], "int8")
+    joblib.dump(compacto, tmp_path / "modelo_local_final_compacto.pkl", compress=0)
+    load_joblib_mmap(str(tmp_path / "modelo_local_final_compacto.pkl"), str(tmp_path / "cache"))
+    aberto = load_joblib_mmap(str(tmp_path / "modelo_local_final_compacto.pkl"), str(tmp_path / "cache"))
+    assert isinstance(aberto.steps[-1][1].coef_t, np.memmap)
+    textos = modelos_sinteticos["textos"]
+    assert list(aberto.predict(textos)) == list(compacto.predict(textos))
@@ -0,0 +1,77 @@
+import threading
+import time
+import pytest
+import NEWapp
+from perfilador import SamplingProfiler
+
+TOKEN = "segredo"
+
+
+def trabalho_lento(segundos):
+    limite = time.perf_counter() + segundos
+    while time.perf_counter() < limite:
+        pass
+
+
+def test_amostra_so_as_threads_marcadas_e_encerra_a_amostradora():
+    profiler = SamplingProfiler(interval=0.001)
+
+    def requisicao():
+        profiler.start("GET /teste")
+        try:
+            trabalho_lento(0.1)
+        finally:
+            profiler.stop()
+
+    thread = threading.Thread(target=requisicao)
+    thread.start()
+    thread.join()
+    pilhas = profiler.collapsed().splitlines()
+    assert pilhas and all(linha.startswith("GET /teste;") for linha in pilhas)
+    assert any("test_perfilador.py:trabalho_lento " in linha for linha in pilhas)
+    assert profiler.stats()["requisicoes_perfiladas"] == 1 and profiler.samples > 0
+    time.sleep(0.05)
+    assert profiler._thread is None
+    profiler.reset()
+    assert profiler.collapsed() == ""
+
+
+@pytest.fixture
+def app_perfilado(monkeypatch):
+    monkeypatch.setattr(NEWapp, "ADMIN_TOKEN", TOKEN)
+    monkeypatch.setattr(NEWapp, "profiler", SamplingProfiler(interval=0.001))
+
+    def predicao_lenta(texts):
+        trabalho_lento(0.05)
+        raise RuntimeError("modelo indisponível")
+
+    monkeypatch.setattr(NEWapp, "predict_texts", predicao_lenta)
+    return NEWapp.app.test_client()
+
+
+def test_cabecalho_com_token_perfila_a_requisicao(app_perfilado):
+    client = app_perfilado
+    corpo = {"titulo": "", "conteudo": "Enchente forte em São Paulo"}
+    client.post("/predict", json=corpo)
+    client.post("/predict", json=corpo, headers={"X-Perfilar": "1", "X-Admin-Token": "errado"})
+    assert NEWapp.profiler.stats()["requisicoes_perfiladas"] == 0
+
+    client.post("/predict", json=corpo, headers={"X-Perfilar": "1", "X-Admin-Token": TOKEN})
+    resposta = client.get("/admin/perfilador", headers={"X-Admin-Token": TOKEN})
+    assert resposta.content_type.startswith("text/plain")
+    pilhas = resposta.get_data(as_text=True)
+    assert "POST /predict;" in pilhas and "NEWapp.py:predict;test_perfilador.py:predicao_lenta" in pilhas
+    assert all(linha.rsplit(" ", 1)[1].isdigit() for linha in pilhas.splitlines())
+    assert client.get("/admin/perfilador").status_code == 401
+
+
+def test_taxa_configurada_pelo_admin(app_perfilado):
+    client = app_perfilado
+    admin = {"X-Admin-Token": TOKEN}
+    assert client.post("/admin/perfilador", json={"taxa": 2}, headers=admin).status_code == 400
+    assert client.post("/admin/perfilador", json={"taxa": 1}, headers=admin).json["taxa"] == 1
+    client.post("/predict", json={"titulo": "", "conteudo": "Seca severa"})
+    estado = client.post("/admin/perfilador", json={"taxa": 0, "limpar": True}, headers=admin).json
+    assert estado["taxa"] == 0 and estado["requisicoes_perfiladas"] == 0 and estado["amostras"] == 0
+    client.post("/predict", json={"titulo": "", "conteudo": "Seca severa"})
+    assert NEWapp.profiler.stats()["requisicoes_perfiladas"] == 0
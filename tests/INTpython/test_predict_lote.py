@@ -0,0 +1,46 @@
+import pytest
+import NEWapp
+
+
+@pytest.fixture
+def client(app_sintetico, monkeypatch):
+    monkeypatch.setitem(NEWapp.app.config, 'TESTING', True)
+    with app_sintetico as client:
+        yield client
+
+
+POSTS = [
+    {"titulo": "Enchente em São Paulo", "conteudo": "Chuvas fortes causaram alagamentos.", "lat": -23.5505, "lon": -46.6333, "areaDemarcada": 100},
+    {"titulo": "Queimada", "conteudo": "Fogo em vegetação perto de Garanhuns, Pernambuco", "areaDemarcada": 300},
+    {"titulo": "Seca", "conteudo": "Estiagem prolongada", "lat": 10.0, "lon": 10.0},
+    {"titulo": "Deslizamento", "conteudo": "Encosta caindo", "lat": "invalida", "lon": -43.1},
+]
+
+
+def test_predict_lote_igual_ao_predict(client):
+    response = client.post('/predict_lote', json={"publicacoes": POSTS})
+    assert response.status_code == 200
+    assert response.json["total"] == len(POSTS)
+    for post, resultado in zip(POSTS, response.json["resultados"]):
+        individual = client.post('/predict', json=post)
+        assert individual.status_code == 200
+        assert resultado == individual.json
+
+
+def test_predict_lote_aceita_lista_e_reporta_erro_por_item(client):
+    response = client.post('/predict_lote', json=[POSTS[0], {"titulo": "", "conteudo": ""}, {}])
+    assert response.status_code == 200
+    resultados = response.json["resultados"]
+    assert resultados[0]["cidade"] == "São Paulo"
+    assert resultados[1] == {"erro": "Pelo menos título ou conteúdo deve ser fornecido"}
+    assert resultados[2] == {"erro": "Nenhum dado fornecido"}
+
+
+def test_predict_lote_limite(client):
+    response = client.post('/predict_lote', json=[POSTS[0]] * (NEWapp.MAX_BATCH_SIZE + 1))
+    assert response.status_code == 400
+
+
+def test_find_closest_cities_igual_a_find_closest_city():
+    pontos = [(-23.5505, -46.6333), (-22.9, -43.17), (-8.88, -36.47), (10.0, 10.0), (None, 1), ("x", "y")]
+    assert NEWapp.find_closest_cities(pontos) == [NEWapp.find_closest_city(lat, lon) for lat, lon in pontos]
@@ -0,0 +1,73 @@
+import json
+import pytest
+import NEWapp
+
+CIDADES = [
+    ("Garanhuns", -8.88, -36.48),
+    ("Recife", -8.05, -34.88),
+    ("Garanhuns", -8.89, -36.49),
+    ("São Paulo", -23.55, -46.63),
+    (None, None, None),
+]
+
+
+@pytest.fixture(params=["sqlite", "jsonl"])
+def client(request, monkeypatch, tmp_path):
+    monkeypatch.setattr(NEWapp, "POSTS_BACKEND", request.param)
+    monkeypatch.setattr(NEWapp, "POSTS_DB_PATH", str(tmp_path / "real_posts.db"))
+    monkeypatch.setattr(NEWapp, "POSTS_LOG_DIR", str(tmp_path / "real_posts_log"))
+    store = NEWapp.get_post_store()
+    for i, (cidade, lat, lon) in enumerate(CIDADES):
+        store.insert({
+            "id_hash": f"h{i}", "titulo": f"Publicação {i}", "conteudo": "Alagamento.",
+            "lat": lat, "lon": lon, "marcacao": None, "REALcidade": cidade,
+            "timestamp": f"2025-07-0{i + 1}T10:00:00"
+        })
+    return NEWapp.app.test_client()
+
+
+def test_sem_parametros_devolve_o_array_completo(client):
+    response = client.get('/publicacoes')
+    assert response.status_code == 200
+    assert response.mimetype == "application/json"
+    posts = response.json
+    assert [p["id"] for p in posts] == ["h0", "h1", "h2", "h3", "h4"]
+    assert posts[1] == {
+        "id": "h1", "titulo": "Publicação 1", "conteudo": "Alagamento.", "lat": -8.05, "lon": -34.88,
+        "endereco": "", "marcacao": None, "REALcidade": "Recife"
+    }
+    assert "X-Proximo-Cursor" not in response.headers
+
+
+def test_paginacao_por_cursor_em_ndjson(client):
+    vistos = []
+    cursor = ""
+    paginas = 0
+    while True:
+        response = client.get(f'/publicacoes?formato=ndjson&limite=2&cursor={cursor}')
+        assert response.mimetype == "application/x-ndjson"
+        vistos += [json.loads(linha)["id"] for linha in response.get_data(as_text=True).splitlines()]
+        paginas += 1
+        cursor = response.headers.get("X-Proximo-Cursor")
+        if cursor is None:
+            break
+    assert paginas == 3
+    assert vistos == ["h0", "h1", "h2", "h3", "h4"]
+
+
+def test_filtros(client):
+    ids = lambda consulta: [p["id"] for p in client.get(f'/publicacoes?{consulta}').json]
+    assert ids("cidade=Garanhuns") == ["h0", "h2"]
+    assert ids("desde=2025-07-03") == ["h2", "h3", "h4"]
+    assert ids("bbox=-9,-37,-8,-34") == ["h0", "h1", "h2"]
+    assert ids("bbox=-9,-37,-8,-34&cidade=Garanhuns&limite=1") == ["h0"]
+    response = client.get('/publicacoes?bbox=-9,-37,-8,-34&limite=2')
+    assert [p["id"] for p in response.json] == ["h0", "h1"]
+    assert ids(f"bbox=-9,-37,-8,-34&cursor={response.headers['X-Proximo-Cursor']}") == ["h2"]
+
+
+@pytest.mark.parametrize("consulta", ["limite=0", "limite=abc", "bbox=1,2,3", "bbox=0,0,-1,1", "cursor=x", "formato=xml"])
+def test_parametros_invalidos(client, consulta):
+    response = client.get(f'/publicacoes?{consulta}')
+    assert response.status_code == 400
+    assert response.json["status"] == "error"
@@ -0,0 +1,106 @@
+import threading
+import time
+import joblib
+import pytest
+import NEWapp
+from recarga_modelos import ModelReloader
+
+TOKEN = {"X-Admin-Token": "segredo"}
+
+
+@pytest.fixture
+def recarga(monkeypatch, tmp_path, modelos_sinteticos):
+    for nome in ("modelo_categoria", "modelo_localizacao", "modelo_impacto"):
+        monkeypatch.setattr(NEWapp, nome, None)
+    monkeypatch.setattr(NEWapp, "model_artifacts", {})
+    monkeypatch.setattr(NEWapp, "_inference_engine_cache", {})
+    monkeypatch.setattr(NEWapp, "MODEL_DIR", str(tmp_path))
+    monkeypatch.setattr(NEWapp, "MODEL_CACHE_DIR", str(tmp_path / "model_cache"))
+    monkeypatch.setattr(NEWapp, "ADMIN_TOKEN", "segredo")
+    monkeypatch.setattr(NEWapp, "model_reloader", ModelReloader(
+        NEWapp.model_fingerprint, NEWapp._load_model_candidates, NEWapp._smoke_test_models, NEWapp.swap_models))
+
+    def publicar(sufixo, categoria=None):
+        for prefixo, chave in zip(NEWapp.MODEL_PREFIXES, ("categoria", "local", "impacto")):
+            modelo = categoria if (categoria is not None and chave == "categoria") else modelos_sinteticos[chave]
+            joblib.dump(modelo, tmp_path / f"{prefixo}_{sufixo}.pkl", compress=3)
+    return NEWapp.app.test_client(), publicar, tmp_path
+
+
+def test_recarga_pelo_endpoint_troca_os_tres_modelos(recarga, modelos_sinteticos):
+    client, publicar, _ = recarga
+    assert client.post('/admin/recarregar_modelos').status_code == 401
+    publicar("20250101")
+    resposta = client.post('/admin/recarregar_modelos', json={"aguardar": True}, headers=TOKEN)
+    assert resposta.status_code == 200 and resposta.json["status"] == "recarregado"
+    assert all(NEWapp.request_models()["modelos"])
+    versao = client.get('/modelos').json["versao"]
+    assert client.post('/admin/recarregar_modelos', json={"aguardar": True}, headers=TOKEN).json["status"] == "inalterado"
+
+    # Artefato mais novo (glob ordenado pelo timestamp do nome) entra na próxima recarga
+    publicar("20250201")
+    assert client.post('/admin/recarregar_modelos', headers=TOKEN).status_code == 202
+    NEWapp.model_reloader.wait(10)
+    estado = client.get('/modelos').json
+    assert estado["versao"] != versao and estado["recarga"]["recargas"] == 2
+    assert estado["artefatos"]["modelo_evento_final"]["caminho"].endswith("_20250201.pkl")
+    assert client.post('/predict', json={"conteudo": modelos_sinteticos["textos"][0]}).status_code == 200
+
+
+def test_artefato_invalido_mantem_os_modelos_atuais(recarga):
+    client, publicar, tmp_path = recarga
+    publicar("20250101")
+    NEWapp.model_reloader.reload()
+    atuais = NEWapp.request_models()
+    (tmp_path / "modelo_impacto_final_20250301.pkl").write_bytes(b"nao e um pickle")
+    resposta = client.post('/admin/recarregar_modelos', json={"aguardar": True}, headers=TOKEN)
+    assert resposta.status_code == 422 and resposta.json["status"] == "falhou"
+    assert NEWapp.request_models() is atuais
+
+    # Modelo que carrega mas não prediz: reprovado na predição de teste
+    (tmp_path / "modelo_impacto_final_20250301.pkl").unlink()
+    publicar("20250401", categoria={"nao": "e um modelo"})
+    assert NEWapp.model_reloader.reload()["status"] == "falhou"
+    assert NEWapp.request_models() is atuais
+
+
+def test_requisicao_em_andamento_nao_mistura_versoes(recarga, modelos_sinteticos):
+    _, publicar, _ = recarga
+    publicar("20250101")
+    NEWapp.model_reloader.reload()
+    with NEWapp.app.test_request_context('/predict'):
+        antes = NEWapp.request_models()
+        NEWapp.predict_texts(modelos_sinteticos["textos"][:2])
+        publicar("20250201")
+        assert NEWapp.model_reloader.reload()["status"] == "recarregado"
+        assert NEWapp.request_models() is antes
+        NEWapp.predict_texts(modelos_sinteticos["textos"][2:4])
+    novos = NEWapp.request_models()
+    assert novos is not antes and novos["versao"] != antes["versao"]
+    # A requisição antiga não gravou no cache da versão nova
+    NEWapp.predict_texts(modelos_sinteticos["textos"][2:3])
+    assert NEWapp.prediction_cache.model_version == novos["versao"]
+    assert len(NEWapp.prediction_cache) == 1
+
+
+def test_observador_espera_o_arquivo_estabilizar():
+    estados = iter([("a",), ("b",), ("c",), ("c",)])
+    atual = {"valor": ("a",)}
+    trocas = []
+
+    def fingerprint():
+        try:
+            atual["valor"] = next(estados)
+        except StopIteration:
+            pass
+        return atual["valor"]
+
+    reloader = ModelReloader(fingerprint, lambda: "novo", lambda candidato: None, trocas.append)
+    reloader.loaded_fingerprint = ("a",)
+    reloader.start_watcher(0.01)
+    prazo = time.time() + 5
+    while not trocas and time.time() < prazo:
+        time.sleep(0.01)
+    reloader.stop_watcher()
+    # "b" mudou antes da segunda verificação; "c" foi visto duas vezes seguidas
+    assert trocas == ["novo"] and reloader.loaded_fingerprint == ("c",)
@@ -0,0 +1,78 @@
+import gc
+import os
+import runpy
+import pytest
+import NEWapp
+
+CONF = os.path.join(os.path.dirname(NEWapp.__file__), "gunicorn.conf.py")
+
+
+def test_create_app_devolve_o_app_ja_aquecido():
+    assert NEWapp.create_app() is NEWapp.app
+    assert NEWapp.startup_warmup.ready
+    import wsgi
+    assert wsgi.application is NEWapp.app
+
+
+def test_configuracao_do_gunicorn_vem_do_ambiente(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    monkeypatch.setenv("GUNICORN_THREADS", "8")
+    monkeypatch.setenv("PORT", "8081")
+    conf = runpy.run_path(CONF)
+    assert (conf["workers"], conf["threads"], conf["bind"]) == (3, 8, "0.0.0.0:8081")
+    assert conf["preload_app"] is True and conf["worker_class"] == "gthread"
+    monkeypatch.setenv("GUNICORN_PRELOAD", "0")
+    assert runpy.run_path(CONF)["preload_app"] is False
+
+
+def test_backend_jsonl_recusado_com_varios_workers(monkeypatch):
+    monkeypatch.setenv("POSTS_BACKEND", "jsonl")
+    monkeypatch.setenv("WEB_CONCURRENCY", "2")
+    with pytest.raises(RuntimeError, match="jsonl"):
+        runpy.run_path(CONF)
+    monkeypatch.setenv("WEB_CONCURRENCY", "1")
+    assert runpy.run_path(CONF)["workers"] == 1
+
+
+def test_prepare_fork_congela_os_objetos_carregados():
+    try:
+        NEWapp.prepare_fork()
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
+
+
+def test_worker_abre_a_propria_conexao_com_o_armazenamento(monkeypatch, tmp_path):
+    monkeypatch.setattr(NEWapp, "POSTS_DB_PATH", str(tmp_path / "real_posts.db"))
+    do_mestre = NEWapp.get_post_store()
+    do_mestre.count()
+    try:
+        NEWapp.prepare_fork()
+    finally:
+        gc.unfreeze()
+    assert do_mestre._connections == [] and "store" not in NEWapp._post_store_cache
+    pid = os.fork()
+    if pid == 0:
+        store = NEWapp.get_post_store()
+        store.insert({"id_hash": "filho", "titulo": "Seca", "conteudo": "Estiagem"})
+        # Armazenamento novo, com uma única conexão, aberta neste processo
+        os._exit(0 if store is not do_mestre and len(store._connections) == 1 and store._local.pid == os.getpid() else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert NEWapp.get_post_store().get("filho")["titulo"] == "Seca"
+
+
+def test_worker_recria_as_threads_depois_do_fork(monkeypatch):
+    monkeypatch.setattr(NEWapp, "ENRICHMENT_WORKERS", 2)
+    monkeypatch.setattr(NEWapp, "enrichment_queue", NEWapp.EnrichmentQueue(lambda key: None, workers=2))
+    NEWapp.enrichment_queue.start()
+    pid = os.fork()
+    if pid == 0:
+        # Processo filho: as threads do pai não existem aqui até start_worker()
+        vivas_antes = sum(t.is_alive() for t in NEWapp.enrichment_queue._threads)
+        NEWapp.start_worker()
+        vivas = sum(t.is_alive() for t in NEWapp.enrichment_queue._threads)
+        os._exit(0 if (vivas_antes, vivas) == (0, 2) else 1)
+    _, status = os.waitpid(pid, 0)
+    NEWapp.enrichment_queue.stop()
+    assert os.waitstatus_to_exitcode(status) == 0
@@ -0,0 +1,54 @@
+import random
+import pytest
+import NEWapp
+from normalizacao import normalize_text
+
+
+def _categoria_antiga(text, predicted_category):
+    text = normalize_text(text) or ""
+    synonyms = NEWapp.disaster_synonyms_validation.get(predicted_category, []) + [predicted_category]
+    return any(synonym in text for synonym in synonyms)
+
+
+def _impacto_antigo(text, impact_level):
+    text = normalize_text(text) or ""
+    synonyms = NEWapp.impact_data.get(impact_level, NEWapp.impact_data["indefinido"])["sinonimos_intensidade"]
+    return any(synonym in text for synonym in synonyms)
+
+
+def _textos():
+    rng = random.Random(3)
+    termos = [s for lista in NEWapp.disaster_synonyms_validation.values() for s in lista]
+    termos += [s for d in NEWapp.impact_data.values() for s in d["sinonimos_intensidade"]]
+    termos += list(NEWapp.disaster_synonyms_validation) + ["rua", "muito", "hoje", "Chuvarada", "GRAVÍSSIMO", "seca-feira"]
+    return [" ".join(rng.sample(termos, rng.randint(0, 6))) for _ in range(400)] + ["", "chuvas", "Seca"]
+
+
+@pytest.mark.parametrize("categoria", list(NEWapp.disaster_synonyms_validation) + ["Modelo de Categoria não carregado", ""])
+def test_categoria_igual_a_busca_por_substring(categoria):
+    for texto in _textos():
+        hits = NEWapp.scan_synonyms(texto)
+        assert NEWapp.get_synonym_matcher().has_category(hits, normalize_text(texto) or "", categoria) == _categoria_antiga(texto, categoria), texto
+
+
+@pytest.mark.parametrize("nivel", list(NEWapp.impact_data) + ["nível desconhecido"])
+def test_impacto_igual_a_busca_por_substring(nivel):
+    for texto in _textos():
+        valido, motivo = NEWapp.validate_impact(texto, nivel, hits=NEWapp.scan_synonyms(texto))
+        assert valido == _impacto_antigo(texto, nivel), texto
+        assert motivo == f"impacto {nivel} {'válido' if valido else 'não corresponde ao texto'}"
+
+
+def test_uma_passada_serve_aos_dois_validadores(monkeypatch):
+    texto = "Enchente forte com alagamento severo em toda a cidade, dano grande"
+    hits = NEWapp.scan_synonyms(texto)
+    assert "desastre_hidrico" in hits.categories and "alto impacto a pequena área" in hits.impacts
+    monkeypatch.setattr(NEWapp.get_synonym_matcher(), "scan", lambda text: pytest.fail("texto varrido de novo"))
+    assert NEWapp.validate_category(texto, "desastre_hidrico", hits=hits) == (True, "válido")
+    assert NEWapp.validate_impact(texto, "alto impacto a média área", hits=hits)[0]
+    assert not NEWapp.validate_category(texto, "queimada", hits=hits)[0]
+
+
+def test_dicionario_substituido_recompila_o_automato(monkeypatch):
+    monkeypatch.setattr(NEWapp, "disaster_synonyms_validation", {"granizo": ["pedras de gelo"]})
+    assert NEWapp.validate_category("Caíram pedras de gelo do tamanho de ovos no bairro todo", "granizo")[0]